@@ -13,6 +13,7 @@ from app.schemas.auth import (
     SuccessResponse
 )
 from app.services.auth_service import auth_service
+from app.services.password_hasher import PasswordHashingBusy
 from app.utils.dependencies import get_current_active_user
 
 logger = logging.getLogger(__name__)
@@ -47,7 +48,7 @@ async def sign_up(user_data: UserSignUpRequest, background_tasks: BackgroundTask
             }
         )
         
-    except HTTPException:
+    except (HTTPException, PasswordHashingBusy):
         raise
     except Exception as e:
         logger.error(f"Signup error: {e}")
@@ -64,7 +65,7 @@ async def sign_in(credentials: UserSignInRequest):
         logger.info(f"✅ User signed in: {credentials.email}")
         return token_response
         
-    except HTTPException:
+    except (HTTPException, PasswordHashingBusy):
         raise
     except Exception as e:
         logger.error(f"Signin error: {e}")
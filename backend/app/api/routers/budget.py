@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 import logging
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, Optional
 
 from app.schemas.budget import (
     ExpenseItem,
@@ -10,9 +11,17 @@ from app.schemas.budget import (
     BatchCategorizationResponse,
     ModelInfoResponse,
     HealthCheckResponse,
+    TransactionHistoryResponse,
+    SpendingSummaryResponse,
+    CategoryEnum,
     ErrorResponse
 )
+from app.schemas.auth import UserResponse
 from app.services.budget_service import budget_service
+from app.services.inference_executor import InferenceQueueFull
+from app.services.spending_rollups import MONTH_PATTERN, month_key
+from app.services.transaction_store import transaction_store
+from app.utils.dependencies import get_current_active_user, get_optional_user
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +73,8 @@ async def categorize_expense(
         result = await budget_service.categorize_single_expense(expense)
         return result
         
+    except InferenceQueueFull:
+        raise
     except Exception as e:
         logger.error(f"❌ Budget categorization error: {str(e)}")
         raise HTTPException(
@@ -83,10 +94,11 @@ async def categorize_expense(
     Categorize multiple expenses in a single request for better performance.
     
     **Features:**
-    - Process up to 100 transactions at once
+    - Process up to 100 transactions at once (use `/stream-categorize` for full statements)
     - Automatic summary statistics
     - Category distribution analysis
     - Individual confidence scores
+    - Results are stored for signed-in users (send the bearer token), see `/transactions`
     
     **Response includes:**
     - Individual categorization results
@@ -97,7 +109,8 @@ async def categorize_expense(
 )
 async def batch_categorize_expenses(
     batch_request: BatchExpenseRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    current_user: Optional[UserResponse] = Depends(get_optional_user)
 ):
     """Categorize multiple expenses in batch"""
     background_tasks.add_task(update_stats, "budget_batch_categorize")
@@ -109,10 +122,13 @@ async def batch_categorize_expenses(
                 detail="Maximum 100 expenses allowed per batch request"
             )
         
-        result = await budget_service.batch_categorize_expenses(batch_request)
+        result = await budget_service.batch_categorize_expenses(
+            batch_request,
+            user_id=current_user.id if current_user else None
+        )
         return result
         
-    except HTTPException:
+    except (HTTPException, InferenceQueueFull):
         raise
     except Exception as e:
         logger.error(f"❌ Batch categorization error: {str(e)}")
@@ -125,6 +141,191 @@ async def batch_categorize_expenses(
             }
         )
 
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that reads the request body while responding.
+    
+    The stock response consumes ``receive`` to watch for client disconnects,
+    which would swallow the body chunks still being uploaded. A disconnect is
+    instead surfaced by ``request.stream()`` itself.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+STREAM_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+}
+
+@router.post(
+    "/stream-categorize",
+    summary="Stream Categorize Bank Statement",
+    description="""
+    Categorize a full bank statement uploaded as the raw request body and
+    stream the results back as NDJSON while the upload is processed.
+    
+    **Input formats** (chosen by `format` or the `Content-Type` header):
+    - **CSV** (`text/csv`): header row with a `description` column and optional `amount` and `date` columns
+    - **NDJSON** (`application/x-ndjson`): one `{"description": ..., "amount": ..., "date": ...}` object per line
+    
+    **Response** (`application/x-ndjson`):
+    - One categorization result per line, in input order
+    - A final line with `"type": "summary"` holding category totals and distribution
+    
+    There is no row limit; memory use is bounded by the chunk size.
+    Results are stored for signed-in users, as with `/batch-categorize`.
+    """,
+    response_class=UploadStreamingResponse
+)
+async def stream_categorize_expenses(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_format: Optional[str] = Query(None, alias="format", description="csv or ndjson"),
+    current_user: Optional[UserResponse] = Depends(get_optional_user)
+):
+    """Stream categorization results for an uploaded CSV/NDJSON statement"""
+    background_tasks.add_task(update_stats, "budget_stream_categorize")
+    
+    if file_format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        file_format = STREAM_CONTENT_TYPES.get(content_type)
+    
+    if file_format not in ("csv", "ndjson"):
+        raise HTTPException(
+            status_code=415,
+            detail={
+                "error": "Unsupported statement format",
+                "message": "Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson",
+            }
+        )
+    
+    return UploadStreamingResponse(
+        budget_service.stream_categorize_expenses(
+            request.stream(),
+            file_format,
+            user_id=current_user.id if current_user else None
+        ),
+        media_type="application/x-ndjson"
+    )
+
+@router.get(
+    "/transactions",
+    response_model=TransactionHistoryResponse,
+    summary="Get Stored Transactions",
+    description="""
+    Transactions stored from your batch and streaming categorizations, newest first.
+    
+    **Parameters:**
+    - **start** / **end**: date range, `start` inclusive and `end` exclusive (optional)
+    - **category**: only this category (optional)
+    - **limit**: maximum number of transactions (default 100, max 1000)
+    
+    Writes are buffered, so a categorization can take up to about a second to appear.
+    """,
+    responses={401: {"description": "Not authenticated"}}
+)
+async def get_transactions(
+    start: Optional[datetime] = Query(None, description="Earliest transaction date"),
+    end: Optional[datetime] = Query(None, description="Transactions before this date"),
+    category: Optional[CategoryEnum] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: UserResponse = Depends(get_current_active_user)
+):
+    """Get the authenticated user's stored transactions"""
+    try:
+        transactions = await transaction_store.find(
+            current_user.id,
+            start=start,
+            end=end,
+            category=category.value if category else None,
+            limit=limit
+        )
+        return TransactionHistoryResponse(count=len(transactions), transactions=transactions)
+        
+    except RuntimeError as e:
+        logger.error(f"❌ Transaction history unavailable: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Transaction history unavailable",
+                "message": str(e)
+            }
+        )
+    except Exception as e:
+        logger.error(f"❌ Error fetching transactions: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Failed to fetch transactions",
+                "message": str(e)
+            }
+        )
+
+@router.get(
+    "/summary",
+    response_model=SpendingSummaryResponse,
+    summary="Get Spending Summary",
+    description="""
+    Spending totals of your stored transactions over a range of months, read
+    from monthly rollups that are kept up to date as transactions are stored.
+    
+    **Parameters:**
+    - **start** / **end**: months as `YYYY-MM`, both inclusive (default: the current month)
+    
+    **Returns:**
+    - Per-month totals and counts
+    - Category totals, counts and percentage distribution
+    - Top spending category
+    """,
+    responses={401: {"description": "Not authenticated"}}
+)
+async def get_spending_summary(
+    start: Optional[str] = Query(None, description="First month, YYYY-MM"),
+    end: Optional[str] = Query(None, description="Last month, YYYY-MM"),
+    current_user: UserResponse = Depends(get_current_active_user)
+):
+    """Get the authenticated user's spending summary"""
+    end = end or month_key(datetime.utcnow())
+    start = start or end
+    if not MONTH_PATTERN.match(start) or not MONTH_PATTERN.match(end) or start > end:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Invalid month range",
+                "message": "start and end must be months as YYYY-MM with start <= end"
+            }
+        )
+    
+    try:
+        summary = await transaction_store.summary(current_user.id, start, end)
+        return SpendingSummaryResponse(data=summary)
+        
+    except RuntimeError as e:
+        logger.error(f"❌ Spending summary unavailable: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Spending summary unavailable",
+                "message": str(e)
+            }
+        )
+    except Exception as e:
+        logger.error(f"❌ Error building spending summary: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Failed to build spending summary",
+                "message": str(e)
+            }
+        )
+
 @router.get(
     "/model-info",
     response_model=ModelInfoResponse,
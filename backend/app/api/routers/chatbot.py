@@ -1,7 +1,9 @@
 # app/api/routers/chatbot.py
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi.responses import StreamingResponse
 import logging
 from datetime import datetime
+from typing import Optional
 
 from app.schemas.chatbot import (
     ChatRequest,
@@ -10,7 +12,10 @@ from app.schemas.chatbot import (
     SupportedTopicsResponse,
     ErrorResponse
 )
+from app.schemas.auth import UserResponse
 from app.services.chatbot_service import chatbot_service
+from app.services.inference_executor import InferenceQueueFull
+from app.utils.dependencies import get_optional_user
 
 logger = logging.getLogger(__name__)
 
@@ -46,7 +51,8 @@ async def update_stats(endpoint: str):
     **Input Requirements:**
     - **query**: Your specific financial question
     - **user_profile**: Personal and financial information
-    - **transactions**: List of your financial transactions
+    - **transactions**: List of your financial transactions (optional when signed in:
+      your average monthly spending over the last 3 months of stored transactions is used)
     
     **AI Features:**
     - Contextual analysis of your financial health
@@ -57,13 +63,14 @@ async def update_stats(endpoint: str):
 )
 async def get_financial_advice(
     request: ChatRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    current_user: Optional[UserResponse] = Depends(get_optional_user)
 ):
     """Get AI-powered financial advice"""
     background_tasks.add_task(update_stats, "chatbot_advice")
     
     try:
-        response = await chatbot_service.get_financial_advice(request)
+        response = await chatbot_service.get_financial_advice(request, current_user.id if current_user else None)
         return response
         
     except ValueError as e:
@@ -76,6 +83,8 @@ async def get_financial_advice(
                 "suggestion": "Please check your input data and try again"
             }
         )
+    except InferenceQueueFull:
+        raise
     except Exception as e:
         logger.error(f"❌ Chatbot error: {str(e)}")
         raise HTTPException(
@@ -87,6 +96,63 @@ async def get_financial_advice(
             }
         )
 
+@router.post(
+    "/chat/stream",
+    summary="Stream Financial Advice",
+    description="""
+    Same as `/chat`, but the answer is streamed as Server-Sent Events while the
+    model generates it, so the first words arrive in milliseconds.
+    
+    **Events:**
+    - **meta**: `query_category` and `financial_analysis`, sent immediately
+    - **token**: `{"content": "..."}` chunks of the answer
+    - **done**: full `answer`, `method`, timing and `time_to_first_token_ms`
+    - **error**: sent if the model stops mid-answer
+    
+    Validation errors (422) and a busy server (503) are returned as normal
+    HTTP errors before the stream starts.
+    """
+)
+async def stream_financial_advice(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Optional[UserResponse] = Depends(get_optional_user)
+):
+    """Stream AI-powered financial advice as Server-Sent Events"""
+    background_tasks.add_task(update_stats, "chatbot_advice_stream")
+    
+    try:
+        events = await chatbot_service.stream_financial_advice(request, current_user.id if current_user else None)
+        
+    except ValueError as e:
+        logger.error(f"❌ Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Validation failed",
+                "message": str(e),
+                "suggestion": "Please check your input data and try again"
+            }
+        )
+    except InferenceQueueFull:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Chatbot stream error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Financial advice generation failed",
+                "message": str(e),
+                "suggestion": "Please try again or contact support"
+            }
+        )
+    
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get(
     "/health",
     response_model=ChatHealthResponse,
@@ -94,10 +160,14 @@ async def get_financial_advice(
     description="""
     Check the health status of the financial chatbot service.
     
+    Answers instantly from cached state: Groq availability is tracked from real
+    chat traffic, with a cheap probe only after a period without traffic.
+    
     **Returns:**
     - Service availability status
-    - Groq API connectivity status
-    - System uptime information
+    - Groq API status (available, degraded, unavailable or unknown)
+    - Recent success rate, p50/p95 latency and last error
+    - Answer cache statistics
     - Timestamp of health check
     """
 )
@@ -187,6 +257,8 @@ async def get_quick_advice(
             "timestamp": response.timestamp
         }
         
+    except InferenceQueueFull:
+        raise
     except Exception as e:
         logger.error(f"❌ Quick advice error: {str(e)}")
         raise HTTPException(
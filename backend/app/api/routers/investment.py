@@ -11,10 +11,14 @@ from app.schemas.investment import (
     InvestmentRecommendationResponse,
     BatchInvestmentResponse,
     ModelTrainingResponse,
+    TrainingJobResponse,
     HealthCheckResponse,
     ErrorResponse
 )
 from app.services.investment_service import investment_service
+from app.core.config import settings
+from app.services.inference_executor import InferenceQueueFull
+from app.services.training_jobs import TrainingJobInProgress
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +74,8 @@ async def recommend_investment(
         result = await investment_service.get_investment_recommendation(profile)
         return result
         
+    except InferenceQueueFull:
+        raise
     except Exception as e:
         logger.error(f"❌ Investment recommendation error: {str(e)}")
         raise HTTPException(
@@ -89,7 +95,8 @@ async def recommend_investment(
     Get investment recommendations for multiple users in batch.
     
     **Features:**
-    - Process up to 50 user profiles at once
+    - Process up to `INVESTMENT_BATCH_MAX_PROFILES` (default 10,000) user profiles at once
+    - All profiles are scored with a single vectorized model call
     - Automatic error handling for invalid profiles
     - Detailed success/failure reporting
     - Optimized for bulk processing
@@ -108,16 +115,16 @@ async def batch_recommend_investments(
     background_tasks.add_task(update_stats, "investment_batch_recommend")
     
     try:
-        if len(batch_request.profiles) > 50:
+        if len(batch_request.profiles) > settings.INVESTMENT_BATCH_MAX_PROFILES:
             raise HTTPException(
                 status_code=422,
-                detail="Maximum 50 profiles allowed per batch request"
+                detail=f"Maximum {settings.INVESTMENT_BATCH_MAX_PROFILES} profiles allowed per batch request"
             )
         
         result = await investment_service.batch_investment_recommendations(batch_request)
         return result
         
-    except HTTPException:
+    except (HTTPException, InferenceQueueFull):
         raise
     except Exception as e:
         logger.error(f"❌ Batch investment recommendation error: {str(e)}")
@@ -133,11 +140,15 @@ async def batch_recommend_investments(
 @router.post(
     "/train",
     response_model=ModelTrainingResponse,
+    status_code=202,
     summary="Train Investment Model",
     description="""
     Retrain the investment recommendation model with latest data.
     
-    **Note:** This operation may take several minutes and runs in the background.
+    **Note:** Training runs as a background job in a separate process. The
+    response returns a `job_id` straight away; poll
+    `GET /investment/train/{job_id}` for progress. When the job completes the
+    new model replaces the current one without interrupting requests in flight.
     
     **Training Process:**
     - Generates synthetic financial data
@@ -147,13 +158,22 @@ async def batch_recommend_investments(
     """
 )
 async def train_investment_model(background_tasks: BackgroundTasks):
-    """Retrain the investment recommendation model with latest data"""
+    """Submit a background job that retrains the investment recommendation model"""
     background_tasks.add_task(update_stats, "investment_train")
     
     try:
         result = await investment_service.train_model()
         return result
         
+    except TrainingJobInProgress as e:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "error": "Training already in progress",
+                "message": str(e),
+                "job_id": e.job_id
+            }
+        )
     except Exception as e:
         logger.error(f"❌ Model training error: {str(e)}")
         raise HTTPException(
@@ -164,6 +184,33 @@ async def train_investment_model(background_tasks: BackgroundTasks):
             }
         )
 
+@router.get(
+    "/train/{job_id}",
+    response_model=TrainingJobResponse,
+    summary="Training Job Status",
+    description="""
+    Report the state of a model training job.
+    
+    **Returned Information:**
+    - Status (`queued`, `running`, `completed`, `failed`) and current stage
+    - Progress between 0 and 1
+    - Evaluation metrics once the job has completed
+    - Stage timings in milliseconds (dataset, fit, evaluate, save, load, queue wait, total)
+    """
+)
+async def get_training_job(job_id: str):
+    """Get progress, metrics and timings for a training job"""
+    job = investment_service.get_training_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Training job not found",
+                "message": f"No training job with id {job_id}"
+            }
+        )
+    return job
+
 @router.get(
     "/health",
     response_model=HealthCheckResponse,
@@ -1,7 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pathlib import Path
 
 class Settings(BaseSettings):
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     API_DEBUG: bool = True
+    PREFORK_WORKERS: int = 0  # >0: run.py preloads the models once and forks this many workers
     API_TITLE: str = "Financial Literacy Budget Planner API"
     API_VERSION: str = "1.0.0"
     API_DESCRIPTION: str = "AI-powered budget categorization and financial planning API"
@@ -18,14 +19,38 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_CACHE_SIZE: int = 10000  # verified tokens cached per process, 0 disables the cache
+    TOKEN_CACHE_TTL: int = 300  # seconds, never past the token's own expiry
+    USER_CACHE_SIZE: int = 10000  # authenticated users cached per process, 0 disables the cache
+    USER_CACHE_TTL: int = 60  # seconds
+    USER_CLAIMS_MAX_AGE: int = 60  # seconds a token's user claims are trusted without a lookup, 0 disables
+    USER_CLAIMS_TRACKED_WRITES: int = 10000  # recent user writes remembered per process to reject claims issued before them
+    PROFILE_STATS_REFRESH_INTERVAL: int = 3600  # seconds between account age refreshes of stored profile stats, 0 disables
+    PASSWORD_HASH_WORKERS: int = 2  # threads running bcrypt
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # sign-ins allowed to wait for a hashing thread
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 3.0  # seconds to wait for a slot before 503
     
     # Database Configuration
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "finzer_db"
+    INDEX_SLOW_QUERY_CHECK: bool = False  # explain the hot queries at startup and log collection scans
+    TRANSACTION_STORE_ENABLED: bool = True  # store authenticated categorizations in the transactions collection
+    TRANSACTION_WRITE_BATCH_SIZE: int = 500  # documents per insert_many
+    TRANSACTION_WRITE_MAX_WAIT_MS: float = 1000.0  # how long a buffered transaction waits for a full batch
+    TRANSACTION_WRITE_MAX_BUFFER: int = 50000  # transactions held while MongoDB is slow, newer ones are dropped
     
     
     # AI / ML API Keys
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY")
+    GROQ_API_BASE_URL: str = "https://api.groq.com/openai/v1"
+    GROQ_MODEL: str = "llama-3.1-8b-instant"
+    GROQ_TIMEOUT: float = 30.0  # seconds
+    GROQ_MAX_CONNECTIONS: int = 20  # pooled keep-alive connections
+    GROQ_HEALTH_WINDOW_SECONDS: int = 300  # recent calls considered for /chatbot/health
+    GROQ_HEALTH_IDLE_PROBE_SECONDS: int = 120  # probe only after this long without traffic
+    CHAT_CACHE_SIZE: int = 1000  # cached answers, 0 disables the cache
+    CHAT_CACHE_TTL: int = 1800  # seconds
+    CHAT_HISTORY_MONTHS: int = 3  # months of stored spending averaged when a chat request sends no transactions
     ENABLE_CHATBOT_MODEL: bool = os.getenv("ENABLE_CHATBOT_MODEL", "False").lower() in ("true", "1", "yes")
 
     # CORS Configuration
@@ -45,6 +70,32 @@ class Settings(BaseSettings):
     DATASET_FILE_NAME: str = "transactions_dataset.csv"
     ENABLE_ML_LOGGING: bool = True
     MODEL_AUTO_RETRAIN: bool = False
+    CATEGORIZER_ML_BATCH_SIZE: int = 10000  # rows per vectorized predict_proba call
+    LAZY_MODEL_LOADING: bool = False  # load/train models in the background after the server starts
+    CATEGORIZER_CACHE_SIZE: int = 10000  # cached descriptions, 0 disables the cache
+    CATEGORIZER_CACHE_TTL: int = 3600  # seconds
+    CATEGORIZER_MODEL_CHECK_INTERVAL: int = 30  # seconds between model file change checks
+    INVESTMENT_TRAINING_SAMPLES: int = 5000  # synthetic rows generated for each training run
+    INVESTMENT_COMPILED_INFERENCE: bool = True  # predict with the flat-array forest instead of the sklearn pipeline
+    INVESTMENT_MODEL_CHECK_INTERVAL: int = 30  # seconds between model file change checks
+    INVESTMENT_GRID_ENABLED: bool = False  # serve recommendations from a precomputed allocation grid
+    INVESTMENT_GRID_TOLERANCE: float = 0.01  # max 99th-percentile allocation error vs the model before the grid is rejected
+    INVESTMENT_GRID_VALIDATION_SAMPLES: int = 5000  # synthetic profiles used to check a new grid
+    TRAINING_JOB_HISTORY: int = 20  # finished training jobs kept for status lookups
+    INVESTMENT_BATCH_MAX_PROFILES: int = 10000  # profiles accepted by /investment/batch-recommend
+    STREAM_CATEGORIZE_CHUNK_SIZE: int = 1000  # rows categorized per chunk when streaming
+    STREAM_MAX_LINE_LENGTH: int = 65536  # characters allowed in one uploaded line
+    
+    # Inference Executor ("thread" or "process")
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_WORKERS: int = 4
+    INFERENCE_MAX_QUEUE: int = 64  # requests allowed to wait for a worker
+    INFERENCE_QUEUE_TIMEOUT: float = 5.0  # seconds to wait for a slot before 503
+    
+    # Micro-batching of single /budget/categorize requests (opt-in)
+    MICRO_BATCH_ENABLED: bool = False
+    MICRO_BATCH_MAX_SIZE: int = 64  # items per coalesced predict_proba call
+    MICRO_BATCH_MAX_WAIT_MS: float = 5.0  # how long the first request waits for company
     
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
@@ -54,9 +105,26 @@ class Settings(BaseSettings):
     # Background Tasks
     ENABLE_BACKGROUND_TASKS: bool = True
     
-    # Rate Limiting
-    RATE_LIMIT_REQUESTS: int = 100
-    RATE_LIMIT_WINDOW: int = 60  # seconds
+    # Rate Limiting (token bucket per API key, user or client IP)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REQUESTS: int = 100  # bucket size: request cost a client can spend at once
+    RATE_LIMIT_WINDOW: int = 60  # seconds to refill an empty bucket
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per process) or mongodb (shared by all workers)
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = {  # "METHOD path prefix" -> cost, other routes cost 1
+        "POST /api/v1/chatbot/chat": 10,
+        "POST /api/v1/chatbot/quick-advice": 10,
+        "POST /api/v1/investment/batch-recommend": 20,
+        "POST /api/v1/investment/train": 50,
+        "POST /api/v1/budget/stream-categorize": 10,
+        "POST /api/v1/auth/signin": 10,
+        "POST /api/v1/auth/signup": 10
+    }
+    RATE_LIMIT_EXEMPT_PATHS: List[str] = ["/health", "/docs", "/redoc", "/openapi.json"]  # path prefixes
+    RATE_LIMIT_API_KEY_HEADER: str = "X-API-Key"
+    RATE_LIMIT_API_KEYS: List[str] = []  # API keys limited on their own bucket instead of by user or IP
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # key by X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_MAX_KEYS: int = 100000  # buckets kept in memory, least recently used dropped first
+    RATE_LIMIT_EVICT_INTERVAL: int = 60  # seconds between sweeps for idle (full) buckets
     
     class Config:
         env_file = ".env"
@@ -3,6 +3,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 import logging
 from app.core.config import settings
+from app.core.indexes import index_manager
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +35,8 @@ async def connect_to_mongo():
         await db.client.admin.command('ping')
         logger.info(f"✅ Connected to MongoDB: {settings.DATABASE_NAME}")
         
-        # Create indexes for users collection
-        await create_indexes()
+        # Build the registry's indexes in the background; startup does not wait for them
+        index_manager.start(db.database)
         
     except (ConnectionFailure, ServerSelectionTimeoutError) as e:
         logger.error(f"❌ Failed to connect to MongoDB: {e}")
@@ -59,14 +60,9 @@ async def close_mongo_connection():
         logger.error(f"❌ Error closing MongoDB connection: {e}")
 
 async def create_indexes():
-    """Create database indexes"""
-    try:
-        if db.database is not None:
-            # Create unique index on email
-            await db.database.users.create_index("email", unique=True)
-            logger.info("✅ Created database indexes")
-    except Exception as e:
-        logger.error(f"❌ Error creating indexes: {e}")
+    """Create the indexes declared in app/core/indexes.py and wait for them"""
+    if db.database is not None:
+        return await index_manager.apply(db.database)
 
 def get_database():
     """Get database instance"""
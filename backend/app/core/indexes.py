@@ -0,0 +1,226 @@
+# app/core/indexes.py
+"""
+Declarative MongoDB index registry.
+
+Every index the application relies on is declared here, per collection, as
+a pymongo ``IndexModel`` with an explicit name (compound keys, TTL via
+``expireAfterSeconds`` and partial indexes via ``partialFilterExpression``
+are all plain IndexModel options). Collections that need creation options,
+such as time-series collections, are declared in ``COLLECTION_OPTIONS`` and
+created before their indexes. At startup the IndexManager creates
+them in the background, so the API is ready before the builds finish, and
+records the drift between the registry and what the server actually has.
+
+``HOT_QUERIES`` lists the queries on the request path; with
+INDEX_SLOW_QUERY_CHECK enabled their plans are explained after the indexes
+are applied and any collection scan is logged.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Collections created with options; they cannot be converted once they exist
+COLLECTION_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "transactions": {
+        "timeseries": {"timeField": "date", "metaField": "user_id", "granularity": "hours"}
+    },
+}
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+        IndexModel([("created_at", DESCENDING)], name="created_at_-1"),
+    ],
+    # Per-user date ranges, read newest first by walking the index backwards.
+    # Same key and name as the index MongoDB 6.3+ creates for a time-series
+    # collection's meta and time fields, so it is not built twice.
+    "transactions": [
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_id_1_date_1"),
+    ],
+    # One rollup per user and month; unique so $inc upserts and $merge never duplicate it
+    "spending_rollups": [
+        IndexModel([("user_id", ASCENDING), ("month", ASCENDING)], name="user_id_1_month_1", unique=True),
+    ],
+    # Token buckets of the mongodb rate limit backend, removed once refilled
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+    ],
+}
+
+# Queries served on the request path, checked for collection scans
+HOT_QUERIES: List[Dict[str, Any]] = [
+    {"name": "user by id", "collection": "users", "filter": {"_id": ObjectId()}},
+    {"name": "user by email", "collection": "users", "filter": {"email": "probe@example.com"}},
+    {"name": "newest users", "collection": "users", "filter": {}, "sort": [("created_at", DESCENDING)]},
+    {
+        "name": "transactions by user and date",
+        "collection": "transactions",
+        "filter": {"user_id": ObjectId(), "date": {"$gte": datetime(2024, 1, 1)}},
+        "sort": [("date", DESCENDING)]
+    },
+    {
+        "name": "spending rollups by user and month",
+        "collection": "spending_rollups",
+        "filter": {"user_id": ObjectId(), "month": {"$gte": "2024-01", "$lte": "2024-12"}},
+        "sort": [("month", ASCENDING)]
+    },
+]
+
+# Index options compared when looking for drift
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _normalize(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Key and compared options of an index, from an IndexModel document or index_information()"""
+    keys = spec["key"].items() if hasattr(spec["key"], "items") else spec["key"]
+    normalized = {
+        "key": [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+                for field, direction in keys]
+    }
+    for option in COMPARED_OPTIONS:
+        if spec.get(option) not in (None, False):
+            value = spec[option]
+            normalized[option] = dict(value) if isinstance(value, dict) else value
+    return normalized
+
+
+async def ensure_collections(database) -> List[str]:
+    """Create the collections in COLLECTION_OPTIONS that do not exist yet; returns their names"""
+    existing = set(await database.list_collection_names())
+    created = []
+    for collection, options in COLLECTION_OPTIONS.items():
+        if collection in existing:
+            continue
+        try:
+            await database.create_collection(collection, **options)
+            created.append(collection)
+        except OperationFailure as e:
+            # Servers without time-series support (< 5.0) get a regular collection
+            logger.warning(f"⚠️ Could not create {collection} with {list(options)}: {e}; using a regular collection")
+        except CollectionInvalid:
+            pass  # created concurrently by another worker
+    return created
+
+
+async def apply_indexes(database) -> Dict[str, Any]:
+    """Create every declared index; one failing index does not stop the others"""
+    created, errors = [], {}
+    await ensure_collections(database)
+    for collection, models in INDEX_REGISTRY.items():
+        for model in models:
+            name = model.document["name"]
+            try:
+                await database[collection].create_indexes([model])
+                created.append(f"{collection}.{name}")
+            except Exception as e:
+                errors[f"{collection}.{name}"] = str(e)
+                logger.error(f"❌ Could not create index {collection}.{name}: {e}")
+    return {"created": created, "errors": errors}
+
+
+async def index_drift(database) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Differences between the registry and the server, per collection.
+
+    ``missing``: declared but absent; ``mismatched``: same name, different
+    keys or options; ``undeclared``: present on the server but not declared.
+    Collections without any drift are left out.
+    """
+    drift = {}
+    for collection, models in INDEX_REGISTRY.items():
+        actual = await database[collection].index_information()
+        actual.pop("_id_", None)
+        declared = {model.document["name"]: model.document for model in models}
+
+        report = {
+            "missing": sorted(name for name in declared if name not in actual),
+            "mismatched": sorted(
+                name for name in declared
+                if name in actual and _normalize(declared[name]) != _normalize(actual[name])
+            ),
+            "undeclared": sorted(name for name in actual if name not in declared)
+        }
+        if any(report.values()):
+            drift[collection] = report
+    return drift
+
+
+def _has_collection_scan(plan: Any) -> bool:
+    if isinstance(plan, dict):
+        return plan.get("stage") == "COLLSCAN" or any(_has_collection_scan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collection_scan(item) for item in plan)
+    return False
+
+
+async def find_collection_scans(database) -> List[str]:
+    """Names of the HOT_QUERIES whose winning plan scans the whole collection"""
+    flagged = []
+    for query in HOT_QUERIES:
+        cursor = database[query["collection"]].find(query["filter"]).limit(1)
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        explain = await cursor.explain()
+        if _has_collection_scan(explain.get("queryPlanner", {}).get("winningPlan")):
+            flagged.append(query["name"])
+    return flagged
+
+
+class IndexManager:
+    """Applies the registry in the background and keeps the last report for /health/indexes"""
+
+    def __init__(self):
+        self.state = "pending"  # pending | applying | ready | failed
+        self.report: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, database):
+        """Schedule index creation without waiting for it"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.apply(database))
+
+    async def apply(self, database) -> Dict[str, Any]:
+        self.state = "applying"
+        start_time = time.perf_counter()
+        try:
+            result = await apply_indexes(database)
+            drift = await index_drift(database)
+            self.report = {
+                **result,
+                "drift": drift,
+                "applied_at": datetime.utcnow().isoformat(),
+                "duration_ms": round((time.perf_counter() - start_time) * 1000, 2)
+            }
+            if drift:
+                logger.warning(f"⚠️ Index drift between registry and database: {drift}")
+
+            if settings.INDEX_SLOW_QUERY_CHECK:
+                scans = await find_collection_scans(database)
+                self.report["collection_scans"] = scans
+                for name in scans:
+                    logger.warning(f"🐢 Hot query '{name}' runs as a collection scan")
+
+            self.state = "failed" if result["errors"] else "ready"
+            logger.info(f"✅ Database indexes applied in {self.report['duration_ms']}ms")
+        except Exception as e:
+            self.state = "failed"
+            self.report = {"error": str(e)}
+            logger.error(f"❌ Error applying indexes: {e}")
+        return self.report
+
+    def status(self) -> Dict[str, Any]:
+        return {"state": self.state, **self.report}
+
+
+# Global index manager
+index_manager = IndexManager()
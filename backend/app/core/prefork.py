@@ -0,0 +1,133 @@
+# app/core/prefork.py
+"""
+Pre-fork launcher: load the app and its models once, then fork the workers.
+
+``uvicorn --workers N`` starts N fresh interpreters, each importing pandas,
+scikit-learn and the model pickles into its own heap. Here the parent does
+all of that once, binds the listening socket and forks; the workers share
+those pages copy-on-write and each serves the shared socket with its own
+uvicorn server. Linux/macOS only (needs ``os.fork``).
+"""
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A worker that dies sooner than this after starting is restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+def _preload():
+    """Import the app and load every model in the parent process"""
+    from app.main import app
+    from app.models.ml_models.budget_categorizer import budget_categorizer
+    from app.models.ml_models.investment_recommender import investment_recommender
+
+    # Predictions import pandas lazily; do it here so the workers share it too
+    import pandas  # noqa: F401
+
+    budget_categorizer.initializer.ensure_loaded()
+    investment_recommender.initializer.ensure_loaded()
+    return app
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket):
+    # Own process group, so a terminal Ctrl-C reaches only the parent, which
+    # then stops the workers with a single SIGTERM
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    config = uvicorn.Config(app, log_level=settings.LOG_LEVEL.lower(), access_log=True)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve_preforked(workers: int = None, host: str = None, port: int = None):
+    """Preload the app, fork ``workers`` uvicorn workers and supervise them"""
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork serving needs os.fork; use uvicorn --workers on this platform")
+
+    workers = max(1, workers or settings.PREFORK_WORKERS)
+    host = host or settings.API_HOST
+    port = port or settings.API_PORT
+
+    preload_start = time.perf_counter()
+    app = _preload()
+    sock = _bind_socket(host, port)
+
+    # Move everything loaded so far into the permanent generation: a collection
+    # in a worker would otherwise write to these objects and un-share their pages
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        f"📦 Preloaded app and models in {time.perf_counter() - preload_start:.1f}s "
+        f"({gc.get_freeze_count()} objects frozen), forking {workers} workers on {host}:{port}"
+    )
+
+    children: Dict[int, float] = {}  # pid -> start time
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                _run_worker(app, sock)
+                exit_code = 0
+            except BaseException:
+                logger.exception("❌ Worker crashed")
+            finally:
+                os._exit(exit_code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        started_at = children.pop(pid, None)
+        if started_at is None or stopping:
+            continue
+
+        logger.warning(f"⚠️ Worker {pid} exited with code {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        spawn()
+
+    sock.close()
+    logger.info("🛑 All workers stopped")
@@ -5,13 +5,28 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
+import asyncio
+import gc
+import os
 import time
 import logging
 
 from app.core.config import settings
-from app.core.database import connect_to_mongo, close_mongo_connection, check_database_health
+from app.core.database import connect_to_mongo, close_mongo_connection, check_database_health, get_database
+from app.core.indexes import index_drift, index_manager
 from app.utils.logger import setup_logging
+from app.utils.memory import read_memory_usage
+from app.utils.auth import token_cache
+from app.utils.rate_limit import RateLimitMiddleware, rate_limiter
 from app.models.ml_models.budget_categorizer import budget_categorizer
+from app.models.ml_models.investment_recommender import investment_recommender
+from app.services.inference_executor import inference_executor, InferenceQueueFull
+from app.services.training_jobs import training_job_manager
+from app.services.auth_service import auth_service
+from app.services.password_hasher import password_hasher, PasswordHashingBusy
+from app.services.profile_stats import profile_stats_refresher
+from app.services.transaction_store import transaction_store
+from app.models.ml_models.financial_chatbot import financial_chatbot
 
 # Routers
 from app.api.routers import auth, budget, investment, chatbot
@@ -34,6 +49,20 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"🚀 Starting {settings.API_TITLE} v{settings.API_VERSION}")
 
+    # ML models: load in the background when lazy loading is on, so the server accepts
+    # requests (and reports "loading" on /health) while they load or train
+    model_loading = []
+    if settings.LAZY_MODEL_LOADING:
+        logger.info("⏳ Loading ML models in the background")
+        model_loading = [
+            asyncio.create_task(asyncio.to_thread(model.initializer.ensure_loaded))
+            for model in (budget_categorizer, investment_recommender)
+        ]
+    else:
+        logger.info(f"📊 ML Model Status: {'Ready' if budget_categorizer.is_trained else 'Not Ready'}")
+        if not budget_categorizer.is_trained:
+            logger.warning("⚠️ ML model not ready. Some budget features may be limited.")
+
     # DB connect
     try:
         await connect_to_mongo()
@@ -42,15 +71,32 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Failed to connect to database: {e}")
         logger.error("⚠️ Application will continue but authentication may not work")
 
-    # ML model check
-    logger.info(f"📊 ML Model Status: {'Ready' if budget_categorizer.is_trained else 'Not Ready'}")
-    if not budget_categorizer.is_trained:
-        logger.warning("⚠️ ML model not ready. Some budget features may be limited.")
+    # Inference workers
+    inference_executor.start()
+
+    # Keeps the time-based field of the stored profile stats current
+    profile_stats_refresher.start()
+
+    # Groq upstream health monitor (idle probes only)
+    if financial_chatbot is not None:
+        financial_chatbot.groq_client.health.start()
 
     yield
 
     # Shutdown
     logger.info("🛑 Shutting down FinZer API...")
+    if model_loading:
+        # Loads run in threads and cannot be interrupted; let them finish
+        await asyncio.gather(*model_loading, return_exceptions=True)
+    await profile_stats_refresher.stop()
+    inference_executor.shutdown()
+    password_hasher.shutdown()
+    training_job_manager.shutdown()
+    if financial_chatbot is not None:
+        await financial_chatbot.groq_client.health.stop()
+        await financial_chatbot.groq_client.aclose()
+    # Buffered transactions are written before the connection closes
+    await transaction_store.flush()
     await close_mongo_connection()
 
 # FastAPI app instance
@@ -63,6 +109,10 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Rate limiting, added before CORS so 429 responses still carry the CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -102,6 +152,23 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         }
     )
 
+# A full inference or password hashing queue is a temporary overload: ask the client to retry
+@app.exception_handler(InferenceQueueFull)
+@app.exception_handler(PasswordHashingBusy)
+async def service_busy_handler(request: Request, exc: Exception):
+    logger.warning(f"⚠️ {str(exc)}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "detail": {
+                "error": "Service busy",
+                "message": str(exc),
+                "suggestion": "Please retry in a few seconds"
+            }
+        },
+        headers={"Retry-After": "1"}
+    )
+
 @app.exception_handler(500)
 async def internal_server_error_handler(request: Request, exc: Exception):
     logger.error(f"❌ Internal server error on {request.url}: {str(exc)}")
@@ -142,30 +209,88 @@ async def root():
             "budget": {
                 "categorize": "/api/v1/budget/categorize",
                 "batch_categorize": "/api/v1/budget/batch-categorize",
+                "stream_categorize": "/api/v1/budget/stream-categorize",
+                "transactions": "/api/v1/budget/transactions",
+                "summary": "/api/v1/budget/summary",
                 "model_info": "/api/v1/budget/model-info",
                 "health": "/api/v1/budget/health"
             },
             "investment": "/api/v1/investment",
-            "chatbot": "/api/v1/chatbot"
+            "chatbot": {
+                "chat": "/api/v1/chatbot/chat",
+                "chat_stream": "/api/v1/chatbot/chat/stream",
+                "health": "/api/v1/chatbot/health"
+            }
         }
     }
 
+def _model_status(model) -> str:
+    if model.is_trained:
+        return "ready"
+    return "loading" if model.initializer.loading else "not_ready"
+
 # Health endpoint
 @app.get("/health", tags=["Root"])
 async def health_check():
     db_healthy = await check_database_health()
+    models = {
+        "budget_categorizer": budget_categorizer,
+        "investment_recommender": investment_recommender
+    }
+    model_states = {name: _model_status(model) for name, model in models.items()}
+
+    if "loading" in model_states.values():
+        status_value = "loading"
+        message = "ML models are still loading"
+    elif db_healthy and budget_categorizer.is_trained:
+        status_value = "healthy"
+        message = "All systems operational"
+    else:
+        status_value = "degraded"
+        message = "Some services are not fully operational"
+
     return {
-        "status": "healthy" if db_healthy and budget_categorizer.is_trained else "degraded",
+        "status": status_value,
         "database": "connected" if db_healthy else "disconnected",
-        "ml_model": "ready" if budget_categorizer.is_trained else "not_ready",
+        "ml_model": model_states["budget_categorizer"],
+        "models": {
+            name: {"status": model_states[name], **model.initializer.status()}
+            for name, model in models.items()
+        },
+        "inference": inference_executor.stats(),
+        "token_cache": token_cache.stats(),
+        "user_cache": auth_service.user_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "transaction_writes": transaction_store.stats(),
+        "rate_limit": rate_limiter.stats() if settings.RATE_LIMIT_ENABLED else "disabled",
         "version": settings.API_VERSION,
-        "message": (
-            "All systems operational"
-            if db_healthy and budget_categorizer.is_trained
-            else "Some services are not fully operational"
-        )
+        "message": message
     }
 
+# Per-worker memory (each request is answered by whichever worker accepts it)
+@app.get("/health/memory", tags=["Root"])
+async def memory_health():
+    usage = read_memory_usage()
+    return {
+        "pid": os.getpid(),
+        "parent_pid": os.getppid(),
+        "prefork_workers": settings.PREFORK_WORKERS,
+        "gc_frozen_objects": gc.get_freeze_count(),
+        "memory": usage if usage is not None else "unavailable"
+    }
+
+# Index build state and live drift between app/core/indexes.py and the database
+@app.get("/health/indexes", tags=["Root"])
+async def index_health():
+    database = get_database()
+    if database is None:
+        return {**index_manager.status(), "database": "disconnected"}
+    try:
+        drift = await index_drift(database)
+    except Exception as e:
+        drift = {"error": str(e)}
+    return {**index_manager.status(), "database": "connected", "drift": drift}
+
 # Uvicorn entrypoint
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,106 @@
+# app/models/ml_models/allocation_grid.py
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+
+class AllocationGrid:
+    """
+    Precomputed allocations over the discrete part of the profile space.
+
+    ``table`` holds the model's allocation for every combination of risk
+    profile, goal and employment type at each knot of the age and
+    debt-to-income axes, shape ``(risk, goal, employment, age, ratio,
+    assets)``. Lookups pick the categorical cell directly and interpolate
+    bilinearly between the surrounding age/ratio knots (values outside the
+    knots are clamped), so a recommendation costs a constant number of array
+    reads instead of a model evaluation.
+    """
+
+    CATEGORICAL_AXES = ("risk_profile", "goal_type", "employment_type")
+    CONTINUOUS_AXES = ("age", "debt_to_income_ratio")
+
+    def __init__(self, categories: Dict[str, List[str]], knots: Dict[str, np.ndarray], table: np.ndarray):
+        self.categories = {axis: list(categories[axis]) for axis in self.CATEGORICAL_AXES}
+        self.knots = {axis: np.asarray(knots[axis], dtype=np.float64) for axis in self.CONTINUOUS_AXES}
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.validation: Dict[str, Any] = {}
+
+        expected_shape = tuple(
+            [len(self.categories[axis]) for axis in self.CATEGORICAL_AXES]
+            + [len(self.knots[axis]) for axis in self.CONTINUOUS_AXES]
+        )
+        if self.table.shape[:-1] != expected_shape:
+            raise ValueError(f"Grid table shape {self.table.shape[:-1]} does not match axes {expected_shape}")
+        if any(len(values) < 2 for values in self.knots.values()):
+            raise ValueError("Every continuous axis needs at least two knots")
+
+        self._flat = self.table.reshape(-1, self.table.shape[-1])
+        self._index = {
+            axis: {category: position for position, category in enumerate(values)}
+            for axis, values in self.categories.items()
+        }
+
+    def _bracket(self, axis: str, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower knot index and interpolation weight for each value"""
+        knots = self.knots[axis]
+        values = np.clip(values, knots[0], knots[-1])
+        lower = np.clip(np.searchsorted(knots, values, side="right") - 1, 0, len(knots) - 2)
+        weight = (values - knots[lower]) / (knots[lower + 1] - knots[lower])
+        return lower, weight[:, None]
+
+    def lookup(self, columns: Mapping[str, Sequence[Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Allocations for every row of ``columns`` (a DataFrame or dict of lists).
+
+        Returns ``(allocations, covered)``; rows whose categories are not in
+        the grid (or whose age/ratio is missing) have ``covered`` False and
+        must be predicted by the model instead.
+        """
+        codes = []
+        for axis in self.CATEGORICAL_AXES:
+            index = self._index[axis]
+            codes.append(np.array([index.get(value, -1) for value in columns[axis]], dtype=np.intp))
+        age = np.asarray(columns["age"], dtype=np.float64)
+        ratio = np.asarray(columns["debt_to_income_ratio"], dtype=np.float64)
+
+        covered = np.all([code >= 0 for code in codes], axis=0) & ~np.isnan(age) & ~np.isnan(ratio)
+
+        # Flat index of each row's (age, ratio) corner cell in the table
+        n_ages, n_ratios = self.table.shape[3:5]
+        cell = np.ravel_multi_index([code.clip(0) for code in codes], self.table.shape[:3])
+        i, wa = self._bracket("age", np.nan_to_num(age))
+        j, wr = self._bracket("debt_to_income_ratio", np.nan_to_num(ratio))
+        corner = (cell * n_ages + i) * n_ratios + j
+
+        flat = self._flat
+        allocations = (
+            flat[corner] * ((1 - wa) * (1 - wr))
+            + flat[corner + n_ratios] * (wa * (1 - wr))
+            + flat[corner + 1] * ((1 - wa) * wr)
+            + flat[corner + n_ratios + 1] * (wa * wr)
+        )
+        return allocations, covered
+
+    def validate(self, columns: Mapping[str, Sequence[Any]], expected: np.ndarray) -> Dict[str, Any]:
+        """Compare grid lookups with the model's ``expected`` allocations for the same rows"""
+        allocations, covered = self.lookup(columns)
+        errors = np.abs(allocations[covered] - expected[covered]).max(axis=1)
+        self.validation = {
+            "samples": int(covered.sum()),
+            "max_error": round(float(errors.max()), 5) if len(errors) else None,
+            "p99_error": round(float(np.percentile(errors, 99)), 5) if len(errors) else None,
+            "mean_error": round(float(errors.mean()), 5) if len(errors) else None
+        }
+        return self.validation
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "cells": int(np.prod(self.table.shape[:-1])),
+            "axes": {
+                **{axis: len(values) for axis, values in self.categories.items()},
+                **{axis: len(values) for axis, values in self.knots.items()}
+            },
+            "memory_mb": round(self.table.nbytes / 2**20, 2),
+            "validation": self.validation
+        }
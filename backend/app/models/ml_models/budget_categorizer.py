@@ -1,23 +1,52 @@
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
 from joblib import dump, load
 import json
 import os
 from pathlib import Path
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+import re
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Tuple, Any
 from datetime import datetime
 
 from app.core.config import settings
+from app.models.ml_models.keyword_matcher import KeywordMatcher
+from app.utils.cache import TTLCache
+from app.utils.model_loading import ModelInitializer
+
+# pandas and scikit-learn are only needed to train; they are imported where
+# they are used so that importing the app does not pay for them
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
 
 logger = logging.getLogger(__name__)
 
+# Dates such as 01/04/2024, 2024-04-01 or 1.4.24
+DATE_PATTERN = re.compile(r"\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}")
+DIGITS_PATTERN = re.compile(r"\d+")
+
+# Methods whose results depend only on the description, rules and model
+CACHEABLE_METHODS = {"rule", "ml", "hybrid", "rule_priority", "ml_priority"}
+
+# Result fields that belong to one request and are not cached
+REQUEST_FIELDS = {"transaction_id", "description", "amount", "timestamp"}
+
+
+def normalize_description(description: str) -> str:
+    """Cache key for a description: case-folded, dates/digits masked, whitespace collapsed"""
+    normalized = DATE_PATTERN.sub("<date>", description.casefold())
+    normalized = DIGITS_PATTERN.sub("#", normalized)
+    return " ".join(normalized.split())
+
+
 class BudgetCategorizer:
     def __init__(self):
+        self.result_cache = TTLCache(settings.CATEGORIZER_CACHE_SIZE, settings.CATEGORIZER_CACHE_TTL)
+        self._rules = None
+        self._keyword_matcher = None
+        self.rules_version = 0
         self.rules = {
             "Needs": [
                 "rent", "electricity", "water", "groceries", "emi", "bill",
@@ -43,18 +72,22 @@ class BudgetCategorizer:
         
         self.model = None
         self.is_trained = False
+        self.model_version = 0
         self.model_path = Path(settings.ML_MODEL_PATH) / settings.MODEL_FILE_NAME
         self.dataset_path = Path(settings.ML_MODEL_PATH) / settings.DATASET_FILE_NAME
+        self._model_mtime = None
+        self._model_checked_at = time.monotonic()
         
-        # Initialize model on startup
-        self._initialize_model()
+        # Initialize model on startup, or in the background when loading lazily
+        self.initializer = ModelInitializer("Budget categorizer", self._initialize_model)
+        if not settings.LAZY_MODEL_LOADING:
+            self.initializer.ensure_loaded()
     
-    def _initialize_model(self):
+    def _initialize_model(self) -> bool:
         """Initialize model - load if exists, train if not"""
         try:
             if self.model_path.exists():
-                self.model = load(self.model_path)
-                self.is_trained = True
+                self._set_model(load(self.model_path))
                 logger.info(f"✅ Model loaded successfully from {self.model_path}")
             else:
                 logger.info("🔄 Model not found. Training new model...")
@@ -63,9 +96,52 @@ class BudgetCategorizer:
             logger.error(f"❌ Model initialization failed: {str(e)}")
             self.model = None
             self.is_trained = False
+        return self.is_trained
+    
+    @property
+    def rules(self) -> Mapping[str, Tuple[str, ...]]:
+        """Keyword rules per category (read-only; assign a new dict to change them)"""
+        return self._rules
+    
+    @rules.setter
+    def rules(self, rules: Dict[str, List[str]]):
+        """Replace the keyword rules and recompile the matcher"""
+        self._rules = MappingProxyType({
+            category: tuple(keywords) for category, keywords in rules.items()
+        })
+        self._keyword_matcher = KeywordMatcher(self._rules)
+        self.rules_version += 1
+        self.result_cache.clear()
+    
+    def _set_model(self, model: "Pipeline"):
+        """Swap in a trained model and drop results cached from the previous one"""
+        self.model = model
+        self.is_trained = True
+        self.model_version += 1
+        self._model_mtime = self.model_path.stat().st_mtime if self.model_path.exists() else None
+        self.result_cache.clear()
     
-    def create_sample_dataset(self, num_samples: int = 200) -> pd.DataFrame:
+    def _check_model_file(self):
+        """Reload the model if its file was replaced on disk (checked at most every few seconds)"""
+        if not self.initializer.done:
+            return
+        now = time.monotonic()
+        if now - self._model_checked_at < settings.CATEGORIZER_MODEL_CHECK_INTERVAL:
+            return
+        self._model_checked_at = now
+        
+        try:
+            mtime = self.model_path.stat().st_mtime if self.model_path.exists() else None
+            if mtime is not None and mtime != self._model_mtime:
+                logger.info(f"🔄 Model file changed on disk, reloading {self.model_path}")
+                self._set_model(load(self.model_path))
+        except Exception as e:
+            logger.error(f"❌ Model reload failed: {str(e)}")
+    
+    def create_sample_dataset(self, num_samples: int = 200) -> "pd.DataFrame":
         """Create realistic sample transaction data for training"""
+        import pandas as pd
+        
         samples = []
         
         # Enhanced Needs transactions
@@ -191,12 +267,8 @@ class BudgetCategorizer:
         """Rule-based categorization using keyword matching"""
         desc_lower = description.lower()
         
-        # Score each category
-        category_scores = {}
-        for category, keywords in self.rules.items():
-            score = sum(1 for keyword in keywords if keyword in desc_lower)
-            if score > 0:
-                category_scores[category] = score
+        # Score each category in a single pass of the compiled automaton
+        category_scores = self._keyword_matcher.category_scores(desc_lower)
         
         if not category_scores:
             return None, 0.0
@@ -207,8 +279,13 @@ class BudgetCategorizer:
         
         return best_category, confidence
     
-    def train_ml_model(self, df: Optional[pd.DataFrame] = None) -> Pipeline:
+    def train_ml_model(self, df: Optional["pd.DataFrame"] = None) -> "Pipeline":
         """Train the ML model on transaction data"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.model_selection import train_test_split
+        from sklearn.pipeline import Pipeline
+        
         try:
             if df is None:
                 logger.info("Creating sample dataset for training...")
@@ -225,7 +302,7 @@ class BudgetCategorizer:
             )
             
             # Create and train pipeline
-            self.model = Pipeline([
+            model = Pipeline([
                 ('tfidf', TfidfVectorizer(
                     lowercase=True,
                     stop_words='english',
@@ -244,22 +321,22 @@ class BudgetCategorizer:
             
             # Train model
             logger.info("Training ML model...")
-            self.model.fit(X_train, y_train)
+            model.fit(X_train, y_train)
             
             # Evaluate
-            train_score = self.model.score(X_train, y_train)
-            test_score = self.model.score(X_test, y_test)
+            train_score = model.score(X_train, y_train)
+            test_score = model.score(X_test, y_test)
             
             logger.info(f"✅ Model trained successfully!")
             logger.info(f"📊 Training accuracy: {train_score:.3f}")
             logger.info(f"📊 Testing accuracy: {test_score:.3f}")
             
-            self.is_trained = True
-            
             # Save model
-            dump(self.model, self.model_path)
+            dump(model, self.model_path)
             logger.info(f"💾 Model saved to {self.model_path}")
             
+            self._set_model(model)
+            
             return self.model
             
         except Exception as e:
@@ -270,6 +347,8 @@ class BudgetCategorizer:
         """
         Hybrid categorization: rules first, then ML fallback
         
+        Results are cached per normalized description (see ``normalize_description``).
+        
         Args:
             description (str): Transaction description
             amount (float, optional): Transaction amount
@@ -277,131 +356,266 @@ class BudgetCategorizer:
         Returns:
             dict: Categorization result with confidence and method
         """
-        if not description or not description.strip():
-            return {
-                "description": description,
-                "category": "Other",
-                "confidence": 0.0,
-                "method": "error",
-                "amount": amount,
-                "error": "Empty description provided"
+        cache_key = self._cache_key(description)
+        if cache_key is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return self._from_cache(cached, description, amount)
+        
+        result = self._hybrid_categorize(description, amount)
+        
+        if cache_key is not None:
+            self._store_result(cache_key, result)
+        return result
+    
+    def _cache_key(self, description: Any) -> Optional[str]:
+        """Normalized cache key, or None when the description should not be cached"""
+        self._check_model_file()
+        if not isinstance(description, str) or not description.strip():
+            return None
+        return normalize_description(description)
+    
+    def _store_result(self, cache_key: Optional[str], result: Dict[str, Any]):
+        """
+        Cache a copy of the result without its per-request fields
+        
+        The returned result is handed to the caller, which may still number
+        or annotate it, so it must never be the cached object itself.
+        """
+        if cache_key is not None and result.get("method") in CACHEABLE_METHODS:
+            cached = {key: value for key, value in result.items() if key not in REQUEST_FIELDS}
+            if "alternatives" in cached:
+                cached["alternatives"] = {
+                    source: dict(alternative) for source, alternative in cached["alternatives"].items()
+                }
+            self.result_cache.set(cache_key, cached)
+    
+    def _from_cache(self, cached: Dict[str, Any], description: str, amount: Optional[float]) -> Dict[str, Any]:
+        """Rebuild a result for this request from a cached one"""
+        result = dict(cached)
+        result.pop("transaction_id", None)
+        result["description"] = description
+        result["amount"] = amount
+        result["timestamp"] = datetime.now().isoformat()
+        if "alternatives" in result:
+            result["alternatives"] = {
+                source: dict(alternative) for source, alternative in result["alternatives"].items()
             }
+        return result
+    
+    def _hybrid_categorize(self, description: str, amount: Optional[float]) -> Dict[str, Any]:
+        """Categorize without consulting the result cache"""
+        if not description or not description.strip():
+            return self._empty_description_result(description, amount)
         
         # Try rule-based first
         rule_category, rule_confidence = self.rule_based_categorize(description)
         
         if rule_category and rule_confidence > 0.5:
-            return {
-                "description": description,
-                "category": rule_category,
-                "confidence": float(rule_confidence),
-                "method": "rule",
-                "amount": amount,
-                "timestamp": datetime.now().isoformat()
-            }
+            return self._rule_result(description, amount, rule_category, rule_confidence)
         
         # ML fallback
         if not self.is_trained or self.model is None:
-            return {
-                "description": description,
-                "category": "Other",
-                "confidence": 0.0,
-                "method": "none",
-                "amount": amount,
-                "error": "ML model not available",
-                "timestamp": datetime.now().isoformat()
-            }
+            return self._model_unavailable_result(description, amount)
         
         try:
-            ml_prediction = self.model.predict([description])[0]
             ml_probabilities = self.model.predict_proba([description])[0]
-            ml_confidence = float(max(ml_probabilities))
+            best_index = int(np.argmax(ml_probabilities))
+            ml_prediction = self.model.classes_[best_index]
+            ml_confidence = float(ml_probabilities[best_index])
             
-            # Combine rule and ML if both available
-            if rule_category and rule_confidence > 0.3:
-                # Weighted combination
-                if rule_category == ml_prediction:
-                    combined_confidence = min((rule_confidence + ml_confidence) / 2, 1.0)
-                    method = "hybrid"
-                else:
-                    # Choose the one with higher confidence
-                    if rule_confidence > ml_confidence:
-                        final_category = rule_category
-                        combined_confidence = rule_confidence
-                        method = "rule_priority"
-                    else:
-                        final_category = ml_prediction
-                        combined_confidence = ml_confidence
-                        method = "ml_priority"
-                    
-                    return {
-                        "description": description,
-                        "category": final_category,
-                        "confidence": float(combined_confidence),
-                        "method": method,
-                        "amount": amount,
-                        "alternatives": {
-                            "rule": {"category": rule_category, "confidence": rule_confidence},
-                            "ml": {"category": ml_prediction, "confidence": ml_confidence}
-                        },
-                        "timestamp": datetime.now().isoformat()
-                    }
-            
-            return {
-                "description": description,
-                "category": ml_prediction if not rule_category else rule_category,
-                "confidence": float(ml_confidence if not rule_category else max(rule_confidence, ml_confidence)),
-                "method": "ml" if not rule_category else "hybrid",
-                "amount": amount,
-                "timestamp": datetime.now().isoformat()
-            }
+            return self._combine_predictions(
+                description, amount, rule_category, rule_confidence, ml_prediction, ml_confidence
+            )
             
         except Exception as e:
             logger.error(f"❌ ML categorization error: {str(e)}")
-            return {
-                "description": description,
-                "category": rule_category if rule_category else "Other",
-                "confidence": float(rule_confidence if rule_category else 0.0),
-                "method": "rule_fallback" if rule_category else "error",
-                "amount": amount,
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
+            return self._ml_error_result(description, amount, rule_category, rule_confidence, e)
+    
+    def _empty_description_result(self, description: str, amount: Optional[float]) -> Dict[str, Any]:
+        return {
+            "description": description,
+            "category": "Other",
+            "confidence": 0.0,
+            "method": "error",
+            "amount": amount,
+            "error": "Empty description provided"
+        }
+    
+    def _rule_result(self, description: str, amount: Optional[float],
+                     rule_category: str, rule_confidence: float) -> Dict[str, Any]:
+        return {
+            "description": description,
+            "category": rule_category,
+            "confidence": float(rule_confidence),
+            "method": "rule",
+            "amount": amount,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _model_unavailable_result(self, description: str, amount: Optional[float]) -> Dict[str, Any]:
+        return {
+            "description": description,
+            "category": "Other",
+            "confidence": 0.0,
+            "method": "none",
+            "amount": amount,
+            "error": "ML model not available",
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _combine_predictions(self, description: str, amount: Optional[float],
+                             rule_category: Optional[str], rule_confidence: float,
+                             ml_prediction: str, ml_confidence: float) -> Dict[str, Any]:
+        """Merge the rule and ML outcomes for a description that needed the ML fallback"""
+        # Combine rule and ML if both available
+        if rule_category and rule_confidence > 0.3:
+            # Weighted combination
+            if rule_category == ml_prediction:
+                combined_confidence = min((rule_confidence + ml_confidence) / 2, 1.0)
+                method = "hybrid"
+            else:
+                # Choose the one with higher confidence
+                if rule_confidence > ml_confidence:
+                    final_category = rule_category
+                    combined_confidence = rule_confidence
+                    method = "rule_priority"
+                else:
+                    final_category = ml_prediction
+                    combined_confidence = ml_confidence
+                    method = "ml_priority"
+                
+                return {
+                    "description": description,
+                    "category": final_category,
+                    "confidence": float(combined_confidence),
+                    "method": method,
+                    "amount": amount,
+                    "alternatives": {
+                        "rule": {"category": rule_category, "confidence": rule_confidence},
+                        "ml": {"category": ml_prediction, "confidence": ml_confidence}
+                    },
+                    "timestamp": datetime.now().isoformat()
+                }
+        
+        return {
+            "description": description,
+            "category": ml_prediction if not rule_category else rule_category,
+            "confidence": float(ml_confidence if not rule_category else max(rule_confidence, ml_confidence)),
+            "method": "ml" if not rule_category else "hybrid",
+            "amount": amount,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _ml_error_result(self, description: str, amount: Optional[float],
+                         rule_category: Optional[str], rule_confidence: float,
+                         error: Exception) -> Dict[str, Any]:
+        return {
+            "description": description,
+            "category": rule_category if rule_category else "Other",
+            "confidence": float(rule_confidence if rule_category else 0.0),
+            "method": "rule_fallback" if rule_category else "error",
+            "amount": amount,
+            "error": str(error),
+            "timestamp": datetime.now().isoformat()
+        }
     
     def batch_categorize(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Categorize multiple transactions at once
         
+        Cached results are reused and rules are applied to every other
+        transaction; the rows that still need the ML fallback are then
+        classified together with one ``predict_proba`` call per chunk of
+        ``settings.CATEGORIZER_ML_BATCH_SIZE`` rows. Results are identical to
+        calling ``hybrid_categorize`` row by row.
+        
         Args:
             transactions: List of dicts with 'description' and optional 'amount'
             
         Returns:
             list: Categorized transactions
         """
-        results = []
+        results: List[Optional[Dict[str, Any]]] = [None] * len(transactions)
+        
+        # (index, description, amount, rule_category, rule_confidence) awaiting ML
+        pending = []
+        model_available = self.is_trained and self.model is not None
         
         for i, transaction in enumerate(transactions):
             try:
                 desc = transaction.get('description', '')
                 amount = transaction.get('amount')
-                result = self.hybrid_categorize(desc, amount)
-                result['transaction_id'] = i
-                results.append(result)
+                
+                if not desc or not desc.strip():
+                    results[i] = self._empty_description_result(desc, amount)
+                    continue
+                
+                cache_key = self._cache_key(desc)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    results[i] = self._from_cache(cached, desc, amount)
+                    continue
+                
+                rule_category, rule_confidence = self.rule_based_categorize(desc)
+                
+                if rule_category and rule_confidence > 0.5:
+                    results[i] = self._rule_result(desc, amount, rule_category, rule_confidence)
+                    self._store_result(cache_key, results[i])
+                elif not model_available:
+                    results[i] = self._model_unavailable_result(desc, amount)
+                else:
+                    pending.append((i, desc, amount, rule_category, rule_confidence))
+                    
             except Exception as e:
-                logger.error(f"❌ Error processing transaction {i}: {str(e)}")
-                results.append({
-                    "transaction_id": i,
-                    "description": transaction.get('description', ''),
-                    "category": "Other",
-                    "confidence": 0.0,
-                    "method": "error",
-                    "amount": transaction.get('amount'),
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                })
+                results[i] = self._transaction_error_result(i, transaction, e)
+        
+        chunk_size = max(1, settings.CATEGORIZER_ML_BATCH_SIZE)
+        for start in range(0, len(pending), chunk_size):
+            self._ml_categorize_pending(pending[start:start + chunk_size], results)
+        
+        for i, result in enumerate(results):
+            result['transaction_id'] = i
         
         return results
     
+    def _ml_categorize_pending(self, pending: List[Tuple], results: List[Optional[Dict[str, Any]]]):
+        """Run one vectorized ML pass over rows the rules could not settle"""
+        try:
+            probabilities = self.model.predict_proba([row[1] for row in pending])
+            best_indices = probabilities.argmax(axis=1)
+            best_confidences = probabilities[np.arange(len(pending)), best_indices]
+            predictions = self.model.classes_[best_indices]
+        except Exception as e:
+            logger.error(f"❌ ML categorization error: {str(e)}")
+            for i, desc, amount, rule_category, rule_confidence in pending:
+                results[i] = self._ml_error_result(desc, amount, rule_category, rule_confidence, e)
+            return
+        
+        for (i, desc, amount, rule_category, rule_confidence), ml_prediction, ml_confidence in zip(
+            pending, predictions, best_confidences
+        ):
+            try:
+                results[i] = self._combine_predictions(
+                    desc, amount, rule_category, rule_confidence, ml_prediction, float(ml_confidence)
+                )
+                self._store_result(self._cache_key(desc), results[i])
+            except Exception as e:
+                results[i] = self._transaction_error_result(i, {"description": desc, "amount": amount}, e)
+    
+    def _transaction_error_result(self, index: int, transaction: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        logger.error(f"❌ Error processing transaction {index}: {str(error)}")
+        return {
+            "transaction_id": index,
+            "description": transaction.get('description', ''),
+            "category": "Other",
+            "confidence": 0.0,
+            "method": "error",
+            "amount": transaction.get('amount'),
+            "error": str(error),
+            "timestamp": datetime.now().isoformat()
+        }
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the current model"""
         return {
@@ -412,7 +626,9 @@ class BudgetCategorizer:
             "dataset_exists": self.dataset_path.exists(),
             "categories": list(self.rules.keys()),
             "rules_count": {category: len(keywords) for category, keywords in self.rules.items()},
-            "last_modified": self.model_path.stat().st_mtime if self.model_path.exists() else None
+            "last_modified": self.model_path.stat().st_mtime if self.model_path.exists() else None,
+            "result_cache": self.result_cache.stats(),
+            "initialization": self.initializer.status()
         }
 
 # Global instance
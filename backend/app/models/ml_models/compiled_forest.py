@@ -0,0 +1,257 @@
+# app/models/ml_models/compiled_forest.py
+import logging
+import math
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Sequence, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+# Placeholder category for missing values, as in the pipeline's SimpleImputer
+MISSING_CATEGORY = "missing"
+
+# Rows walked together; keeps the (rows x trees) index arrays cache-sized
+ROW_CHUNK = 4096
+
+
+class CompiledForest:
+    """
+    Flat-array form of the investment pipeline for fast inference.
+
+    Holds the preprocessing constants (imputer medians, scaler mean/scale,
+    one-hot categories) and every tree of the RandomForestRegressor packed
+    into contiguous node arrays: ``feature``, ``threshold``, ``left``,
+    ``right`` (absolute node indices) and ``value``. Leaves point to
+    themselves, so all trees are walked together for ``max_depth`` steps
+    with plain NumPy indexing.
+
+    Predictions are bit-for-bit identical to ``Pipeline.predict`` when the
+    forest sums its trees in order (``n_jobs=1``): features are compared as
+    float32 like sklearn's trees do, and tree outputs are accumulated one
+    tree at a time before dividing by the number of trees.
+    """
+
+    ARRAY_FIELDS = (
+        "numeric_medians", "numeric_means", "numeric_scales",
+        "feature", "threshold", "left", "right", "value", "roots"
+    )
+
+    def __init__(self, numeric_columns: List[str], categorical_columns: List[str],
+                 categories: List[List[str]], max_depth: int, **arrays: np.ndarray):
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.categories = [list(values) for values in categories]
+        self.max_depth = int(max_depth)
+
+        missing = set(self.ARRAY_FIELDS) - set(arrays)
+        if missing:
+            raise ValueError(f"Missing compiled forest arrays: {sorted(missing)}")
+        for name in self.ARRAY_FIELDS:
+            setattr(self, name, np.ascontiguousarray(arrays[name]))
+
+        self._category_index = [
+            {category: position for position, category in enumerate(values)}
+            for values in self.categories
+        ]
+        self._onehot_offsets = np.cumsum([0] + [len(values) for values in self.categories])
+
+        # children[2 * node + (x <= threshold)] is the next node: right at even
+        # slots, left at odd ones, so one gather replaces a branch per step
+        self._children = np.empty(2 * len(self.left), dtype=np.intp)
+        self._children[0::2] = self.right
+        self._children[1::2] = self.left
+
+        self.n_features = len(self.numeric_columns) + int(self._onehot_offsets[-1])
+        self.n_trees = len(self.roots)
+        self.n_outputs = self.value.shape[1]
+
+    @classmethod
+    def from_pipeline(cls, pipeline: "Pipeline") -> "CompiledForest":
+        """
+        Compile a fitted investment pipeline.
+
+        Only the structure built by ``fit_model`` is supported: a
+        ColumnTransformer with a median-imputer + StandardScaler branch and a
+        constant-imputer + dense OneHotEncoder(handle_unknown='ignore')
+        branch, followed by a RandomForestRegressor. Anything else raises
+        ``ValueError`` so callers can keep using the pipeline itself.
+        """
+        try:
+            preprocessor = pipeline.named_steps["preprocessor"]
+            forest = pipeline.named_steps["regressor"]
+            branches = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+            numeric, numeric_columns = branches["num"]
+            categorical, categorical_columns = branches["cat"]
+            imputer, scaler = numeric.named_steps["imputer"], numeric.named_steps["scaler"]
+            onehot = categorical.named_steps["onehot"]
+        except (AttributeError, KeyError) as e:
+            raise ValueError(f"Unsupported pipeline structure: {e}")
+
+        if type(forest).__name__ != "RandomForestRegressor":
+            raise ValueError(f"Unsupported regressor: {type(forest).__name__}")
+
+        if set(branches) - {"num", "cat", "remainder"} or (
+            "remainder" in branches and branches["remainder"][0] != "drop"
+        ):
+            raise ValueError("Unsupported pipeline structure: unexpected ColumnTransformer branches")
+        if imputer.strategy != "median" or not (scaler.with_mean and scaler.with_std):
+            raise ValueError("Unsupported numeric preprocessing options")
+        if onehot.handle_unknown != "ignore" or onehot.drop is not None:
+            raise ValueError("Unsupported one-hot encoding options")
+        if getattr(onehot, "infrequent_categories_", None) and any(
+            values is not None for values in onehot.infrequent_categories_
+        ):
+            raise ValueError("Infrequent category grouping is not supported")
+        if categorical.named_steps["imputer"].fill_value != MISSING_CATEGORY:
+            raise ValueError("Unsupported categorical fill value")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left < 0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            values.append(tree.value[:, :, 0])
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+
+        return cls(
+            numeric_columns=list(numeric_columns),
+            categorical_columns=list(categorical_columns),
+            categories=[[str(category) for category in values] for values in onehot.categories_],
+            max_depth=max_depth,
+            numeric_medians=np.asarray(imputer.statistics_, dtype=np.float64),
+            numeric_means=np.asarray(scaler.mean_, dtype=np.float64),
+            numeric_scales=np.asarray(scaler.scale_, dtype=np.float64),
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp)
+        )
+
+    def transform(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """Preprocess input columns into the float32 matrix the trees split on"""
+        numeric = np.column_stack([
+            np.asarray(columns[name], dtype=np.float64) for name in self.numeric_columns
+        ])
+        numeric = np.where(np.isnan(numeric), self.numeric_medians, numeric)
+        numeric -= self.numeric_means
+        numeric /= self.numeric_scales
+
+        n_rows = numeric.shape[0]
+        onehot = np.zeros((n_rows, self.n_features - len(self.numeric_columns)), dtype=np.float64)
+        for position, name in enumerate(self.categorical_columns):
+            lookup = self._category_index[position]
+            codes = np.fromiter(
+                (lookup.get(self._category_value(value), -1) for value in columns[name]),
+                dtype=np.intp, count=n_rows
+            )
+            known = codes >= 0
+            onehot[np.nonzero(known)[0], self._onehot_offsets[position] + codes[known]] = 1.0
+
+        return np.hstack([numeric, onehot]).astype(np.float32)
+
+    @staticmethod
+    def _category_value(value: Any) -> str:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return MISSING_CATEGORY
+        if isinstance(value, Enum):
+            # Profiles from the API schemas carry enum members; str() of one is "Enum.MEMBER"
+            return str(value.value)
+        return str(value)
+
+    def predict(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """
+        Predict allocations for every row.
+
+        ``columns`` maps each input column name to its values, e.g. a
+        DataFrame or ``{"income": [80000], ...}``.
+        """
+        X = self.transform(columns)
+        prediction = np.empty((X.shape[0], self.n_outputs), dtype=np.float64)
+        for start in range(0, X.shape[0], ROW_CHUNK):
+            stop = start + ROW_CHUNK
+            prediction[start:stop] = self._predict_chunk(X[start:stop])
+        return prediction
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_columns = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_columns)[:, None]
+
+        # Walk every (row, tree) pair at once; leaves point to themselves
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            feature_positions = self.feature.take(nodes)
+            feature_positions += row_offsets
+            go_left = flat_X.take(feature_positions) <= self.threshold.take(nodes)
+            nodes *= 2
+            nodes += go_left
+            nodes = self._children.take(nodes)
+
+        # Same summation order as sklearn: tree by tree, then divide
+        leaves = np.ascontiguousarray(nodes.T)
+        prediction = np.zeros((n_rows, self.n_outputs), dtype=np.float64)
+        for tree_leaves in leaves:
+            prediction += self.value.take(tree_leaves, axis=0)
+        prediction /= self.n_trees
+        return prediction
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
+
+    def save(self, path: Union[str, Path]):
+        """Write the compiled forest as an uncompressed ``.npz`` (no pickled objects)"""
+        np.savez(
+            path,
+            numeric_columns=np.asarray(self.numeric_columns, dtype=str),
+            categorical_columns=np.asarray(self.categorical_columns, dtype=str),
+            category_counts=np.asarray([len(values) for values in self.categories], dtype=np.intp),
+            category_values=np.asarray([value for values in self.categories for value in values], dtype=str),
+            max_depth=np.asarray(self.max_depth),
+            **{name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CompiledForest":
+        with np.load(path, allow_pickle=False) as data:
+            counts = data["category_counts"].tolist()
+            flat_categories = data["category_values"].tolist()
+            categories, start = [], 0
+            for count in counts:
+                categories.append(flat_categories[start:start + count])
+                start += count
+
+            return cls(
+                numeric_columns=data["numeric_columns"].tolist(),
+                categorical_columns=data["categorical_columns"].tolist(),
+                categories=categories,
+                max_depth=int(data["max_depth"]),
+                **{name: data[name] for name in cls.ARRAY_FIELDS}
+            )
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "trees": self.n_trees,
+            "nodes": len(self.feature),
+            "max_depth": self.max_depth,
+            "features": self.n_features,
+            "outputs": self.n_outputs,
+            "memory_mb": round(self.nbytes / 2**20, 2)
+        }
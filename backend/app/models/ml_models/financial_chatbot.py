@@ -1,13 +1,20 @@
 # app/models/ml_models/financial_chatbot.py
 import os
+import re
 import json
-import requests
-from typing import List, Dict, Any, Optional
+import time
+import asyncio
+import bisect
+import importlib.util
+import httpx
+from typing import List, Dict, Any, Optional, AsyncIterator
 from datetime import datetime
 import logging
 from pathlib import Path
 
 from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.health_monitor import UpstreamHealthMonitor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,16 +25,45 @@ logger = logging.getLogger(__name__)
 # -------------------------
 class ChatbotConfig:
     GROQ_API_KEY = settings.GROQ_API_KEY
-    GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-    GROQ_MODEL = "llama-3.1-8b-instant"
+    GROQ_API_BASE_URL = settings.GROQ_API_BASE_URL.rstrip("/")
+    GROQ_API_URL = f"{GROQ_API_BASE_URL}/chat/completions"
+    GROQ_MODEL = settings.GROQ_MODEL
+    GROQ_TIMEOUT = settings.GROQ_TIMEOUT
+    GROQ_MAX_CONNECTIONS = settings.GROQ_MAX_CONNECTIONS
+    GROQ_HEALTH_WINDOW = settings.GROQ_HEALTH_WINDOW_SECONDS
+    GROQ_HEALTH_IDLE_PROBE = settings.GROQ_HEALTH_IDLE_PROBE_SECONDS
     ENABLED = settings.ENABLE_CHATBOT_MODEL
 
+# Buckets used to decide when two users are similar enough to share an answer
+INCOME_BANDS = (20000, 30000, 50000, 75000, 100000, 150000, 250000)
+SAVINGS_RATE_BANDS = (5, 10, 15, 20, 30, 50)
+AGE_BANDS = (25, 30, 35, 40, 45, 50, 55, 60)
+QUERY_PUNCTUATION = re.compile(r"[^\w\s%-]")
+
 # -------------------------
-# Direct Groq API Client
+# Async Groq API Client
 # -------------------------
 class GroqClient:
+    """
+    Non-blocking client for the Groq (OpenAI-compatible) chat API.
+    
+    Requests share one pooled ``httpx.AsyncClient`` so connections are kept
+    alive between calls; HTTP/2 is used when the ``h2`` package is installed.
+    Every call is reported to ``self.health``, which only probes the cheap
+    ``/models`` endpoint when there has been no traffic for a while.
+    """
+    
     def __init__(self, config: ChatbotConfig):
         self.config = config
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.health = UpstreamHealthMonitor(
+            "groq",
+            probe=self.probe if config.GROQ_API_KEY else None,
+            window_seconds=config.GROQ_HEALTH_WINDOW,
+            idle_probe_seconds=config.GROQ_HEALTH_IDLE_PROBE
+        )
         
         if not config.GROQ_API_KEY:
             logger.warning("⚠️  GROQ_API_KEY not provided. Chatbot will use fallback responses.")
@@ -40,28 +76,45 @@ class GroqClient:
             "Content-Type": "application/json"
         }
     
-    def chat_completion(self, messages: List[Dict[str, str]], 
-                       temperature: float = 0.3, 
-                       max_tokens: int = 1024) -> str:
-        """Direct Groq API call"""
-        if not self.enabled:
-            raise Exception("Groq client not enabled - API key missing")
-            
-        payload = {
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pooled client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                http2=self.http2,
+                timeout=httpx.Timeout(self.config.GROQ_TIMEOUT, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.config.GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=self.config.GROQ_MAX_CONNECTIONS,
+                    keepalive_expiry=60.0
+                )
+            )
+            self._client_loop = loop
+        return self._client
+    
+    def _payload(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int, stream: bool) -> Dict:
+        return {
             "messages": messages,
             "model": self.config.GROQ_MODEL,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "top_p": 0.9,
-            "stream": False
+            "stream": stream
         }
+    
+    async def chat_completion(self, messages: List[Dict[str, str]], 
+                              temperature: float = 0.3, 
+                              max_tokens: int = 1024) -> str:
+        """Groq API call returning the full completion"""
+        if not self.enabled:
+            raise Exception("Groq client not enabled - API key missing")
         
+        start = time.perf_counter()
         try:
-            response = requests.post(
+            response = await self._get_client().post(
                 self.config.GROQ_API_URL,
-                headers=self.headers,
-                json=payload,
-                timeout=30
+                json=self._payload(messages, temperature, max_tokens, stream=False)
             )
             
             if response.status_code != 200:
@@ -69,11 +122,73 @@ class GroqClient:
                 raise Exception(f"Groq API returned {response.status_code}")
             
             result = response.json()
-            return result["choices"][0]["message"]["content"]
+            content = result["choices"][0]["message"]["content"]
+            self.health.record_success((time.perf_counter() - start) * 1000)
+            return content
             
         except Exception as e:
             logger.error(f"Groq API call failed: {e}")
+            self.health.record_failure(str(e), (time.perf_counter() - start) * 1000)
+            raise
+    
+    async def stream_chat_completion(self, messages: List[Dict[str, str]],
+                                     temperature: float = 0.3,
+                                     max_tokens: int = 1024) -> AsyncIterator[str]:
+        """
+        Groq API call with ``stream: true``, yielding content deltas as they arrive
+        
+        Latency reported to the health monitor is the time to the first token.
+        """
+        if not self.enabled:
+            raise Exception("Groq client not enabled - API key missing")
+        
+        start = time.perf_counter()
+        first_token_ms = None
+        try:
+            async with self._get_client().stream(
+                "POST",
+                self.config.GROQ_API_URL,
+                json=self._payload(messages, temperature, max_tokens, stream=True)
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    logger.error(f"Groq API error: {response.status_code} - {body.decode(errors='replace')}")
+                    raise Exception(f"Groq API returned {response.status_code}")
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    # Trailer chunks such as the usage report carry no choices
+                    choices = json.loads(data).get("choices") or []
+                    if not choices:
+                        continue
+                    delta = choices[0].get("delta") or {}
+                    if delta.get("content"):
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - start) * 1000
+                        yield delta["content"]
+            
+            self.health.record_success(first_token_ms if first_token_ms is not None else (time.perf_counter() - start) * 1000)
+                        
+        except Exception as e:
+            logger.error(f"Groq API streaming call failed: {e}")
+            self.health.record_failure(str(e), (time.perf_counter() - start) * 1000)
             raise
+    
+    async def probe(self):
+        """Cheap reachability check that does not spend tokens"""
+        response = await self._get_client().get(f"{self.config.GROQ_API_BASE_URL}/models")
+        if response.status_code != 200:
+            raise Exception(f"Groq API returned {response.status_code}")
+    
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
 
 # -------------------------
 # Financial Knowledge & Prompt Templates
@@ -323,6 +438,7 @@ class FinancialChatbot:
         self.config = ChatbotConfig()
         self.groq_client = GroqClient(self.config)
         self.prompt_templates = FinancialPromptTemplates()
+        self.response_cache = TTLCache(settings.CHAT_CACHE_SIZE, settings.CHAT_CACHE_TTL)
         
         # Integration with existing models
         try:
@@ -449,82 +565,186 @@ class FinancialChatbot:
         else:
             return 'general'
     
-    def answer_query(self, query: str, user_profile: Dict, transactions: List[Dict]) -> Dict[str, Any]:
-        """Main method to answer financial queries"""
+    def build_context(self, query: str, user_profile: Dict, transactions: List[Dict]) -> Dict[str, Any]:
+        """Analyze finances and build the LLM prompt (synchronous, CPU-bound part of a query)"""
+        # Analyze finances
+        financial_analysis = self.analyze_finances(transactions, user_profile)
+        
+        # Categorize query
+        query_category = self._categorize_query(query)
+        
+        # Get investment advice if relevant
+        investment_advice = None
+        if query_category == 'investment':
+            investment_advice = self.get_investment_advice(user_profile)
+        
+        # Select and format prompt based on category
+        if query_category == 'savings':
+            user_prompt = self.prompt_templates.get_savings_prompt(query, user_profile, financial_analysis)
+        elif query_category == 'investment':
+            user_prompt = self.prompt_templates.get_investment_prompt(query, user_profile, financial_analysis, investment_advice)
+        elif query_category == 'budgeting':
+            user_prompt = self.prompt_templates.get_budgeting_prompt(query, user_profile, financial_analysis)
+        elif query_category == 'debt':
+            user_prompt = self.prompt_templates.get_debt_prompt(query, user_profile, financial_analysis)
+        elif query_category == 'retirement':
+            user_prompt = self.prompt_templates.get_retirement_prompt(query, user_profile, financial_analysis)
+        elif query_category == 'tax':
+            user_prompt = self.prompt_templates.get_tax_prompt(query, user_profile, financial_analysis)
+        else:
+            user_prompt = self.prompt_templates.get_general_prompt(query, user_profile, financial_analysis)
+        
+        return {
+            "query": query,
+            "query_category": query_category,
+            "financial_analysis": financial_analysis,
+            "investment_advice": investment_advice,
+            "cache_key": self._cache_key(query, query_category, financial_analysis, user_profile),
+            "messages": [
+                {"role": "system", "content": self.prompt_templates.get_system_prompt()},
+                {"role": "user", "content": user_prompt}
+            ]
+        }
+    
+    @staticmethod
+    def _cache_key(query: str, query_category: str, financial_analysis: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
+        """
+        Response cache key: query category, normalized query and a bucketed
+        fingerprint of everything the prompts show about the user (income
+        band, savings-rate band, top spending category, age band, risk
+        profile and goal)
+        """
+        normalized_query = " ".join(QUERY_PUNCTUATION.sub(" ", query.casefold()).split())
+        income_band = bisect.bisect_right(INCOME_BANDS, financial_analysis.get("total_income", 0) or 0)
+        savings_band = bisect.bisect_right(SAVINGS_RATE_BANDS, financial_analysis.get("savings_rate", 0) or 0)
+        top_category = str(financial_analysis.get("top_category", "None")).casefold()
+        age = user_profile.get("age")
+        if query_category == "retirement" or not isinstance(age, (int, float)):
+            # The retirement prompt works out the years to retirement from the exact age
+            age_band = age
+        else:
+            age_band = bisect.bisect_right(AGE_BANDS, age)
+        risk_profile = str(user_profile.get("risk_profile", "Moderate")).casefold()
+        goal = str(user_profile.get("goal", "Wealth Building")).casefold()
+        return f"{query_category}|{normalized_query}|{income_band}|{savings_band}|{top_category}|{age_band}|{risk_profile}|{goal}"
+    
+    def _cached_answer(self, context: Dict[str, Any]) -> Optional[str]:
+        cache_key = context.get("cache_key")
+        return self.response_cache.get(cache_key) if cache_key else None
+    
+    def _store_answer(self, context: Dict[str, Any], answer: str, method: str):
+        # Only real model answers are worth caching; fallbacks are generated locally
+        if method == "groq_ai" and context.get("cache_key") and answer:
+            self.response_cache.set(context["cache_key"], answer)
+    
+    async def generate_answer(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a prepared context from the response cache, Groq, or canned
+        advice when Groq is unavailable; cache hits report ``groq_ai_cached``
+        """
+        cached = self._cached_answer(context)
+        if cached is not None:
+            return self._build_answer(context, cached, "groq_ai_cached")
+        
         try:
-            # Analyze finances
-            financial_analysis = self.analyze_finances(transactions, user_profile)
-            
-            # Categorize query
-            query_category = self._categorize_query(query)
-            
-            # Get investment advice if relevant
-            investment_advice = None
-            if query_category == 'investment':
-                investment_advice = self.get_investment_advice(user_profile)
-            
-            # Select and format prompt based on category
-            if query_category == 'savings':
-                user_prompt = self.prompt_templates.get_savings_prompt(query, user_profile, financial_analysis)
-            elif query_category == 'investment':
-                user_prompt = self.prompt_templates.get_investment_prompt(query, user_profile, financial_analysis, investment_advice)
-            elif query_category == 'budgeting':
-                user_prompt = self.prompt_templates.get_budgeting_prompt(query, user_profile, financial_analysis)
-            elif query_category == 'debt':
-                user_prompt = self.prompt_templates.get_debt_prompt(query, user_profile, financial_analysis)
-            elif query_category == 'retirement':
-                user_prompt = self.prompt_templates.get_retirement_prompt(query, user_profile, financial_analysis)
-            elif query_category == 'tax':
-                user_prompt = self.prompt_templates.get_tax_prompt(query, user_profile, financial_analysis)
+            if self.groq_client.enabled:
+                answer = await self.groq_client.chat_completion(context["messages"], temperature=0.2, max_tokens=1200)
+                method = "groq_ai"
             else:
-                user_prompt = self.prompt_templates.get_general_prompt(query, user_profile, financial_analysis)
+                raise Exception("Groq API not available")
             
-            # Generate response
-            try:
-                if self.groq_client.enabled:
-                    messages = [
-                        {"role": "system", "content": self.prompt_templates.get_system_prompt()},
-                        {"role": "user", "content": user_prompt}
-                    ]
-                    
-                    answer = self.groq_client.chat_completion(messages, temperature=0.2, max_tokens=1200)
-                    method = "groq_ai"
-                else:
-                    raise Exception("Groq API not available")
-                
-            except Exception as e:
-                logger.error(f"Groq API failed, using fallback: {e}")
-                answer = self._get_fallback_response(query, financial_analysis, query_category)
-                method = "fallback"
+        except Exception as e:
+            logger.error(f"Groq API failed, using fallback: {e}")
+            answer = self._get_fallback_response(context["query"], context["financial_analysis"], context["query_category"])
+            method = "fallback"
+        
+        self._store_answer(context, answer, method)
+        return self._build_answer(context, answer, method)
+    
+    async def stream_answer(self, context: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an answer for a prepared context
+        
+        Yields ``{"type": "token", "content": ...}`` events followed by one
+        ``{"type": "done", ...}`` event carrying the full answer metadata. If
+        Groq is unavailable before the first token, the fallback answer is sent
+        as a single token; a failure mid-answer yields ``{"type": "error"}``.
+        Cached answers are sent as a single token with method ``groq_ai_cached``.
+        """
+        cached = self._cached_answer(context)
+        if cached is not None:
+            yield {"type": "token", "content": cached}
+            yield {"type": "done", **self._build_answer(context, cached, "groq_ai_cached")}
+            return
+        
+        parts: List[str] = []
+        method = "groq_ai"
+        
+        try:
+            if not self.groq_client.enabled:
+                raise Exception("Groq API not available")
             
-            return {
-                "answer": answer,
-                "method": method,
-                "query_category": query_category,
-                "financial_analysis": financial_analysis,
-                "investment_advice": investment_advice,
-                "timestamp": datetime.now().isoformat()
-            }
+            async for content in self.groq_client.stream_chat_completion(
+                context["messages"], temperature=0.2, max_tokens=1200
+            ):
+                parts.append(content)
+                yield {"type": "token", "content": content}
+                
+        except Exception as e:
+            if parts:
+                logger.error(f"Groq API stream interrupted: {e}")
+                yield {"type": "error", "message": "The answer was interrupted. Please try again."}
+                return
             
+            logger.error(f"Groq API failed, using fallback: {e}")
+            method = "fallback"
+            answer = self._get_fallback_response(context["query"], context["financial_analysis"], context["query_category"])
+            parts = [answer]
+            yield {"type": "token", "content": answer}
+        
+        answer = "".join(parts)
+        self._store_answer(context, answer, method)
+        yield {"type": "done", **self._build_answer(context, answer, method)}
+    
+    @staticmethod
+    def _build_answer(context: Dict[str, Any], answer: str, method: str) -> Dict[str, Any]:
+        return {
+            "answer": answer,
+            "method": method,
+            "query_category": context["query_category"],
+            "financial_analysis": context["financial_analysis"],
+            "investment_advice": context["investment_advice"],
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def error_response(self, user_profile: Dict) -> Dict[str, Any]:
+        """Response used when a query could not be processed at all"""
+        return {
+            "answer": "I'm sorry, I encountered an error while processing your request. Please try asking your question in a different way, or contact support if the problem persists.",
+            "method": "error_fallback",
+            "query_category": "error",
+            "financial_analysis": {
+                "total_income": user_profile.get("monthly_income", 0),
+                "total_expenses": 0,
+                "savings_amount": 0,
+                "savings_rate": 0,
+                "category_breakdown": {},
+                "top_category": "Unknown",
+                "financial_health_score": 50
+            },
+            "investment_advice": None,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def answer_query(self, query: str, user_profile: Dict, transactions: List[Dict]) -> Dict[str, Any]:
+        """Main method to answer financial queries"""
+        try:
+            context = self.build_context(query, user_profile, transactions)
         except Exception as e:
             logger.error(f"❌ Error in answer_query: {e}")
-            # Return error response
-            return {
-                "answer": "I'm sorry, I encountered an error while processing your request. Please try asking your question in a different way, or contact support if the problem persists.",
-                "method": "error_fallback",
-                "query_category": "error",
-                "financial_analysis": {
-                    "total_income": user_profile.get("monthly_income", 0),
-                    "total_expenses": 0,
-                    "savings_amount": 0,
-                    "savings_rate": 0,
-                    "category_breakdown": {},
-                    "top_category": "Unknown",
-                    "financial_health_score": 50
-                },
-                "investment_advice": None,
-                "timestamp": datetime.now().isoformat()
-            }
+            return self.error_response(user_profile)
+        
+        return await self.generate_answer(context)
     
     def _get_fallback_response(self, query: str, financial_analysis: Dict, category: str) -> str:
         """Enhanced fallback responses with more context"""
@@ -1,31 +1,80 @@
 # app/models/ml_models/investment_recommender.py
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.preprocessing import LabelEncoder, StandardScaler, OneHotEncoder
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.impute import SimpleImputer
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
 from joblib import dump, load
 import json
 import os
 import warnings
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
+from app.core.config import settings
+from app.utils.model_loading import ModelInitializer
+from app.models.ml_models.compiled_forest import CompiledForest
+from app.models.ml_models.allocation_grid import AllocationGrid
+
+# pandas and scikit-learn are imported where they are used so that importing
+# the app does not pay for them before the model is needed
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 warnings.filterwarnings('ignore')
 
 class AdvancedInvestmentRecommender:
-    def __init__(self):
+    # Allocation targets predicted by the model, in model output order
+    TARGET_COLUMNS = [
+        'fixed_deposits', 'debt_funds', 'government_bonds', 'corporate_bonds',
+        'large_cap_stocks', 'mid_cap_stocks', 'small_cap_stocks', 'sectoral_funds',
+        'balanced_funds', 'arbitrage_funds', 'multi_asset', 'gold', 'real_estate', 'international'
+    ]
+    EQUITY_ASSETS = ['large_cap_stocks', 'mid_cap_stocks', 'small_cap_stocks', 'sectoral_funds']
+    RISK_PROFILES = ['Conservative', 'Moderate', 'Aggressive']
+    GOAL_TYPES = [
+        'Emergency Fund', 'Retirement', 'Wealth Building',
+        'Education Fund', 'House Down Payment', 'Vacation Fund'
+    ]
+    
+    # Allocation templates used to generate the synthetic training targets
+    BASE_ALLOCATIONS = {
+        'Conservative': {
+            'fixed_deposits': 0.4, 'debt_funds': 0.25, 'government_bonds': 0.15,
+            'large_cap_stocks': 0.1, 'gold': 0.05, 'balanced_funds': 0.05
+        },
+        'Moderate': {
+            'fixed_deposits': 0.2, 'debt_funds': 0.15, 'large_cap_stocks': 0.25,
+            'mid_cap_stocks': 0.15, 'balanced_funds': 0.15, 'gold': 0.05, 'government_bonds': 0.05
+        },
+        'Aggressive': {
+            'large_cap_stocks': 0.3, 'mid_cap_stocks': 0.25, 'small_cap_stocks': 0.15,
+            'sectoral_funds': 0.1, 'international': 0.1, 'debt_funds': 0.05, 'gold': 0.05
+        }
+    }
+    GOAL_ADJUSTMENTS = {
+        'Emergency Fund': {'fixed_deposits': 0.2, 'debt_funds': 0.1, 'large_cap_stocks': -0.15},
+        'Retirement': {'large_cap_stocks': 0.1, 'mid_cap_stocks': 0.05, 'fixed_deposits': -0.1},
+        'Wealth Building': {'mid_cap_stocks': 0.1, 'sectoral_funds': 0.05, 'debt_funds': -0.1},
+        'Education Fund': {'balanced_funds': 0.1, 'government_bonds': 0.05, 'small_cap_stocks': -0.1},
+        'House Down Payment': {'fixed_deposits': 0.15, 'debt_funds': 0.1, 'mid_cap_stocks': -0.15},
+        'Vacation Fund': {'fixed_deposits': 0.2, 'government_bonds': 0.1, 'large_cap_stocks': -0.2}
+    }
+    
+    # Allocation grid axes: whole-year ages accepted by the API, a uniform
+    # debt-to-income grid plus this many knots at the forest's split points
+    GRID_AGE_RANGE = (18, 100)
+    GRID_RATIO_STEP = 0.1
+    GRID_RATIO_SPLIT_KNOTS = 16
+    
+    def __init__(self, load_existing: bool = True):
         self.model = None
-        self.scaler = StandardScaler()
+        self.compiled_model: Optional[CompiledForest] = None
+        self.allocation_grid: Optional[AllocationGrid] = None
+        self.scaler = None
         self.preprocessor = None
         self.encoders = {}
         self.is_trained = False
@@ -38,6 +87,8 @@ class AdvancedInvestmentRecommender:
         
         self.model_path = self.model_dir / "investment_model_advanced.pkl"
         self.metadata_path = self.model_dir / "investment_metadata.json"
+        self._model_mtime = None
+        self._model_checked_at = time.monotonic()
         
         # Investment categories with sub-types
         self.investment_categories = {
@@ -82,10 +133,13 @@ class AdvancedInvestmentRecommender:
             'Vacation Fund': {'liquidity_importance': 0.8, 'time_horizon': 0.2, 'risk_tolerance': 0.1}
         }
 
-        # Initialize model on startup
-        self._initialize_model()
+        # Initialize model on startup, or in the background when loading lazily
+        # (training jobs build their own instance without one)
+        self.initializer = ModelInitializer("Investment recommender", self._initialize_model)
+        if load_existing and not settings.LAZY_MODEL_LOADING:
+            self.initializer.ensure_loaded()
 
-    def _initialize_model(self):
+    def _initialize_model(self) -> bool:
         """Initialize model - load if exists, train if not"""
         try:
             if self.model_path.exists():
@@ -98,134 +152,167 @@ class AdvancedInvestmentRecommender:
             logger.error(f"❌ Investment model initialization failed: {str(e)}")
             self.model = None
             self.is_trained = False
+        return self.is_trained
 
-    def create_advanced_dataset(self, num_samples: int = 5000) -> pd.DataFrame:
+    def create_advanced_dataset(self, num_samples: int = 5000, seed: int = 42) -> "pd.DataFrame":
         """Create comprehensive synthetic dataset for training"""
-        np.random.seed(42)
+        import pandas as pd
         
-        data = []
+        chunks = list(self.iter_advanced_dataset(num_samples, seed=seed))
+        if len(chunks) == 1:
+            return chunks[0]
+        return pd.concat(chunks, ignore_index=True)
+    
+    def iter_advanced_dataset(self, num_samples: int, chunk_size: int = 250_000, seed: int = 42):
+        """
+        Yield the synthetic dataset as columnar DataFrames of up to ``chunk_size`` rows
         
-        # Define realistic parameter ranges
-        age_ranges = {
-            'young': (22, 35),
-            'middle': (35, 50),
-            'mature': (50, 65)
-        }
+        Every column is sampled as a NumPy vector and the allocation rules of
+        ``_generate_realistic_allocation`` are applied with masked array
+        operations. Output is reproducible for a given seed and chunk size.
+        """
+        rng = np.random.default_rng(seed)
+        remaining = num_samples
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            yield self._sample_dataset_chunk(rng, size)
+            remaining -= size
+    
+    def _sample_dataset_chunk(self, rng: np.random.Generator, size: int) -> "pd.DataFrame":
+        """Sample ``size`` synthetic profiles with their target allocations"""
+        import pandas as pd
         
-        income_ranges = {
-            'low': (25000, 50000),
-            'medium': (50000, 100000),
-            'high': (100000, 300000),
-            'very_high': (300000, 1000000)
-        }
+        # Basic demographics: young (22-35), middle (35-50), mature (50-65)
+        age_group = rng.choice(3, size=size, p=[0.4, 0.4, 0.2])
+        age_low = np.array([22, 35, 50])[age_group]
+        age_high = np.array([35, 50, 65])[age_group]
+        age = rng.uniform(age_low, age_high)
         
-        for i in range(num_samples):
-            # Basic demographics
-            age_group = np.random.choice(['young', 'middle', 'mature'], p=[0.4, 0.4, 0.2])
-            age = np.random.uniform(*age_ranges[age_group])
-            
-            income_level = np.random.choice(['low', 'medium', 'high', 'very_high'], p=[0.3, 0.4, 0.25, 0.05])
-            income = np.random.uniform(*income_ranges[income_level])
-            
-            # Employment type influences income stability
-            employment_type = np.random.choice([
-                'Salaried', 'Self-Employed', 'Business', 'Professional', 'Student'
-            ], p=[0.6, 0.2, 0.1, 0.08, 0.02])
-            
-            # Risk profile correlates with age and income
-            if age < 30:
-                risk_profile = np.random.choice(['Conservative', 'Moderate', 'Aggressive'], p=[0.2, 0.5, 0.3])
-            elif age < 50:
-                risk_profile = np.random.choice(['Conservative', 'Moderate', 'Aggressive'], p=[0.3, 0.6, 0.1])
-            else:
-                risk_profile = np.random.choice(['Conservative', 'Moderate', 'Aggressive'], p=[0.7, 0.25, 0.05])
-            
-            # Goal type influences allocation strategy
-            goal_weights = [0.15, 0.3, 0.25, 0.15, 0.1, 0.05]  # Emergency, Retirement, Wealth, Education, House, Vacation
-            goal_type = np.random.choice([
-                'Emergency Fund', 'Retirement', 'Wealth Building', 
-                'Education Fund', 'House Down Payment', 'Vacation Fund'
-            ], p=goal_weights)
-            
-            # Financial situation
-            existing_savings = np.random.uniform(0, income * 2)
-            debt_amount = np.random.uniform(0, income * 0.5) if np.random.random() > 0.3 else 0
-            
-            # Monthly expenses (60-80% of income typically)
-            expense_ratio = np.random.uniform(0.5, 0.8)
-            monthly_expenses = income * expense_ratio
-            
-            # Investment amount (10-30% of income)
-            investment_ratio = np.random.uniform(0.1, 0.3)
-            investment_amount = income * investment_ratio
-            
-            # Calculate derived features
-            debt_to_income = debt_amount / income if income > 0 else 0
-            savings_to_income = existing_savings / income if income > 0 else 0
-            investment_to_income = investment_amount / income if income > 0 else 0
-            age_factor = (65 - age) / 65  # Time to retirement factor
-            
-            # Generate realistic allocation based on profile
-            allocation = self._generate_realistic_allocation(
-                age, income, risk_profile, goal_type, employment_type,
-                debt_to_income, savings_to_income, investment_to_income, age_factor
-            )
-            
-            # Create record
-            record = {
-                'income': income,
-                'age': age,
-                'employment_type': employment_type,
-                'risk_profile': risk_profile,
-                'goal_type': goal_type,
-                'existing_savings': existing_savings,
-                'debt_amount': debt_amount,
-                'monthly_expenses': monthly_expenses,
-                'investment_amount': investment_amount,
-                'debt_to_income_ratio': debt_to_income,
-                'savings_to_income_ratio': savings_to_income,
-                'investment_to_income_ratio': investment_to_income,
-                'age_factor': age_factor,
-                **allocation
-            }
-            
-            data.append(record)
+        # Income levels: low, medium, high, very high
+        income_level = rng.choice(4, size=size, p=[0.3, 0.4, 0.25, 0.05])
+        income_low = np.array([25000, 50000, 100000, 300000])[income_level]
+        income_high = np.array([50000, 100000, 300000, 1000000])[income_level]
+        income = rng.uniform(income_low, income_high)
+        
+        # Employment type influences income stability
+        employment_types = np.array(['Salaried', 'Self-Employed', 'Business', 'Professional', 'Student'], dtype=object)
+        employment_type = employment_types[rng.choice(5, size=size, p=[0.6, 0.2, 0.1, 0.08, 0.02])]
+        
+        # Risk profile correlates with age
+        risk_probabilities = np.select(
+            [age[:, None] < 30, age[:, None] < 50],
+            [np.array([[0.2, 0.5, 0.3]]), np.array([[0.3, 0.6, 0.1]])],
+            default=np.array([[0.7, 0.25, 0.05]])
+        )
+        risk_index = (rng.random(size)[:, None] > np.cumsum(risk_probabilities, axis=1)[:, :2]).sum(axis=1)
+        
+        # Goal type influences allocation strategy
+        goal_index = rng.choice(len(self.GOAL_TYPES), size=size, p=[0.15, 0.3, 0.25, 0.15, 0.1, 0.05])
+        
+        # Financial situation
+        existing_savings = rng.uniform(0, income * 2)
+        debt_amount = np.where(rng.random(size) > 0.3, rng.uniform(0, income * 0.5), 0.0)
+        
+        # Monthly expenses (50-80% of income) and investment amount (10-30% of income)
+        monthly_expenses = income * rng.uniform(0.5, 0.8, size)
+        investment_amount = income * rng.uniform(0.1, 0.3, size)
+        
+        # Calculate derived features
+        debt_to_income = debt_amount / income
+        savings_to_income = existing_savings / income
+        investment_to_income = investment_amount / income
+        age_factor = (65 - age) / 65
+        
+        allocation = self._generate_allocations_vectorized(age, risk_index, goal_index, debt_to_income)
+        
+        data = {
+            'income': income,
+            'age': age,
+            'employment_type': employment_type,
+            'risk_profile': np.array(self.RISK_PROFILES, dtype=object)[risk_index],
+            'goal_type': np.array(self.GOAL_TYPES, dtype=object)[goal_index],
+            'existing_savings': existing_savings,
+            'debt_amount': debt_amount,
+            'monthly_expenses': monthly_expenses,
+            'investment_amount': investment_amount,
+            'debt_to_income_ratio': debt_to_income,
+            'savings_to_income_ratio': savings_to_income,
+            'investment_to_income_ratio': investment_to_income,
+            'age_factor': age_factor
+        }
+        data.update({asset: allocation[:, j] for j, asset in enumerate(self.TARGET_COLUMNS)})
         
         return pd.DataFrame(data)
-
+    
+    def _generate_allocations_vectorized(self, age: np.ndarray, risk_index: np.ndarray,
+                                         goal_index: np.ndarray, debt_to_income: np.ndarray) -> np.ndarray:
+        """
+        Array version of ``_generate_realistic_allocation``
+        
+        Returns an ``(n, len(TARGET_COLUMNS))`` matrix. Assets missing from a
+        template are zero columns; ``has_asset`` tracks which ones the template
+        listed, since goal adjustments only apply to those.
+        """
+        column = {asset: j for j, asset in enumerate(self.TARGET_COLUMNS)}
+        
+        base = np.zeros((len(self.RISK_PROFILES), len(self.TARGET_COLUMNS)))
+        for i, risk_profile in enumerate(self.RISK_PROFILES):
+            for asset, weight in self.BASE_ALLOCATIONS[risk_profile].items():
+                base[i, column[asset]] = weight
+        has_asset = np.zeros_like(base, dtype=bool)
+        for i, risk_profile in enumerate(self.RISK_PROFILES):
+            for asset in self.BASE_ALLOCATIONS[risk_profile]:
+                has_asset[i, column[asset]] = True
+        
+        # Start with base allocation
+        allocation = base[risk_index]
+        has_asset = has_asset[risk_index]
+        
+        # Adjust based on goal type
+        for g, goal_type in enumerate(self.GOAL_TYPES):
+            for asset, adjustment in self.GOAL_ADJUSTMENTS[goal_type].items():
+                j = column[asset]
+                rows = (goal_index == g) & has_asset[:, j]
+                allocation[rows, j] = np.maximum(0, allocation[rows, j] + adjustment)
+        
+        fd, debt, gov = column['fixed_deposits'], column['debt_funds'], column['government_bonds']
+        mid, small = column['mid_cap_stocks'], column['small_cap_stocks']
+        
+        # Age-based adjustments
+        young = age < 30
+        allocation[young, mid] += 0.05
+        allocation[young, fd] = np.maximum(0, allocation[young, fd] - 0.05)
+        
+        mature = age > 50
+        allocation[mature, fd] += 0.1
+        allocation[mature, gov] += 0.05
+        allocation[mature, small] = np.maximum(0, allocation[mature, small] - 0.1)
+        
+        # High debt adjustment - more conservative
+        indebted = debt_to_income > 0.3
+        allocation[indebted, fd] += 0.1
+        allocation[indebted, debt] += 0.05
+        allocation[indebted, small] = np.maximum(0, allocation[indebted, small] - 0.1)
+        
+        # Normalize to ensure sum = 1
+        total = allocation.sum(axis=1, keepdims=True)
+        return np.divide(allocation, total, out=allocation, where=total > 0)
+    
     def _generate_realistic_allocation(self, age, income, risk_profile, goal_type, 
                                      employment_type, debt_to_income, savings_to_income, 
                                      investment_to_income, age_factor):
-        """Generate realistic allocation percentages based on input parameters"""
+        """
+        Generate realistic allocation percentages based on input parameters
         
-        # Base allocation templates
-        base_allocations = {
-            'Conservative': {
-                'fixed_deposits': 0.4, 'debt_funds': 0.25, 'government_bonds': 0.15,
-                'large_cap_stocks': 0.1, 'gold': 0.05, 'balanced_funds': 0.05
-            },
-            'Moderate': {
-                'fixed_deposits': 0.2, 'debt_funds': 0.15, 'large_cap_stocks': 0.25,
-                'mid_cap_stocks': 0.15, 'balanced_funds': 0.15, 'gold': 0.05, 'government_bonds': 0.05
-            },
-            'Aggressive': {
-                'large_cap_stocks': 0.3, 'mid_cap_stocks': 0.25, 'small_cap_stocks': 0.15,
-                'sectoral_funds': 0.1, 'international': 0.1, 'debt_funds': 0.05, 'gold': 0.05
-            }
-        }
+        Per-profile reference for ``_generate_allocations_vectorized``, which is
+        what the dataset generator uses.
+        """
         
         # Start with base allocation
-        allocation = base_allocations[risk_profile].copy()
+        allocation = self.BASE_ALLOCATIONS[risk_profile].copy()
         
         # Adjust based on goal type
-        goal_adjustments = {
-            'Emergency Fund': {'fixed_deposits': 0.2, 'debt_funds': 0.1, 'large_cap_stocks': -0.15},
-            'Retirement': {'large_cap_stocks': 0.1, 'mid_cap_stocks': 0.05, 'fixed_deposits': -0.1},
-            'Wealth Building': {'mid_cap_stocks': 0.1, 'sectoral_funds': 0.05, 'debt_funds': -0.1},
-            'Education Fund': {'balanced_funds': 0.1, 'government_bonds': 0.05, 'small_cap_stocks': -0.1},
-            'House Down Payment': {'fixed_deposits': 0.15, 'debt_funds': 0.1, 'mid_cap_stocks': -0.15},
-            'Vacation Fund': {'fixed_deposits': 0.2, 'government_bonds': 0.1, 'large_cap_stocks': -0.2}
-        }
+        goal_adjustments = self.GOAL_ADJUSTMENTS
         
         if goal_type in goal_adjustments:
             for asset, adjustment in goal_adjustments[goal_type].items():
@@ -265,113 +352,313 @@ class AdvancedInvestmentRecommender:
         
         return allocation
 
+    def fit_model(self, num_samples: Optional[int] = None,
+                  progress: Optional[Callable[[str, float], None]] = None) -> Tuple["Pipeline", Dict]:
+        """
+        Generate a dataset and fit a fresh pipeline without touching the live model.
+
+        ``progress`` is called with a stage name and a completion fraction as
+        training moves along. Returns the fitted pipeline and its metadata,
+        including per-stage timings in milliseconds.
+        """
+        from sklearn.compose import ColumnTransformer
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.impute import SimpleImputer
+        from sklearn.model_selection import train_test_split
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+        
+        def report(stage: str, fraction: float):
+            if progress is not None:
+                progress(stage, fraction)
+
+        timings = {}
+        num_samples = num_samples or settings.INVESTMENT_TRAINING_SAMPLES
+
+        report("generating_dataset", 0.05)
+        logger.info("🔄 Creating advanced training dataset...")
+        stage_start = time.perf_counter()
+        df = self.create_advanced_dataset(num_samples)
+        timings['dataset_ms'] = round((time.perf_counter() - stage_start) * 1000, 2)
+        
+        # Define features and targets
+        feature_columns = [
+            'income', 'age', 'existing_savings', 'debt_amount', 'monthly_expenses',
+            'investment_amount', 'debt_to_income_ratio', 'savings_to_income_ratio',
+            'investment_to_income_ratio', 'age_factor'
+        ]
+        
+        categorical_features = ['employment_type', 'risk_profile', 'goal_type']
+        
+        # Target columns (allocation percentages)
+        target_columns = list(self.TARGET_COLUMNS)
+        
+        # Prepare features
+        X = df[feature_columns + categorical_features].copy()
+        y = df[target_columns].copy()
+        
+        # Create preprocessor
+        numeric_transformer = Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='median')),
+            ('scaler', StandardScaler())
+        ])
+        
+        categorical_transformer = Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
+            ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+        ])
+        
+        preprocessor = ColumnTransformer(
+            transformers=[
+                ('num', numeric_transformer, feature_columns),
+                ('cat', categorical_transformer, categorical_features)
+            ]
+        )
+        
+        # Create and train model
+        model = Pipeline([
+            ('preprocessor', preprocessor),
+            ('regressor', RandomForestRegressor(
+                n_estimators=100,
+                max_depth=15,
+                min_samples_split=5,
+                min_samples_leaf=2,
+                random_state=42,
+                n_jobs=-1
+            ))
+        ])
+        
+        # Split data
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+        
+        # Train model
+        report("fitting", 0.2)
+        logger.info("🔄 Training Random Forest model...")
+        stage_start = time.perf_counter()
+        model.fit(X_train, y_train)
+        timings['fit_ms'] = round((time.perf_counter() - stage_start) * 1000, 2)
+        
+        # Evaluate model
+        report("evaluating", 0.85)
+        stage_start = time.perf_counter()
+        train_score = model.score(X_train, y_train)
+        test_score = model.score(X_test, y_test)
+        timings['evaluate_ms'] = round((time.perf_counter() - stage_start) * 1000, 2)
+        
+        logger.info(f"✅ Model training completed!")
+        logger.info(f"📊 Training R² Score: {train_score:.3f}")
+        logger.info(f"📊 Testing R² Score: {test_score:.3f}")
+        
+        metadata = {
+            'model_version': '1.0.0',
+            'training_date': datetime.now().isoformat(),
+            'train_score': train_score,
+            'test_score': test_score,
+            'feature_count': X.shape[1],
+            'target_count': len(target_columns),
+            'training_samples': len(X_train),
+            'timings': timings
+        }
+        
+        return model, metadata
+
     def train_advanced_model(self):
-        """Train the investment recommendation model"""
+        """Train the investment recommendation model in this process and swap it in"""
         try:
-            logger.info("🔄 Creating advanced training dataset...")
-            df = self.create_advanced_dataset(5000)
-            
-            # Define features and targets
-            feature_columns = [
-                'income', 'age', 'existing_savings', 'debt_amount', 'monthly_expenses',
-                'investment_amount', 'debt_to_income_ratio', 'savings_to_income_ratio',
-                'investment_to_income_ratio', 'age_factor'
-            ]
-            
-            categorical_features = ['employment_type', 'risk_profile', 'goal_type']
-            
-            # Target columns (allocation percentages)
-            target_columns = [
-                'fixed_deposits', 'debt_funds', 'government_bonds', 'corporate_bonds',
-                'large_cap_stocks', 'mid_cap_stocks', 'small_cap_stocks', 'sectoral_funds',
-                'balanced_funds', 'arbitrage_funds', 'multi_asset', 'gold', 'real_estate', 'international'
-            ]
-            
-            # Prepare features
-            X = df[feature_columns + categorical_features].copy()
-            y = df[target_columns].copy()
+            model, metadata = self.fit_model()
+            self.write_model_files(model, metadata)
+            self.install_model(model, metadata)
+            return True
             
-            # Create preprocessor
-            numeric_transformer = Pipeline(steps=[
-                ('imputer', SimpleImputer(strategy='median')),
-                ('scaler', StandardScaler())
-            ])
+        except Exception as e:
+            logger.error(f"❌ Model training failed: {str(e)}")
+            return False
+
+    def write_model_files(self, model: "Pipeline", metadata: Dict):
+        """
+        Persist a model and its metadata atomically.
+
+        Both files are written next to their targets and moved into place with
+        ``os.replace``, so a concurrent reader sees either the old or the new
+        file, never a partial one.
+        """
+        tmp_suffix = f".{os.getpid()}.tmp"
+        
+        tmp_model_path = self.model_path.with_name(self.model_path.name + tmp_suffix)
+        dump(model, tmp_model_path)
+        os.replace(tmp_model_path, self.model_path)
+        logger.info(f"💾 Model saved to {self.model_path}")
+        
+        tmp_metadata_path = self.metadata_path.with_name(self.metadata_path.name + tmp_suffix)
+        with open(tmp_metadata_path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp_metadata_path, self.metadata_path)
+
+    def install_model(self, model: "Pipeline", metadata: Dict):
+        """
+        Swap in a trained model.
+
+        Predictions read the model once per call, so requests already in
+        flight finish on the previous model while new ones use this one.
+        """
+        compiled = self._compile_model(model)
+        grid = self._build_allocation_grid(model, compiled)
+        
+        self.model_metadata = metadata
+        self.feature_names = list(getattr(model.named_steps['preprocessor'], 'feature_names_in_', []))
+        self.compiled_model = compiled
+        self.allocation_grid = grid
+        self.model = model
+        self.is_trained = True
+        self._model_mtime = self.model_path.stat().st_mtime if self.model_path.exists() else None
+
+    def _compile_model(self, model: "Pipeline") -> Optional[CompiledForest]:
+        """Flat-array version of the pipeline for inference, or None to use sklearn"""
+        if not settings.INVESTMENT_COMPILED_INFERENCE:
+            return None
+        try:
+            compiled = CompiledForest.from_pipeline(model)
+            logger.info(f"⚡ Compiled investment model for inference: {compiled.info()}")
+            return compiled
+        except ValueError as e:
+            logger.warning(f"⚠️ Investment model not compiled, using sklearn inference: {e}")
+            return None
+
+    def _build_allocation_grid(self, model: "Pipeline", compiled: Optional[CompiledForest]) -> Optional[AllocationGrid]:
+        """
+        Precompute allocations for every risk/goal/employment combination.
+
+        Ages are tabulated at every whole year the API accepts. Debt-to-income
+        knots are a coarse uniform grid plus quantiles of the forest's own
+        split points on that feature, so the buckets are finest where the
+        model's output actually changes; past the last split the output no
+        longer depends on the ratio and clamping is exact. The remaining
+        numeric features are held at the training medians.
+
+        The grid is checked against the model on a synthetic sample and only
+        used when its 99th-percentile error is within
+        ``INVESTMENT_GRID_TOLERANCE``.
+        """
+        if not settings.INVESTMENT_GRID_ENABLED:
+            return None
+        
+        start_time = time.perf_counter()
+        try:
+            preprocessor = model.named_steps['preprocessor']
+            branches = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+            numeric, numeric_columns = branches['num']
+            categorical, categorical_columns = branches['cat']
+            numeric_columns, categorical_columns = list(numeric_columns), list(categorical_columns)
+            medians = dict(zip(numeric_columns, numeric.named_steps['imputer'].statistics_))
+            scaler = numeric.named_steps['scaler']
+            categories = {
+                column: [str(value) for value in values]
+                for column, values in zip(categorical_columns, categorical.named_steps['onehot'].categories_)
+            }
             
-            categorical_transformer = Pipeline(steps=[
-                ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
-                ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
-            ])
+            # Split points on the ratio, mapped back from the scaled feature space
+            # (the numeric branch comes first in the transformed matrix)
+            ratio_index = numeric_columns.index('debt_to_income_ratio')
+            thresholds = np.concatenate([
+                estimator.tree_.threshold[estimator.tree_.feature == ratio_index]
+                for estimator in model.named_steps['regressor'].estimators_
+            ]) * scaler.scale_[ratio_index] + scaler.mean_[ratio_index]
+            thresholds = thresholds[thresholds > 0]
+            ratio_knots = np.arange(0, 1 + self.GRID_RATIO_STEP / 2, self.GRID_RATIO_STEP)
+            if len(thresholds):
+                split_knots = np.quantile(thresholds, np.linspace(0, 1, self.GRID_RATIO_SPLIT_KNOTS))
+                ratio_knots = np.concatenate([ratio_knots, split_knots])
+            knots = {
+                'age': np.arange(self.GRID_AGE_RANGE[0], self.GRID_AGE_RANGE[1] + 1, dtype=float),
+                'debt_to_income_ratio': np.unique(ratio_knots.round(6))
+            }
             
-            self.preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', numeric_transformer, feature_columns),
-                    ('cat', categorical_transformer, categorical_features)
-                ]
-            )
+            axes = [categories[axis] for axis in AllocationGrid.CATEGORICAL_AXES]
+            axes += [knots[axis] for axis in AllocationGrid.CONTINUOUS_AXES]
+            mesh = [values.ravel() for values in np.meshgrid(*[np.arange(len(axis)) for axis in axes], indexing='ij')]
+            age = knots['age'][mesh[3]]
+            ratio = knots['debt_to_income_ratio'][mesh[4]]
+            income = medians['income']
+            columns = {name: np.full(len(age), value) for name, value in medians.items()}
+            columns.update({
+                'age': age,
+                'debt_amount': ratio * income,
+                'debt_to_income_ratio': ratio,
+                'savings_to_income_ratio': np.full(len(age), medians['existing_savings'] / income),
+                'investment_to_income_ratio': np.full(len(age), medians['investment_amount'] / income),
+                'age_factor': (65 - age) / 65
+            })
+            for position, axis in enumerate(AllocationGrid.CATEGORICAL_AXES):
+                columns[axis] = np.array(categories[axis], dtype=object)[mesh[position]]
             
-            # Create and train model
-            self.model = Pipeline([
-                ('preprocessor', self.preprocessor),
-                ('regressor', RandomForestRegressor(
-                    n_estimators=100,
-                    max_depth=15,
-                    min_samples_split=5,
-                    min_samples_leaf=2,
-                    random_state=42,
-                    n_jobs=-1
-                ))
-            ])
+            table = self._predict_with(model, compiled, columns)
+            grid = AllocationGrid(categories, knots, table.reshape(*[len(axis) for axis in axes], -1))
             
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
+            # Validate on API-shaped profiles (whole-year ages)
+            sample = self.create_advanced_dataset(settings.INVESTMENT_GRID_VALIDATION_SAMPLES, seed=2024)
+            sample['age'] = sample['age'].round()
+            sample['age_factor'] = (65 - sample['age']) / 65
+            validation = grid.validate(sample, self._predict_with(model, compiled, sample[numeric_columns + categorical_columns]))
+        except Exception as e:
+            logger.warning(f"⚠️ Allocation grid not built, predicting with the model: {e}")
+            return None
+        
+        build_ms = round((time.perf_counter() - start_time) * 1000, 2)
+        if validation['p99_error'] is None or validation['p99_error'] > settings.INVESTMENT_GRID_TOLERANCE:
+            logger.warning(
+                f"⚠️ Allocation grid rejected, p99 error {validation['p99_error']} exceeds "
+                f"tolerance {settings.INVESTMENT_GRID_TOLERANCE}: {grid.info()}"
             )
-            
-            # Train model
-            logger.info("🔄 Training Random Forest model...")
-            self.model.fit(X_train, y_train)
-            
-            # Evaluate model
-            train_score = self.model.score(X_train, y_train)
-            test_score = self.model.score(X_test, y_test)
-            
-            logger.info(f"✅ Model training completed!")
-            logger.info(f"📊 Training R² Score: {train_score:.3f}")
-            logger.info(f"📊 Testing R² Score: {test_score:.3f}")
-            
-            # Save model and metadata
-            self.save_model()
-            
-            self.is_trained = True
-            self.feature_names = X.columns.tolist()
-            
-            # Store metadata
-            self.model_metadata = {
-                'model_version': '1.0.0',
-                'training_date': datetime.now().isoformat(),
-                'train_score': train_score,
-                'test_score': test_score,
-                'feature_count': len(self.feature_names),
-                'target_count': len(target_columns),
-                'training_samples': len(X_train)
-            }
-            
-            return True
-            
+            return None
+        
+        logger.info(f"🧮 Built allocation grid in {build_ms}ms: {grid.info()}")
+        return grid
+
+    def _predict_with(self, model: "Pipeline", compiled: Optional[CompiledForest], columns) -> np.ndarray:
+        import pandas as pd
+        
+        if compiled is not None:
+            return compiled.predict(columns)
+        return model.predict(pd.DataFrame(columns))
+
+    def _predict_rows(self, columns) -> np.ndarray:
+        """Allocation predictions for input columns (a DataFrame or a dict of lists)"""
+        model, compiled, grid = self.model, self.compiled_model, self.allocation_grid
+        if grid is None:
+            return self._predict_with(model, compiled, columns)
+        
+        # Rows outside the grid (unknown categories, missing values) go to the model
+        allocations, covered = grid.lookup(columns)
+        if not covered.all():
+            rows = np.flatnonzero(~covered)
+            uncovered = {name: np.asarray(columns[name])[rows] for name in columns}
+            allocations[rows] = self._predict_with(model, compiled, uncovered)
+        return allocations
+
+    def _check_model_file(self):
+        """Reload the model if its file was replaced on disk (checked at most every few seconds)"""
+        if not self.initializer.done:
+            return
+        now = time.monotonic()
+        if now - self._model_checked_at < settings.INVESTMENT_MODEL_CHECK_INTERVAL:
+            return
+        self._model_checked_at = now
+        
+        try:
+            mtime = self.model_path.stat().st_mtime if self.model_path.exists() else None
+            if mtime is not None and mtime != self._model_mtime:
+                logger.info(f"🔄 Investment model file changed on disk, reloading {self.model_path}")
+                self.load_model()
         except Exception as e:
-            logger.error(f"❌ Model training failed: {str(e)}")
-            return False
+            logger.error(f"❌ Investment model reload failed: {str(e)}")
 
     def save_model(self):
         """Save the trained model"""
         try:
             if self.model is not None:
-                dump(self.model, self.model_path)
-                logger.info(f"💾 Model saved to {self.model_path}")
-                
-                # Save metadata
-                with open(self.metadata_path, 'w') as f:
-                    json.dump(self.model_metadata, f, indent=2)
+                self.write_model_files(self.model, self.model_metadata)
                     
         except Exception as e:
             logger.error(f"❌ Failed to save model: {str(e)}")
@@ -380,14 +667,15 @@ class AdvancedInvestmentRecommender:
         """Load the trained model"""
         try:
             if self.model_path.exists():
-                self.model = load(self.model_path)
-                self.is_trained = True
+                model = load(self.model_path)
                 
                 # Load metadata if exists
+                metadata = {}
                 if self.metadata_path.exists():
                     with open(self.metadata_path, 'r') as f:
-                        self.model_metadata = json.load(f)
+                        metadata = json.load(f)
                 
+                self.install_model(model, metadata)
                 return True
         except Exception as e:
             logger.error(f"❌ Failed to load model: {str(e)}")
@@ -426,6 +714,9 @@ class AdvancedInvestmentRecommender:
 
     def predict_allocation(self, user_data: Dict) -> Dict:
         """Generate comprehensive investment recommendation"""
+        # Waits for a background load that is still in progress
+        self.initializer.ensure_loaded()
+        self._check_model_file()
         if not self.is_trained:
             if not self.load_model():
                 return self._get_fallback_recommendation(user_data)
@@ -441,11 +732,10 @@ class AdvancedInvestmentRecommender:
                 'investment_to_income_ratio', 'age_factor', 'employment_type', 'risk_profile', 'goal_type'
             ]
             
-            input_data = {col: processed_data.get(col, 0) for col in feature_columns}
-            input_df = pd.DataFrame([input_data])
+            input_data = {col: [processed_data.get(col, 0)] for col in feature_columns}
             
             # Predict allocation
-            allocation_pred = self.model.predict(input_df)[0]
+            allocation_pred = self._predict_rows(input_data)[0]
             
             # Target columns
             target_columns = [
@@ -471,6 +761,182 @@ class AdvancedInvestmentRecommender:
             logger.error(f"Investment prediction error: {e}")
             return self._get_fallback_recommendation(user_data)
 
+    def predict_allocation_batch(self, profiles: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Generate recommendations for many profiles with a single model call
+        
+        Derived features are computed with NumPy for all profiles at once, the
+        pipeline's ``predict`` runs once on the full matrix, and the allocation
+        post-processing is applied column-wise. Each entry of the result matches
+        ``predict_allocation`` for the same profile; profiles that
+        ``predict_allocation`` cannot handle come back as ``None``.
+        """
+        if not profiles:
+            return []
+        
+        self.initializer.ensure_loaded()
+        self._check_model_file()
+        if not self.is_trained:
+            if not self.load_model():
+                return [self._predict_single_or_none(profile) for profile in profiles]
+        
+        results: List[Optional[Dict]] = [None] * len(profiles)
+        
+        # Rows with explicit None amounts take the per-row path, which handles them on its own terms
+        vector_rows = []
+        for i, profile in enumerate(profiles):
+            if any(profile.get(key, 0) is None for key in ('income', 'age', 'debt_amount', 'existing_savings', 'investment_amount')):
+                results[i] = self._predict_single_or_none(profile)
+            else:
+                vector_rows.append(i)
+        
+        if not vector_rows:
+            return results
+        
+        batch = [profiles[i] for i in vector_rows]
+        try:
+            features, derived = self._prepare_batch_features(batch)
+            predictions = self._predict_rows(features)
+            allocations = self._post_process_allocation_batch(predictions, batch)
+        except Exception as e:
+            logger.error(f"Batch investment prediction error, falling back to per-profile prediction: {e}")
+            for i in vector_rows:
+                results[i] = self._predict_single_or_none(profiles[i])
+            return results
+        
+        for row, i in enumerate(vector_rows):
+            processed_data = {**profiles[i], **{name: values[row] for name, values in derived.items()}}
+            try:
+                results[i] = self._generate_comprehensive_recommendation(profiles[i], allocations[row], processed_data)
+            except Exception as e:
+                logger.error(f"Investment prediction error: {e}")
+                results[i] = self._fallback_or_none(profiles[i])
+        
+        return results
+    
+    def _predict_single_or_none(self, user_data: Dict) -> Optional[Dict]:
+        try:
+            return self.predict_allocation(user_data)
+        except Exception as e:
+            logger.warning(f"Skipping profile that could not be scored: {e}")
+            return None
+    
+    def _fallback_or_none(self, user_data: Dict) -> Optional[Dict]:
+        try:
+            return self._get_fallback_recommendation(user_data)
+        except Exception as e:
+            logger.warning(f"Skipping profile that could not be scored: {e}")
+            return None
+    
+    def _prepare_batch_features(self, profiles: List[Dict]) -> Tuple["pd.DataFrame", Dict[str, List[float]]]:
+        """Vectorized equivalent of ``_prepare_user_data`` for many profiles"""
+        import pandas as pd
+        
+        def column(key, default):
+            return np.array([profile.get(key, default) for profile in profiles], dtype=float)
+        
+        income = column('income', 0)
+        debt_amount = column('debt_amount', 0)
+        existing_savings = column('existing_savings', 0)
+        investment_amount = column('investment_amount', 0)
+        age = column('age', 25)
+        has_income = income > 0
+        
+        def ratio(values):
+            return np.divide(values, income, out=np.zeros_like(values), where=has_income)
+        
+        derived = {
+            'debt_to_income_ratio': ratio(debt_amount),
+            'savings_to_income_ratio': ratio(existing_savings),
+            'investment_to_income_ratio': ratio(investment_amount),
+            'age_factor': (65 - age) / 65
+        }
+        
+        # Defaults for missing values, as in _prepare_user_data
+        monthly_expenses = np.array([
+            profile['monthly_expenses'] if profile.get('monthly_expenses') is not None else np.nan
+            for profile in profiles
+        ], dtype=float)
+        monthly_expenses = np.where(np.isnan(monthly_expenses), np.where(has_income, income * 0.7, 0), monthly_expenses)
+        
+        has_investment = np.array(['investment_amount' in profile for profile in profiles])
+        investment_feature = np.where(has_investment, investment_amount, np.where(has_income, income * 0.2, 0))
+        
+        features = pd.DataFrame({
+            'income': income,
+            'age': age,
+            'existing_savings': existing_savings,
+            'debt_amount': debt_amount,
+            'monthly_expenses': monthly_expenses,
+            'investment_amount': investment_feature,
+            **derived,
+            'employment_type': [
+                profile['employment_type'] if profile.get('employment_type') is not None else 'Salaried'
+                for profile in profiles
+            ],
+            'risk_profile': [profile.get('risk_profile', 0) for profile in profiles],
+            'goal_type': [profile.get('goal_type', 0) for profile in profiles]
+        })
+        
+        return features, {name: values.tolist() for name, values in derived.items()}
+    
+    def _post_process_allocation_batch(self, predictions: np.ndarray, profiles: List[Dict]) -> List[Dict]:
+        """
+        Column-wise equivalent of ``_post_process_allocation``
+        
+        Sums are accumulated asset by asset so every value is bit-identical to
+        the per-row version, and the returned dicts keep its key order.
+        """
+        target_columns = self.TARGET_COLUMNS
+        column_index = {asset: j for j, asset in enumerate(target_columns)}
+        
+        # Remove very small allocations
+        present = predictions > 0.01
+        allocation = np.where(present, predictions, 0.0)
+        
+        # Normalize to ensure sum = 1
+        total = np.zeros(len(profiles))
+        for j in range(len(target_columns)):
+            total = total + allocation[:, j]
+        allocation = np.divide(allocation, total[:, None], out=allocation.copy(), where=(total > 0)[:, None])
+        
+        # Apply risk profile constraints: cap equity at 30% for conservative profiles
+        conservative = np.array([profile.get('risk_profile', 'Moderate') == 'Conservative' for profile in profiles])
+        equity_columns = [column_index[asset] for asset in self.EQUITY_ASSETS]
+        total_equity = np.zeros(len(profiles))
+        for j in equity_columns:
+            total_equity = total_equity + allocation[:, j]
+        capped = conservative & (total_equity > 0.3)
+        
+        # Fixed deposits / debt funds that were dropped are re-added (at the end) by the cap
+        fd, debt = column_index['fixed_deposits'], column_index['debt_funds']
+        appended_fd = capped & ~present[:, fd] & present[:, equity_columns].any(axis=1)
+        appended_debt = capped & ~present[:, debt] & present[:, equity_columns].any(axis=1)
+        
+        if capped.any():
+            reduction_factor = np.divide(0.3, total_equity, out=np.ones_like(total_equity), where=capped)
+            for j in equity_columns:
+                rows = capped & present[:, j]
+                reduction = allocation[:, j] * (1 - reduction_factor)
+                allocation[:, j] = np.where(rows, allocation[:, j] * reduction_factor, allocation[:, j])
+                allocation[:, fd] = np.where(rows, allocation[:, fd] + reduction * 0.6, allocation[:, fd])
+                allocation[:, debt] = np.where(rows, allocation[:, debt] + reduction * 0.4, allocation[:, debt])
+        
+        values = allocation.tolist()
+        results = []
+        for row in range(len(profiles)):
+            row_values = values[row]
+            allocation_dict = {
+                asset: row_values[j] for j, asset in enumerate(target_columns) if present[row, j]
+            }
+            if appended_fd[row]:
+                allocation_dict['fixed_deposits'] = row_values[fd]
+            if appended_debt[row]:
+                allocation_dict['debt_funds'] = row_values[debt]
+            results.append(allocation_dict)
+        
+        return results
+    
     def _post_process_allocation(self, allocation: Dict, user_data: Dict) -> Dict:
         """Post-process allocation to ensure realistic constraints"""
         # Remove very small allocations
@@ -0,0 +1,119 @@
+# app/models/ml_models/keyword_matcher.py
+from collections import deque
+from typing import Dict, Iterable, List, Mapping
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton compiled from a ``{category: [keywords]}`` mapping.
+
+    A single pass over the text reports, for every category, how many of its
+    keywords occur in the text. Matching is plain substring matching and each
+    keyword is counted at most once, so the scores are identical to running
+    ``sum(1 for keyword in keywords if keyword in text)`` per category.
+    """
+
+    def __init__(self, rules: Mapping[str, Iterable[str]]):
+        self.categories: List[str] = list(rules.keys())
+
+        # keyword -> owning categories, one entry per listing so that a keyword
+        # repeated in a category's list is scored once per repetition
+        keyword_categories: Dict[str, List[int]] = {}
+        # An empty keyword is a substring of every text
+        self._base_counts: List[int] = [0] * len(self.categories)
+        for index, category in enumerate(self.categories):
+            for keyword in rules[category]:
+                if not keyword:
+                    self._base_counts[index] += 1
+                    continue
+                keyword_categories.setdefault(keyword, []).append(index)
+
+        self.keywords: List[str] = list(keyword_categories.keys())
+        self._keyword_categories: List[List[int]] = list(keyword_categories.values())
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        self._build_trie()
+        self._build_failure_links()
+        self._build_transitions()
+
+    def _build_trie(self):
+        """Insert every keyword into the goto trie"""
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+
+    def _build_failure_links(self):
+        """Breadth-first computation of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = (
+                        self._output[next_state] + self._output[self._fail[next_state]]
+                    )
+
+    def _build_transitions(self):
+        """
+        Fold the failure links into a deterministic transition table so that
+        matching is a single dict lookup per character. Characters that do not
+        occur in any keyword are absent and lead back to the root.
+        """
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])]
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(self._delta[self._fail[state]])
+            transitions.update(self._goto[state])
+            self._delta[state] = {char: target for char, target in transitions.items() if target}
+            queue.extend(self._goto[state].values())
+
+    def match(self, text: str) -> List[int]:
+        """Return the ids of all distinct keywords found in ``text``"""
+        delta = self._delta
+        output = self._output
+
+        found = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return list(found)
+
+    def category_scores(self, text: str) -> Dict[str, int]:
+        """Count matched keywords per category; categories without hits are omitted"""
+        counts = list(self._base_counts)
+        for keyword_id in self.match(text):
+            for category_index in self._keyword_categories[keyword_id]:
+                counts[category_index] += 1
+
+        return {
+            self.categories[index]: count
+            for index, count in enumerate(counts)
+            if count > 0
+        }
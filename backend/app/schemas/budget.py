@@ -33,6 +33,11 @@ class ExpenseItem(BaseModel):
         example=450.0,
         description="Transaction amount (optional)"
     )
+    date: Optional[datetime] = Field(
+        None,
+        example="2025-01-15T10:30:00",
+        description="Transaction date (optional, stored transactions default to the categorization time)"
+    )
     
     @validator('description')
     def validate_description(cls, v):
@@ -68,6 +73,8 @@ class SingleCategorizationResponse(BaseModel):
     data: CategorizationResult
     warning: Optional[str] = None
     processing_time_ms: Optional[float] = None
+    queue_wait_ms: Optional[float] = None
+    compute_time_ms: Optional[float] = None
 
 class CategorySummary(BaseModel):
     category_totals: Dict[str, float]
@@ -90,6 +97,42 @@ class BatchCategorizationResponse(BaseModel):
         }
     )
     processing_time_ms: Optional[float] = None
+    queue_wait_ms: Optional[float] = None
+    compute_time_ms: Optional[float] = None
+
+class StoredTransaction(BaseModel):
+    date: datetime
+    description: str
+    amount: Optional[float] = None
+    category: CategoryEnum
+    confidence: float
+    method: MethodEnum
+    source: str
+
+class TransactionHistoryResponse(BaseModel):
+    success: bool = True
+    count: int
+    transactions: List[StoredTransaction]
+
+class MonthlySpending(BaseModel):
+    month: str
+    total_amount: float
+    count: int
+
+class SpendingSummary(BaseModel):
+    start_month: str
+    end_month: str
+    months: List[MonthlySpending]
+    transaction_count: int
+    total_amount: float
+    category_totals: Dict[str, float]
+    category_counts: Dict[str, int]
+    category_distribution: Dict[str, float]
+    top_category: Optional[str] = None
+
+class SpendingSummaryResponse(BaseModel):
+    success: bool = True
+    data: SpendingSummary
 
 class ModelInfoResponse(BaseModel):
     success: bool = True
@@ -18,14 +18,14 @@ class ChatRequest(BaseModel):
         },
         description="User's profile information"
     )
-    transactions: List[Dict[str, Any]] = Field(
-        ...,
+    transactions: Optional[List[Dict[str, Any]]] = Field(
+        None,
         example=[
             {"description": "Rent", "amount": 15000, "category": "Needs"},
             {"description": "Groceries", "amount": 8000, "category": "Needs"},
             {"description": "Entertainment", "amount": 5000, "category": "Wants"}
         ],
-        description="List of user's financial transactions"
+        description="List of user's financial transactions; omit it to use the signed-in user's stored monthly spending"
     )
 
 class FinancialAnalysis(BaseModel):
@@ -43,11 +43,16 @@ class ChatResponse(BaseModel):
     query_category: str = Field(..., description="Category of the financial query")
     financial_analysis: FinancialAnalysis = Field(..., description="Analysis of user's financial situation")
     timestamp: str = Field(..., description="Response timestamp")
+    processing_time_ms: Optional[float] = Field(None, description="Total request time")
+    queue_wait_ms: Optional[float] = Field(None, description="Time spent waiting for an inference worker")
+    compute_time_ms: Optional[float] = Field(None, description="Time spent generating the answer")
 
 class ChatHealthResponse(BaseModel):
     status: str = "healthy"
     service: str = "Financial Chatbot"
     groq_api_status: str
+    upstream: Optional[Dict[str, Any]] = Field(None, description="Groq availability and latency observed from recent calls")
+    response_cache: Optional[Dict[str, Any]] = Field(None, description="Answer cache counters")
     timestamp: str
 
 class SupportedTopicsResponse(BaseModel):
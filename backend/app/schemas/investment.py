@@ -4,6 +4,8 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+from app.core.config import settings
+
 class RiskProfileEnum(str, Enum):
     CONSERVATIVE = "Conservative"
     MODERATE = "Moderate"
@@ -51,8 +53,8 @@ class BatchInvestmentRequest(BaseModel):
     profiles: List[UserProfile] = Field(
         ...,
         min_items=1,
-        max_items=50,
-        description="List of user profiles (max 50 items)"
+        max_items=settings.INVESTMENT_BATCH_MAX_PROFILES,
+        description=f"List of user profiles (max {settings.INVESTMENT_BATCH_MAX_PROFILES} items)"
     )
 
 class AllocationBreakdown(BaseModel):
@@ -111,6 +113,8 @@ class InvestmentRecommendationResponse(BaseModel):
     )
     metadata: Optional[Dict[str, Any]] = None
     processing_time_ms: Optional[float] = None
+    queue_wait_ms: Optional[float] = None
+    compute_time_ms: Optional[float] = None
 
 class BatchInvestmentResponse(BaseModel):
     success: bool = True
@@ -124,12 +128,28 @@ class BatchInvestmentResponse(BaseModel):
         }
     )
     processing_time_ms: Optional[float] = None
+    queue_wait_ms: Optional[float] = None
+    compute_time_ms: Optional[float] = None
 
 class ModelTrainingResponse(BaseModel):
     success: bool = True
     message: str
     status: str
     timestamp: str
+    job_id: Optional[str] = None
+
+class TrainingJobResponse(BaseModel):
+    success: bool = True
+    job_id: str
+    status: str = Field(..., example="running")
+    stage: Optional[str] = Field(None, example="fitting")
+    progress: float = Field(0.0, ge=0, le=1)
+    submitted_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    timings: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
 
 class HealthCheckResponse(BaseModel):
     status: str = "healthy"
@@ -5,11 +5,10 @@ from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
 from fastapi import HTTPException, status
 import logging
+import time
 
 from app.core.database import get_database
 from app.utils.auth import (
-    get_password_hash, 
-    verify_password, 
     create_access_token, 
     create_refresh_token,
     verify_token,
@@ -24,6 +23,9 @@ from app.schemas.auth import (
     UserRole
 )
 from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.services.password_hasher import password_hasher, PasswordHashingBusy
+from app.services.profile_stats import calculate_profile_stats
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +33,12 @@ class AuthService:
     def __init__(self):
         self.db = None
         
+        # Users resolved for authenticated requests, and when each user was last
+        # written (per process, so writes through another worker are only seen
+        # once these entries expire)
+        self.user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+        self._user_writes = TTLCache(max(settings.USER_CLAIMS_TRACKED_WRITES, 1), max(settings.USER_CLAIMS_MAX_AGE, 1))
+        
     async def get_database(self):
         """Get database instance with connection check"""
         try:
@@ -76,8 +84,8 @@ class AuthService:
                     detail="Email already registered"
                 )
             
-            # Hash password
-            hashed_password = get_password_hash(user_data.password)
+            # Hash password (on the hashing pool, off the event loop)
+            hashed_password = await password_hasher.hash(user_data.password)
             
             # Parse date of birth if provided
             date_of_birth = None
@@ -129,6 +137,8 @@ class AuthService:
                 }
             }
             
+            user_doc["stats"] = calculate_profile_stats(user_doc)
+            
             # Insert user
             result = await db.users.insert_one(user_doc)
             logger.info(f"✅ Created new user: {user_data.email}")
@@ -147,7 +157,7 @@ class AuthService:
                 updated_at=created_user["updated_at"]
             )
             
-        except HTTPException:
+        except (HTTPException, PasswordHashingBusy):
             raise
         except DuplicateKeyError:
             raise HTTPException(
@@ -168,7 +178,7 @@ class AuthService:
             
             # Find user by email
             user = await db.users.find_one({"email": credentials.email.lower()})
-            if not user or not verify_password(credentials.password, user["password"]):
+            if not user or not await password_hasher.verify(credentials.password, user["password"]):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid email or password"
@@ -182,18 +192,21 @@ class AuthService:
                 )
             
             # Update last login
+            login_time = datetime.utcnow()
             await db.users.update_one(
                 {"_id": user["_id"]},
                 {
                     "$set": {
-                        "last_login": datetime.utcnow(),
-                        "updated_at": datetime.utcnow()
+                        "last_login": login_time,
+                        "updated_at": login_time
                     }
                 }
             )
+            user["last_login"] = user["updated_at"] = login_time
+            self.invalidate_user(str(user["_id"]))
             
             # Create tokens
-            token_data = {"sub": str(user["_id"]), "email": user["email"]}
+            token_data = self._token_data(user)
             
             # Adjust token expiry if remember_me is True
             if credentials.remember_me:
@@ -224,7 +237,7 @@ class AuthService:
                 user=user_response
             )
             
-        except HTTPException:
+        except (HTTPException, PasswordHashingBusy):
             raise
         except Exception as e:
             logger.error(f"Authentication error: {e}")
@@ -256,7 +269,7 @@ class AuthService:
                 )
             
             # Create new tokens
-            token_data = {"sub": str(user["_id"]), "email": user["email"]}
+            token_data = self._token_data(user)
             access_token = create_access_token(token_data)
             new_refresh_token = create_refresh_token(token_data)
             
@@ -287,7 +300,11 @@ class AuthService:
             )
     
     async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
-        """Get user by ID"""
+        """Get user by ID (served from the user cache when possible)"""
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
             db = await self.get_database()
             user = await db.users.find_one({"_id": ObjectId(user_id)})
@@ -295,7 +312,7 @@ class AuthService:
             if not user:
                 return None
                 
-            return UserResponse(
+            user_response = UserResponse(
                 id=str(user["_id"]),
                 name=user["name"],
                 email=user["email"],
@@ -304,9 +321,59 @@ class AuthService:
                 created_at=user["created_at"],
                 updated_at=user["updated_at"]
             )
+            self.user_cache.set(user_id, user_response)
+            return user_response
         except Exception as e:
             logger.error(f"Error getting user: {e}")
             return None
+    
+    def user_from_claims(self, payload: Dict[str, Any]) -> Optional[UserResponse]:
+        """
+        Build the user from an access token's claims without a database lookup.
+        
+        Only tokens issued within USER_CLAIMS_MAX_AGE seconds, and after the
+        user's last write seen by this process, are trusted; otherwise (or for
+        tokens without user claims) returns None and the caller looks the user up.
+        """
+        issued_at = payload.get("iat")
+        if not settings.USER_CLAIMS_MAX_AGE or issued_at is None:
+            return None
+        if time.time() - issued_at > settings.USER_CLAIMS_MAX_AGE:
+            return None
+        
+        written_at = self._user_writes.get(payload.get("sub"))
+        if written_at is not None and written_at >= issued_at:
+            return None
+        
+        try:
+            return UserResponse(
+                id=payload["sub"],
+                name=payload["name"],
+                email=payload["email"],
+                role=payload["role"],
+                is_verified=payload["is_verified"],
+                created_at=payload["created_at"],
+                updated_at=payload["updated_at"]
+            )
+        except (KeyError, ValueError):
+            return None
+    
+    def invalidate_user(self, user_id: str):
+        """Forget the cached user after a write; tokens issued before now fall back to a lookup"""
+        self.user_cache.pop(user_id)
+        self._user_writes.set(user_id, time.time())
+    
+    def _token_data(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Token claims: the user id plus what get_current_user needs to skip the lookup"""
+        return {
+            "sub": str(user["_id"]),
+            "email": user["email"],
+            "name": user["name"],
+            "role": UserRole(user["role"]).value,
+            "is_verified": user["is_verified"],
+            "created_at": user["created_at"].isoformat(),
+            "updated_at": user["updated_at"].isoformat()
+        }
 
 # Global service instance
 auth_service = AuthService()
@@ -1,9 +1,18 @@
+import csv
+import json
 import time
+import codecs
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, AsyncIterator, Optional
 from datetime import datetime
 
+from app.core.config import settings
+
 from app.models.ml_models.budget_categorizer import budget_categorizer
+from app.services import inference_tasks
+from app.services.inference_executor import inference_executor, InferenceQueueFull
+from app.services.transaction_store import transaction_store
+from app.utils.batching import MicroBatcher
 from app.schemas.budget import (
     ExpenseItem, 
     BatchExpenseRequest,
@@ -22,6 +31,11 @@ class BudgetService:
         self.categorizer = budget_categorizer
         self.request_count = 0
         self.start_time = time.time()
+        self.micro_batcher = MicroBatcher(
+            self._categorize_micro_batch,
+            max_size=settings.MICRO_BATCH_MAX_SIZE,
+            max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS
+        ) if settings.MICRO_BATCH_ENABLED else None
     
     async def categorize_single_expense(self, expense: ExpenseItem) -> SingleCategorizationResponse:
         """Categorize a single expense item"""
@@ -31,11 +45,17 @@ class BudgetService:
             # Increment request counter
             self.request_count += 1
             
-            # Perform categorization
-            result = self.categorizer.hybrid_categorize(
-                description=expense.description,
-                amount=expense.amount
-            )
+            # Perform categorization off the event loop
+            if self.micro_batcher is not None:
+                result, timing = await self.micro_batcher.submit(
+                    (expense.description, expense.amount, time.time())
+                )
+            else:
+                result, timing = await inference_executor.run(
+                    inference_tasks.categorize_expense,
+                    expense.description,
+                    expense.amount
+                )
             
             # Convert to Pydantic model
             categorization_result = CategorizationResult(**result)
@@ -45,7 +65,9 @@ class BudgetService:
             response = SingleCategorizationResponse(
                 success=True,
                 data=categorization_result,
-                processing_time_ms=round(processing_time, 2)
+                processing_time_ms=round(processing_time, 2),
+                queue_wait_ms=timing["queue_wait_ms"],
+                compute_time_ms=timing["compute_ms"]
             )
             
             # Add warning if there was an error in the result
@@ -56,6 +78,8 @@ class BudgetService:
             
             return response
             
+        except InferenceQueueFull:
+            raise
         except Exception as e:
             logger.error(f"❌ Error categorizing single expense: {str(e)}")
             processing_time = (time.time() - start_time) * 1000
@@ -74,8 +98,35 @@ class BudgetService:
                 processing_time_ms=round(processing_time, 2)
             )
     
-    async def batch_categorize_expenses(self, batch_request: BatchExpenseRequest) -> BatchCategorizationResponse:
-        """Categorize multiple expenses in batch"""
+    async def _categorize_micro_batch(self, items: List[tuple]) -> List[tuple]:
+        """
+        Categorize coalesced single requests with one batch_categorize call
+        
+        Each item is ``(description, amount, submitted_at)``; each result is
+        ``(result, timing)`` where the queue wait includes the batching window.
+        """
+        dispatched_at = time.time()
+        transactions = [{"description": description, "amount": amount} for description, amount, _ in items]
+        
+        results, timing = await inference_executor.run(inference_tasks.categorize_expenses, transactions)
+        
+        responses = []
+        for (_, _, submitted_at), result in zip(items, results):
+            # Single requests never carry a transaction id
+            result.pop("transaction_id", None)
+            queue_wait_ms = (dispatched_at - submitted_at) * 1000 + timing["queue_wait_ms"]
+            responses.append((result, {
+                "queue_wait_ms": round(queue_wait_ms, 2),
+                "compute_ms": timing["compute_ms"]
+            }))
+        return responses
+    
+    async def batch_categorize_expenses(
+        self,
+        batch_request: BatchExpenseRequest,
+        user_id: Optional[str] = None
+    ) -> BatchCategorizationResponse:
+        """Categorize multiple expenses in batch, storing them for an authenticated user"""
         start_time = time.time()
         
         try:
@@ -91,42 +142,31 @@ class BudgetService:
                 for expense in batch_request.expenses
             ]
             
-            # Perform batch categorization
-            results = self.categorizer.batch_categorize(expenses_list)
+            # Perform batch categorization off the event loop
+            results, timing = await inference_executor.run(
+                inference_tasks.categorize_expenses,
+                expenses_list
+            )
+            
+            # Convert to Pydantic models
+            valid_results = [CategorizationResult(**result) for result in results]
             
             # Calculate summary statistics
             category_totals = {}
-            total_amount = 0.0
-            valid_results = []
+            total_amount = self._accumulate_totals(results, category_totals)
+            category_distribution = self._category_distribution(category_totals, total_amount)
             
-            for result in results:
-                # Convert to Pydantic model
-                categorization_result = CategorizationResult(**result)
-                valid_results.append(categorization_result)
-                
-                category = result["category"]
-                amount = result.get("amount", 0) or 0
-                
-                if category not in category_totals:
-                    category_totals[category] = 0.0
-                
-                category_totals[category] += amount
-                total_amount += amount
-            
-            # Calculate distribution percentages
-            category_distribution = {}
-            if total_amount > 0:
-                category_distribution = {
-                    category: round((amount / total_amount) * 100, 2)
-                    for category, amount in category_totals.items()
-                }
-            else:
-                category_distribution = {category: 0.0 for category in category_totals.keys()}
+            stored_count = 0
+            if user_id:
+                stored_count = transaction_store.record(
+                    user_id, results, [expense.date for expense in batch_request.expenses], "batch"
+                )
             
             processing_time = (time.time() - start_time) * 1000
             
             response_data = {
                 "processed_count": len(valid_results),
+                "stored_count": stored_count,
                 "results": [result.dict() for result in valid_results],
                 "summary": {
                     "category_totals": category_totals,
@@ -140,9 +180,13 @@ class BudgetService:
             return BatchCategorizationResponse(
                 success=True,
                 data=response_data,
-                processing_time_ms=round(processing_time, 2)
+                processing_time_ms=round(processing_time, 2),
+                queue_wait_ms=timing["queue_wait_ms"],
+                compute_time_ms=timing["compute_ms"]
             )
             
+        except InferenceQueueFull:
+            raise
         except Exception as e:
             logger.error(f"❌ Error in batch categorization: {str(e)}")
             processing_time = (time.time() - start_time) * 1000
@@ -162,6 +206,220 @@ class BudgetService:
                 processing_time_ms=round(processing_time, 2)
             )
     
+    async def stream_categorize_expenses(
+        self,
+        body: AsyncIterator[bytes],
+        file_format: str,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Categorize a CSV or NDJSON statement as it is uploaded
+        
+        Rows are categorized in chunks of ``settings.STREAM_CATEGORIZE_CHUNK_SIZE``
+        and every result is yielded as one NDJSON line as soon as its chunk is
+        done. Only the current chunk and the running category totals are held
+        in memory; the final line carries the summary for the whole statement.
+        Each chunk is also stored for an authenticated user.
+        """
+        start_time = time.time()
+        chunk_size = max(1, settings.STREAM_CATEGORIZE_CHUNK_SIZE)
+        category_totals: Dict[str, float] = {}
+        total_amount = 0.0
+        processed_count = 0
+        stored_count = 0
+        queue_wait_ms = 0.0
+        compute_ms = 0.0
+        chunk: List[Dict[str, Any]] = []
+        error = None
+        
+        try:
+            async for transaction in self._iter_transactions(body, file_format):
+                chunk.append(transaction)
+                if len(chunk) < chunk_size:
+                    continue
+                
+                results, timing = await self._categorize_stream_chunk(chunk, processed_count)
+                queue_wait_ms += timing["queue_wait_ms"]
+                compute_ms += timing["compute_ms"]
+                total_amount += self._accumulate_totals(results, category_totals)
+                processed_count += len(chunk)
+                if user_id:
+                    stored_count += transaction_store.record(
+                        user_id, results, [row.get("date") for row in chunk], "stream"
+                    )
+                chunk = []
+                yield "".join(json.dumps(result, default=str) + "\n" for result in results)
+            
+            if chunk:
+                results, timing = await self._categorize_stream_chunk(chunk, processed_count)
+                queue_wait_ms += timing["queue_wait_ms"]
+                compute_ms += timing["compute_ms"]
+                total_amount += self._accumulate_totals(results, category_totals)
+                processed_count += len(chunk)
+                if user_id:
+                    stored_count += transaction_store.record(
+                        user_id, results, [row.get("date") for row in chunk], "stream"
+                    )
+                yield "".join(json.dumps(result, default=str) + "\n" for result in results)
+            
+        except Exception as e:
+            # The response has already started, so report the failure in the summary record
+            logger.error(f"❌ Error in streaming categorization: {str(e)}")
+            error = str(e)
+        
+        self.request_count += processed_count
+        processing_time = (time.time() - start_time) * 1000
+        
+        summary = {
+            "type": "summary",
+            "success": error is None,
+            "processed_count": processed_count,
+            "stored_count": stored_count,
+            "summary": {
+                "category_totals": category_totals,
+                "total_amount": total_amount,
+                "category_distribution": self._category_distribution(category_totals, total_amount)
+            },
+            "processing_time_ms": round(processing_time, 2),
+            "queue_wait_ms": round(queue_wait_ms, 2),
+            "compute_time_ms": round(compute_ms, 2)
+        }
+        if error:
+            summary["error"] = error
+        
+        logger.info(f"✅ Streaming categorization completed: {processed_count} items processed")
+        yield json.dumps(summary) + "\n"
+    
+    async def _categorize_stream_chunk(self, chunk: List[Dict[str, Any]], offset: int):
+        """Categorize one chunk of streamed rows, numbering them from ``offset``"""
+        results, timing = await inference_executor.run(inference_tasks.categorize_expenses, chunk)
+        
+        for i, result in enumerate(results):
+            if chunk[i].get("error"):
+                result["error"] = chunk[i]["error"]
+            result["transaction_id"] = offset + i
+        
+        return results, timing
+    
+    async def _iter_transactions(self, body: AsyncIterator[bytes], file_format: str) -> AsyncIterator[Dict[str, Any]]:
+        """Parse uploaded CSV/NDJSON rows into transaction dicts"""
+        if file_format not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported format: {file_format}. Use 'csv' or 'ndjson'")
+        
+        header: Optional[List[str]] = None
+        pending = ""
+        
+        async for line in self._iter_lines(body):
+            if file_format == "csv":
+                # A quoted field can span lines: join them until the quotes balance
+                record = f"{pending}\n{line}" if pending else line
+                if record.count('"') % 2:
+                    if len(record) > settings.STREAM_MAX_LINE_LENGTH:
+                        raise ValueError(f"CSV record exceeds {settings.STREAM_MAX_LINE_LENGTH} characters")
+                    pending = record
+                    continue
+                pending = ""
+                line = record
+            
+            if not line.strip():
+                continue
+            
+            if file_format == "ndjson":
+                try:
+                    row = json.loads(line)
+                    if not isinstance(row, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    yield {"description": "", "amount": None, "error": f"Invalid NDJSON line: {e}"}
+                    continue
+            else:
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = [column.strip().lower() for column in values]
+                    if "description" not in header:
+                        raise ValueError("CSV header must include a 'description' column")
+                    continue
+                row = dict(zip(header, values))
+            
+            yield {
+                "description": row.get("description") or "",
+                "amount": self._parse_amount(row.get("amount")),
+                "date": self._parse_date(row.get("date"))
+            }
+        
+        if pending:
+            yield {"description": "", "amount": None, "error": "Invalid CSV record: unterminated quoted field"}
+    
+    @staticmethod
+    async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """Split a byte stream into text lines without buffering the whole body"""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        buffer = ""
+        
+        async for data in body:
+            buffer += decoder.decode(data)
+            if "\n" not in buffer:
+                if len(buffer) > settings.STREAM_MAX_LINE_LENGTH:
+                    raise ValueError(f"Line exceeds {settings.STREAM_MAX_LINE_LENGTH} characters")
+                continue
+            
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if len(line) > settings.STREAM_MAX_LINE_LENGTH:
+                    raise ValueError(f"Line exceeds {settings.STREAM_MAX_LINE_LENGTH} characters")
+                yield line.rstrip("\r")
+        
+        buffer += decoder.decode(b"", final=True)
+        if len(buffer) > settings.STREAM_MAX_LINE_LENGTH:
+            raise ValueError(f"Line exceeds {settings.STREAM_MAX_LINE_LENGTH} characters")
+        if buffer:
+            yield buffer.rstrip("\r")
+    
+    @staticmethod
+    def _parse_amount(value: Any) -> Optional[float]:
+        """Parse an optional amount, tolerating blanks and thousands separators"""
+        if value is None or value == "":
+            return None
+        try:
+            return float(str(value).replace(",", "").strip())
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _parse_date(value: Any) -> Optional[datetime]:
+        """Parse an optional ISO date; rows without a usable date are stored as categorized now"""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _accumulate_totals(results: List[Dict[str, Any]], category_totals: Dict[str, float]) -> float:
+        """Add result amounts to category_totals in place; return the amount added"""
+        added = 0.0
+        for result in results:
+            category = result["category"]
+            amount = result.get("amount", 0) or 0
+            
+            if category not in category_totals:
+                category_totals[category] = 0.0
+            
+            category_totals[category] += amount
+            added += amount
+        return added
+    
+    @staticmethod
+    def _category_distribution(category_totals: Dict[str, float], total_amount: float) -> Dict[str, float]:
+        """Calculate distribution percentages"""
+        if total_amount > 0:
+            return {
+                category: round((amount / total_amount) * 100, 2)
+                for category, amount in category_totals.items()
+            }
+        return {category: 0.0 for category in category_totals.keys()}
+    
     async def get_model_info(self) -> ModelInfoResponse:
         """Get information about the ML model"""
         try:
@@ -172,7 +430,8 @@ class BudgetService:
                 "service_stats": {
                     "total_requests": self.request_count,
                     "uptime_seconds": time.time() - self.start_time,
-                    "model_ready": self.categorizer.is_trained
+                    "model_ready": self.categorizer.is_trained,
+                    "micro_batching": self.micro_batcher.stats() if self.micro_batcher else None
                 }
             })
             
@@ -191,7 +450,10 @@ class BudgetService:
     async def health_check(self) -> HealthCheckResponse:
         """Health check endpoint"""
         uptime = time.time() - self.start_time
-        ml_status = "ready" if self.categorizer.is_trained else "not_ready"
+        if self.categorizer.is_trained:
+            ml_status = "ready"
+        else:
+            ml_status = "loading" if self.categorizer.initializer.loading else "not_ready"
         
         return HealthCheckResponse(
             status="healthy",
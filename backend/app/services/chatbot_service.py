@@ -1,10 +1,14 @@
 # app/services/chatbot_service.py
+import json
 import time
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
 from datetime import datetime
 
 from app.models.ml_models.financial_chatbot import financial_chatbot
+from app.services import inference_tasks
+from app.services.inference_executor import inference_executor, InferenceQueueFull
+from app.services.transaction_store import transaction_store
 from app.schemas.chatbot import (
     ChatRequest,
     ChatResponse,
@@ -21,7 +25,7 @@ class ChatbotService:
         self.request_count = 0
         self.start_time = time.time()
     
-    async def get_financial_advice(self, request: ChatRequest) -> ChatResponse:
+    async def get_financial_advice(self, request: ChatRequest, user_id: Optional[str] = None) -> ChatResponse:
         """Get AI-powered financial advice"""
         start_time = time.time()
         
@@ -31,26 +35,33 @@ class ChatbotService:
             
             # Validate request
             self._validate_request(request)
+            await self._load_transactions(request, user_id)
             
-            # Get chatbot response
-            result = self.chatbot.answer_query(
-                query=request.query,
-                user_profile=request.user_profile,
-                transactions=request.transactions
-            )
+            # Analysis and prompt building run off the event loop; the LLM call is awaited
+            context, timing = await self._build_context(request)
+            if context is None:
+                result = self.chatbot.error_response(request.user_profile)
+            else:
+                generation_start = time.time()
+                result = await self.chatbot.generate_answer(context)
+                timing["compute_ms"] = round(timing["compute_ms"] + (time.time() - generation_start) * 1000, 2)
             
             # Convert to response format
             financial_analysis = FinancialAnalysis(**result["financial_analysis"])
             
+            processing_time = (time.time() - start_time) * 1000
+            
             response = ChatResponse(
                 answer=result["answer"],
                 method=result["method"],
                 query_category=result["query_category"],
                 financial_analysis=financial_analysis,
-                timestamp=result["timestamp"]
+                timestamp=result["timestamp"],
+                processing_time_ms=round(processing_time, 2),
+                queue_wait_ms=timing["queue_wait_ms"],
+                compute_time_ms=timing["compute_ms"]
             )
             
-            processing_time = (time.time() - start_time) * 1000
             logger.info(f"Chat request processed in {processing_time:.2f}ms")
             
             return response
@@ -59,24 +70,123 @@ class ChatbotService:
             logger.error(f"❌ Error processing chat request: {str(e)}")
             raise e
     
+    async def stream_financial_advice(self, request: ChatRequest, user_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Prepare a chat request and return a Server-Sent Events stream of the answer
+        
+        Validation and prompt building happen before the stream is returned, so
+        bad input and a full inference queue still surface as HTTP errors. The
+        stream emits a ``meta`` event (query category and financial analysis),
+        ``token`` events as the model generates, and a final ``done`` event.
+        """
+        start_time = time.time()
+        self.request_count += 1
+        self._validate_request(request)
+        await self._load_transactions(request, user_id)
+        
+        context, timing = await self._build_context(request)
+        return self._sse_events(context, request, timing, start_time)
+    
+    async def _sse_events(
+        self,
+        context: Optional[Dict[str, Any]],
+        request: ChatRequest,
+        timing: Dict[str, float],
+        start_time: float
+    ) -> AsyncIterator[str]:
+        if context is None:
+            result = self.chatbot.error_response(request.user_profile)
+            yield self._sse("meta", {
+                "query_category": result["query_category"],
+                "financial_analysis": result["financial_analysis"]
+            })
+            yield self._sse("token", {"content": result["answer"]})
+            yield self._sse("done", self._done_payload(result, timing, start_time))
+            return
+        
+        yield self._sse("meta", {
+            "query_category": context["query_category"],
+            "financial_analysis": context["financial_analysis"]
+        })
+        
+        first_token_ms = None
+        async for event in self.chatbot.stream_answer(context):
+            if event["type"] == "token":
+                if first_token_ms is None:
+                    first_token_ms = (time.time() - start_time) * 1000
+                yield self._sse("token", {"content": event["content"]})
+            elif event["type"] == "error":
+                yield self._sse("error", {"message": event["message"]})
+            else:
+                payload = self._done_payload(event, timing, start_time)
+                payload["time_to_first_token_ms"] = round(first_token_ms, 2) if first_token_ms is not None else None
+                logger.info(f"Chat stream completed in {payload['processing_time_ms']:.2f}ms (first token {payload['time_to_first_token_ms']}ms)")
+                yield self._sse("done", payload)
+    
+    @staticmethod
+    def _done_payload(result: Dict[str, Any], timing: Dict[str, float], start_time: float) -> Dict[str, Any]:
+        return {
+            "answer": result["answer"],
+            "method": result["method"],
+            "query_category": result["query_category"],
+            "timestamp": result["timestamp"],
+            "processing_time_ms": round((time.time() - start_time) * 1000, 2),
+            "queue_wait_ms": timing["queue_wait_ms"]
+        }
+    
+    @staticmethod
+    def _sse(event: str, data: Dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    
+    @staticmethod
+    async def _load_transactions(request: ChatRequest, user_id: Optional[str]):
+        """Fill in the signed-in user's stored monthly spending when the request sends no transactions"""
+        if request.transactions is not None:
+            return
+        request.transactions = []
+        if user_id:
+            try:
+                request.transactions = await transaction_store.monthly_spending(user_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load stored spending: {e}")
+    
+    async def _build_context(self, request: ChatRequest) -> Tuple[Optional[Dict[str, Any]], Dict[str, float]]:
+        """Run the CPU-bound part of a query on the inference executor; None context on failure"""
+        try:
+            return await inference_executor.run(
+                inference_tasks.build_chat_context,
+                request.query,
+                request.user_profile,
+                request.transactions
+            )
+        except InferenceQueueFull:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error in answer_query: {e}")
+            return None, {"queue_wait_ms": 0.0, "compute_ms": 0.0}
+    
     async def health_check(self) -> ChatHealthResponse:
-        """Health check for chatbot service"""
+        """
+        Health check for chatbot service
+        
+        Served from the Groq client's health monitor, which is fed by real chat
+        traffic (and an occasional idle probe), so no LLM request is made here.
+        """
         try:
-            # Test Groq API availability
-            groq_status = "available"
-            try:
-                test_messages = [
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": "Hello"}
-                ]
-                self.chatbot.groq_client.chat_completion(test_messages, max_tokens=10)
-            except Exception:
+            groq_client = self.chatbot.groq_client
+            if groq_client.enabled:
+                upstream = groq_client.health.snapshot()
+                groq_status = upstream["status"]
+            else:
+                upstream = {"name": "groq", "status": "disabled"}
                 groq_status = "unavailable"
             
             return ChatHealthResponse(
                 status="healthy",
                 service="Financial Chatbot",
                 groq_api_status=groq_status,
+                upstream=upstream,
+                response_cache=self.chatbot.response_cache.stats(),
                 timestamp=datetime.now().isoformat()
             )
             
@@ -101,7 +211,7 @@ class ChatbotService:
         if not request.user_profile:
             raise ValueError("User profile is required")
         
-        if not isinstance(request.transactions, list):
+        if request.transactions is not None and not isinstance(request.transactions, list):
             raise ValueError("Transactions must be a list")
         
         # Validate essential profile fields
@@ -0,0 +1,142 @@
+# app/services/inference_executor.py
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when no inference slot frees up within the queue timeout"""
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> Tuple[Any, float, float]:
+    """Run ``fn`` in the worker and report when it started and how long it took"""
+    started_at = time.time()
+    compute_start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, started_at, (time.perf_counter() - compute_start) * 1000
+
+
+class InferenceExecutor:
+    """
+    Runs synchronous ML inference off the asyncio event loop.
+
+    ``mode`` is ``"thread"`` (shared in-process models) or ``"process"``
+    (spawned workers that preload their own copy of the models). At most
+    ``workers + max_queue`` calls are admitted at once; further callers wait
+    up to ``queue_timeout`` seconds for a slot and then get
+    ``InferenceQueueFull``, which app/main.py turns into a 503.
+    """
+
+    MODES = ("thread", "process")
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.mode = (mode or settings.INFERENCE_EXECUTOR).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown inference executor '{self.mode}', expected one of {self.MODES}")
+
+        self.workers = max(1, workers or settings.INFERENCE_WORKERS)
+        self.max_queue = max(0, settings.INFERENCE_MAX_QUEUE if max_queue is None else max_queue)
+        self.queue_timeout = settings.INFERENCE_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+
+        self._pool: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                from app.services.inference_tasks import preload_models
+
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=preload_models
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="inference"
+                )
+            logger.info(f"🧵 Inference executor started: {self.mode} pool with {self.workers} workers")
+        return self._pool
+
+    def start(self):
+        """Create the worker pool up front instead of on the first request"""
+        pool = self._get_pool()
+        if self.mode == "process":
+            # Spawn every worker now so model loading does not land on the first requests
+            from app.services.inference_tasks import preload_models
+
+            for _ in range(self.workers):
+                pool.submit(preload_models)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+        """
+        Run ``fn(*args, **kwargs)`` on the pool.
+
+        Returns the result and a timing dict with ``queue_wait_ms`` (time spent
+        waiting for a slot and a free worker) and ``compute_ms``.
+        """
+        submitted_at = time.time()
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"⚠️ Inference queue full ({self.in_flight} in flight), rejecting request")
+            raise InferenceQueueFull(
+                f"Inference queue is full ({self.workers} workers, {self.max_queue} queued)"
+            )
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, started_at, compute_ms = await loop.run_in_executor(
+                self._get_pool(), _timed_call, fn, args, kwargs
+            )
+            self.completed += 1
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+        timing = {
+            "queue_wait_ms": round(max(0.0, started_at - submitted_at) * 1000, 2),
+            "compute_ms": round(compute_ms, 2)
+        }
+        return result, timing
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("🛑 Inference executor stopped")
+
+
+# Global executor instance
+inference_executor = InferenceExecutor()
@@ -0,0 +1,54 @@
+# app/services/inference_tasks.py
+"""
+Top-level inference entry points dispatched through the inference executor.
+
+They live at module level so that they can be pickled into process-pool
+workers; ``preload_models`` is the worker initializer that loads the model
+singletons in each worker.
+"""
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.models.ml_models.budget_categorizer import budget_categorizer
+from app.models.ml_models.investment_recommender import investment_recommender
+from app.models.ml_models.financial_chatbot import financial_chatbot
+
+logger = logging.getLogger(__name__)
+
+
+def preload_models():
+    """Worker initializer - load every model before the first task arrives"""
+    categorizer_ready = budget_categorizer.initializer.ensure_loaded()
+    recommender_ready = investment_recommender.initializer.ensure_loaded()
+    return categorizer_ready and recommender_ready
+
+
+def categorize_expense(description: str, amount: Optional[float] = None) -> Dict[str, Any]:
+    return budget_categorizer.hybrid_categorize(description=description, amount=amount)
+
+
+def categorize_expenses(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return budget_categorizer.batch_categorize(transactions)
+
+
+def recommend_investment(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    return investment_recommender.predict_allocation(user_data)
+
+
+def recommend_investments(profiles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Recommend for several profiles, skipping invalid ones; returns (results, failed_count)"""
+    # Validate individual profiles
+    valid_profiles = [
+        profile for profile in profiles
+        if profile['income'] > 0 and 18 <= profile['age'] <= 100
+    ]
+    
+    predictions = investment_recommender.predict_allocation_batch(valid_profiles)
+    results = [result for result in predictions if result is not None]
+    
+    return results, len(profiles) - len(results)
+
+
+def build_chat_context(query: str, user_profile: Dict[str, Any], transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return financial_chatbot.build_context(query=query, user_profile=user_profile, transactions=transactions)
+
@@ -1,17 +1,21 @@
 # app/services/investment_service.py
 import time
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 # Fix the import to use the global instance
 from app.models.ml_models.investment_recommender import investment_recommender
+from app.services import inference_tasks
+from app.services.inference_executor import inference_executor, InferenceQueueFull
+from app.services.training_jobs import training_job_manager, TrainingJobInProgress
 from app.schemas.investment import (
     UserProfile,
     BatchInvestmentRequest,
     InvestmentRecommendationResponse,
     BatchInvestmentResponse,
     ModelTrainingResponse,
+    TrainingJobResponse,
     HealthCheckResponse
 )
 
@@ -34,9 +38,9 @@ class InvestmentService:
             # Validate inputs
             self._validate_profile(profile)
             
-            # Get recommendation
+            # Get recommendation off the event loop
             user_data = profile.dict()
-            result = self.recommender.predict_allocation(user_data)
+            result, timing = await inference_executor.run(inference_tasks.recommend_investment, user_data)
             
             processing_time = (time.time() - start_time) * 1000
             
@@ -47,9 +51,13 @@ class InvestmentService:
                     "model_version": result.get("model_metadata", {}).get("model_version", "1.0.0"),
                     "recommendation_timestamp": datetime.now().isoformat()
                 },
-                processing_time_ms=round(processing_time, 2)
+                processing_time_ms=round(processing_time, 2),
+                queue_wait_ms=timing["queue_wait_ms"],
+                compute_time_ms=timing["compute_ms"]
             )
             
+        except InferenceQueueFull:
+            raise
         except Exception as e:
             logger.error(f"❌ Error generating investment recommendation: {str(e)}")
             processing_time = (time.time() - start_time) * 1000
@@ -72,23 +80,10 @@ class InvestmentService:
             self.request_count += len(batch_request.profiles)
             
             profiles_list = [p.dict() for p in batch_request.profiles]
-            results = []
-            failed_count = 0
-            
-            for profile in profiles_list:
-                try:
-                    # Validate individual profile
-                    if profile['income'] <= 0 or profile['age'] < 18 or profile['age'] > 100:
-                        failed_count += 1
-                        continue
-                    
-                    result = self.recommender.predict_allocation(profile)
-                    results.append(result)
-                    
-                except Exception as e:
-                    logger.warning(f"Skipping invalid profile: {e}")
-                    failed_count += 1
-                    continue
+            (results, failed_count), timing = await inference_executor.run(
+                inference_tasks.recommend_investments,
+                profiles_list
+            )
             
             processing_time = (time.time() - start_time) * 1000
             
@@ -100,9 +95,13 @@ class InvestmentService:
                     "failed_count": failed_count,
                     "results": results
                 },
-                processing_time_ms=round(processing_time, 2)
+                processing_time_ms=round(processing_time, 2),
+                queue_wait_ms=timing["queue_wait_ms"],
+                compute_time_ms=timing["compute_ms"]
             )
             
+        except InferenceQueueFull:
+            raise
         except Exception as e:
             logger.error(f"❌ Error in batch investment recommendations: {str(e)}")
             processing_time = (time.time() - start_time) * 1000
@@ -120,26 +119,20 @@ class InvestmentService:
             )
     
     async def train_model(self) -> ModelTrainingResponse:
-        """Trigger model training"""
+        """Submit a background model training job"""
         try:
-            # Trigger model training
-            success = self.recommender.train_advanced_model()
+            job = training_job_manager.submit()
             
-            if success:
-                return ModelTrainingResponse(
-                    success=True,
-                    message="Investment model training completed successfully",
-                    status="training_completed",
-                    timestamp=datetime.now().isoformat()
-                )
-            else:
-                return ModelTrainingResponse(
-                    success=False,
-                    message="Model training failed",
-                    status="training_failed",
-                    timestamp=datetime.now().isoformat()
-                )
+            return ModelTrainingResponse(
+                success=True,
+                message="Investment model training started",
+                status="training_queued",
+                timestamp=datetime.now().isoformat(),
+                job_id=job["job_id"]
+            )
                 
+        except TrainingJobInProgress:
+            raise
         except Exception as e:
             logger.error(f"❌ Model training error: {str(e)}")
             return ModelTrainingResponse(
@@ -149,10 +142,20 @@ class InvestmentService:
                 timestamp=datetime.now().isoformat()
             )
     
+    def get_training_job(self, job_id: str) -> Optional[TrainingJobResponse]:
+        """Status of a training job, or None if it is unknown"""
+        job = training_job_manager.get(job_id)
+        if job is None:
+            return None
+        return TrainingJobResponse(success=job["status"] != "failed", **job)
+    
     async def health_check(self) -> HealthCheckResponse:
         """Health check endpoint"""
         uptime = time.time() - self.start_time
-        model_status = "ready" if self.recommender.is_trained else "not_ready"
+        if self.recommender.is_trained:
+            model_status = "ready"
+        else:
+            model_status = "loading" if self.recommender.initializer.loading else "not_ready"
         
         return HealthCheckResponse(
             status="healthy",
@@ -0,0 +1,136 @@
+# app/services/password_hasher.py
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from app.core.config import settings
+from app.utils.auth import get_password_hash, verify_password
+
+logger = logging.getLogger(__name__)
+
+# Recent calls kept for the latency percentiles
+LATENCY_WINDOW = 1000
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when no hashing slot frees up within the queue timeout"""
+
+
+def _percentile(samples: Deque[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 2)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated thread pool.
+
+    A bcrypt round costs hundreds of milliseconds of CPU; run inline it
+    stalls every other request on the worker. bcrypt releases the GIL, so
+    ``workers`` threads hash in parallel while the event loop keeps serving.
+    The pool is separate from the inference executor so a sign-in burst
+    cannot starve model requests (or the other way round). At most
+    ``workers + max_queue`` calls are admitted; further callers wait up to
+    ``queue_timeout`` seconds for a slot and then get
+    ``PasswordHashingBusy``, which app/main.py turns into a 503.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.workers = max(1, workers or settings.PASSWORD_HASH_WORKERS)
+        self.max_queue = max(0, settings.PASSWORD_HASH_MAX_QUEUE if max_queue is None else max_queue)
+        self.queue_timeout = settings.PASSWORD_HASH_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._hash_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._queue_wait_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            logger.info(f"🔐 Password hashing pool started with {self.workers} workers")
+        return self._pool
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        submitted_at = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"⚠️ Password hashing queue full ({self.in_flight} in flight), rejecting request")
+            raise PasswordHashingBusy(
+                f"Password hashing queue is full ({self.workers} workers, {self.max_queue} queued)"
+            )
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result, finished_at = await loop.run_in_executor(self._get_pool(), self._timed, fn, args)
+            self.completed += 1
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+        self._queue_wait_ms.append((started_at - submitted_at) * 1000)
+        self._hash_ms.append((finished_at - started_at) * 1000)
+        return result
+
+    @staticmethod
+    def _timed(fn: Callable, args: tuple) -> tuple:
+        started_at = time.perf_counter()
+        result = fn(*args)
+        return started_at, result, time.perf_counter()
+
+    @property
+    def queue_depth(self) -> int:
+        """Admitted calls waiting for a free worker"""
+        return max(0, self.in_flight - self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "hash_ms": {
+                "p50": _percentile(self._hash_ms, 0.5),
+                "p99": _percentile(self._hash_ms, 0.99)
+            },
+            "queue_wait_ms": {
+                "p50": _percentile(self._queue_wait_ms, 0.5),
+                "p99": _percentile(self._queue_wait_ms, 0.99)
+            }
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("🛑 Password hashing pool stopped")
+
+
+# Global hasher instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,251 @@
+# app/services/profile_stats.py
+"""
+Profile statistics stored on the user document.
+
+Completion, financial score and the other profile stats only change when
+the profile is written, so they are computed on signup and on every
+profile update and stored under ``stats``; profile reads return the
+stored values. ``account_age_days`` is the one time-based field: the
+ProfileStatsRefresher advances it server-side for the users whose stored
+age is out of date.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Fields the stats are computed from
+STATS_SOURCE_PROJECTION = {
+    "profile": 1, "financial_profile": 1, "onboarding": 1,
+    "is_verified": 1, "is_premium": 1, "login_count": 1, "created_at": 1
+}
+
+DEFAULT_STATS = {
+    "profile_completion": 0,
+    "account_age_days": 0,
+    "financial_score": 50,
+    "is_verified": False,
+    "account_type": "free",
+    "total_logins": 1
+}
+
+# Whole days since created_at, evaluated by the server
+ACCOUNT_AGE_EXPRESSION = {
+    "$toInt": {"$floor": {"$divide": [{"$subtract": ["$$NOW", "$created_at"]}, 86400000]}}
+}
+
+
+def calculate_profile_stats(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Calculate profile completion and other stats"""
+    try:
+        profile = user.get("profile", {})
+        financial_profile = user.get("financial_profile", {})
+
+        # Count completed fields
+        total_fields = 10
+        completed_fields = 0
+
+        # Basic fields
+        if profile.get("phone"):
+            completed_fields += 1
+        if profile.get("date_of_birth"):
+            completed_fields += 1
+        if profile.get("country"):
+            completed_fields += 1
+        if profile.get("bio"):
+            completed_fields += 1
+
+        # Financial profile fields
+        if financial_profile.get("monthly_income_range"):
+            completed_fields += 1
+        if financial_profile.get("financial_goal"):
+            completed_fields += 1
+        if financial_profile.get("financial_status"):
+            completed_fields += 1
+        if financial_profile.get("risk_tolerance"):
+            completed_fields += 1
+        if financial_profile.get("investment_experience"):
+            completed_fields += 1
+
+        # Account verification
+        if user.get("is_verified"):
+            completed_fields += 1
+
+        profile_completion = int((completed_fields / total_fields) * 100)
+
+        return {
+            "profile_completion": profile_completion,
+            "account_age_days": calculate_account_age_days(user.get("created_at")),
+            "financial_score": calculate_financial_score(user),
+            "is_verified": user.get("is_verified", False),
+            "account_type": "premium" if user.get("is_premium", False) else "free",
+            "total_logins": user.get("login_count", 1)
+        }
+
+    except Exception as e:
+        logger.error(f"Error calculating profile stats: {e}")
+        return dict(DEFAULT_STATS)
+
+
+def calculate_account_age_days(created_at: Any) -> int:
+    """Whole days since the account was created (ISO strings accepted)"""
+    try:
+        if created_at is None:
+            return 0
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        if created_at.tzinfo is not None:
+            # Compare in UTC: dropping the offset would shift the age by its hours
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return max(0, (datetime.utcnow() - created_at).days)
+    except Exception:
+        return 0
+
+
+def calculate_financial_score(user: Dict[str, Any]) -> int:
+    """Calculate financial literacy score"""
+    try:
+        score = 30  # Base score
+
+        profile = user.get("profile", {})
+        financial_profile = user.get("financial_profile", {})
+        onboarding = user.get("onboarding", {})
+
+        # Add points for completed profile
+        if profile.get("date_of_birth"):
+            score += 10
+        if profile.get("phone"):
+            score += 5
+        if profile.get("country"):
+            score += 5
+        if profile.get("bio"):
+            score += 5
+
+        # Add points for financial profile
+        if financial_profile.get("monthly_income_range"):
+            score += 15
+        if financial_profile.get("financial_goal"):
+            score += 10
+        if financial_profile.get("financial_status"):
+            score += 10
+        if financial_profile.get("risk_tolerance"):
+            score += 5
+        if financial_profile.get("investment_experience"):
+            score += 5
+
+        # Add points for verification and onboarding
+        if user.get("is_verified"):
+            score += 10
+        if onboarding.get("completed"):
+            score += 5
+
+        return min(score, 100)  # Cap at 100
+    except Exception as e:
+        logger.error(f"Error calculating financial score: {e}")
+        return 50  # Default score
+
+
+def stored_profile_stats(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Stats stored on the document, computed only for users not yet backfilled"""
+    return user.get("stats") or calculate_profile_stats(user)
+
+
+async def store_profile_stats(users, user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Recompute the stats of a just-written user document and store them.
+
+    ``user`` must include the STATS_SOURCE_PROJECTION fields. Skips the write
+    when nothing changed; returns the current stats either way.
+    """
+    stats = calculate_profile_stats(user)
+    if stats != user.get("stats"):
+        await users.update_one({"_id": user["_id"]}, {"$set": {"stats": stats}})
+        user["stats"] = stats
+    return stats
+
+
+async def backfill_profile_stats(users, only_missing: bool = True, batch_size: int = 1000) -> int:
+    """Compute and store stats for existing users in bulk; returns the number of users written"""
+    query = {"stats": {"$exists": False}} if only_missing else {}
+    projection = {**STATS_SOURCE_PROJECTION, "stats": 1}
+    written = 0
+    operations = []
+
+    async for user in users.find(query, projection, batch_size=batch_size):
+        stats = calculate_profile_stats(user)
+        if stats != user.get("stats"):
+            operations.append(UpdateOne({"_id": user["_id"]}, {"$set": {"stats": stats}}))
+        if len(operations) >= batch_size:
+            written += (await users.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+
+    if operations:
+        written += (await users.bulk_write(operations, ordered=False)).modified_count
+    return written
+
+
+async def refresh_account_ages(users) -> int:
+    """
+    Advance ``stats.account_age_days`` for every user whose stored age is stale.
+
+    A single server-side update that scans the users but only writes the
+    documents whose value changed (about once a day each). Returns the
+    number of users updated.
+    """
+    result = await users.update_many(
+        {
+            "stats": {"$type": "object"},
+            "created_at": {"$type": "date"},
+            "$expr": {"$ne": ["$stats.account_age_days", ACCOUNT_AGE_EXPRESSION]}
+        },
+        [{"$set": {"stats.account_age_days": ACCOUNT_AGE_EXPRESSION}}]
+    )
+    return result.modified_count
+
+
+class ProfileStatsRefresher:
+    """Runs refresh_account_ages every PROFILE_STATS_REFRESH_INTERVAL seconds"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = settings.PROFILE_STATS_REFRESH_INTERVAL if interval is None else interval
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[str] = None
+        self.last_updated = 0
+
+    async def run(self):
+        while True:
+            db = get_database()
+            if db is not None:
+                try:
+                    self.last_updated = await refresh_account_ages(db.users)
+                    self.last_run = datetime.utcnow().isoformat()
+                    if self.last_updated:
+                        logger.info(f"📅 Refreshed account age for {self.last_updated} users")
+                except Exception as e:
+                    logger.error(f"❌ Account age refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+            logger.info(f"📅 Profile stats refresher started (every {self.interval}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global refresher instance
+profile_stats_refresher = ProfileStatsRefresher()
@@ -0,0 +1,144 @@
+# app/services/spending_rollups.py
+"""
+Per-user monthly spending rollups.
+
+One ``spending_rollups`` document per user and month holds the running
+totals and counts overall and per category. Every batch of transactions
+stored by the TransactionStore is folded in with ``$inc`` upserts, so a
+summary over any range of months reads one small document per month
+instead of every transaction. ``rebuild_rollups`` recomputes them from the
+raw ``transactions`` history.
+
+    {"user_id": ObjectId, "month": "2025-01", "total": 23500.0, "count": 14,
+     "categories": {"Needs": {"total": 18000.0, "count": 6}, ...}, "updated_at": datetime}
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+MONTH_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def month_key(date: datetime) -> str:
+    return f"{date.year:04d}-{date.month:02d}"
+
+
+def shift_month(month: str, months: int) -> str:
+    """``month`` moved by ``months`` (negative: back in time)"""
+    year, number = (int(part) for part in month.split("-"))
+    index = year * 12 + number - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def rollup_operations(transactions: Iterable[Dict[str, Any]]) -> List[UpdateOne]:
+    """One ``$inc`` upsert per user and month covering all the given transactions"""
+    increments: Dict[tuple, Dict[str, Any]] = {}
+    for transaction in transactions:
+        amount = transaction.get("amount") or 0.0
+        category = transaction["category"]
+        inc = increments.setdefault((transaction["user_id"], month_key(transaction["date"])), {})
+        for prefix in ("", f"categories.{category}."):
+            inc[f"{prefix}total"] = inc.get(f"{prefix}total", 0.0) + amount
+            inc[f"{prefix}count"] = inc.get(f"{prefix}count", 0) + 1
+
+    now = datetime.utcnow()
+    return [
+        UpdateOne(
+            {"user_id": user_id, "month": month},
+            {"$inc": inc, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for (user_id, month), inc in increments.items()
+    ]
+
+
+async def apply_rollups(database, transactions: List[Dict[str, Any]]) -> int:
+    """Fold newly stored transactions into their monthly rollups; returns the rollups touched"""
+    operations = rollup_operations(transactions)
+    if not operations:
+        return 0
+    await database.spending_rollups.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+async def summarize(database, user_id: str, start_month: str, end_month: str) -> Dict[str, Any]:
+    """Category totals, counts and distribution for the months ``start_month``..``end_month`` inclusive"""
+    cursor = database.spending_rollups.find(
+        {"user_id": ObjectId(user_id), "month": {"$gte": start_month, "$lte": end_month}},
+        {"_id": 0, "month": 1, "total": 1, "count": 1, "categories": 1}
+    ).sort("month", ASCENDING)
+
+    months = []
+    category_totals: Dict[str, float] = {}
+    category_counts: Dict[str, int] = {}
+    async for rollup in cursor:
+        for category, values in rollup.get("categories", {}).items():
+            category_totals[category] = category_totals.get(category, 0.0) + values.get("total", 0.0)
+            category_counts[category] = category_counts.get(category, 0) + values.get("count", 0)
+        months.append({"month": rollup["month"], "total_amount": rollup.get("total", 0.0), "count": rollup.get("count", 0)})
+
+    total_amount = sum(category_totals.values())
+    return {
+        "start_month": start_month,
+        "end_month": end_month,
+        "months": months,
+        "transaction_count": sum(category_counts.values()),
+        "total_amount": total_amount,
+        "category_totals": category_totals,
+        "category_counts": category_counts,
+        "category_distribution": {
+            category: round(amount / total_amount * 100, 2) if total_amount > 0 else 0.0
+            for category, amount in category_totals.items()
+        },
+        "top_category": max(category_totals, key=category_totals.get) if category_totals else None
+    }
+
+
+async def rebuild_rollups(database, user_id: Optional[str] = None) -> int:
+    """
+    Recompute the rollups of one user (or everyone) from the transactions collection
+
+    The old rollups are deleted and the aggregation's result is merged in.
+    Transactions stored while the rebuild runs may be counted twice or not
+    at all, so run it while categorization traffic is low. Returns the
+    number of rollups written.
+    """
+    scope = {"user_id": ObjectId(user_id)} if user_id else {}
+    await database.spending_rollups.delete_many(scope)
+
+    pipeline = [
+        {"$match": scope},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "month": {"$dateToString": {"format": "%Y-%m", "date": "$date"}},
+                "category": "$category"
+            },
+            "total": {"$sum": {"$ifNull": ["$amount", 0]}},
+            "count": {"$sum": 1}
+        }},
+        {"$group": {
+            "_id": {"user_id": "$_id.user_id", "month": "$_id.month"},
+            "total": {"$sum": "$total"},
+            "count": {"$sum": "$count"},
+            "categories": {"$push": {"k": "$_id.category", "v": {"total": "$total", "count": "$count"}}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "month": "$_id.month",
+            "total": 1,
+            "count": 1,
+            "categories": {"$arrayToObject": "$categories"},
+            "updated_at": "$$NOW"
+        }},
+        {"$merge": {"into": "spending_rollups", "on": ["user_id", "month"], "whenMatched": "replace"}}
+    ]
+    await database.transactions.aggregate(pipeline).to_list(length=None)
+    return await database.spending_rollups.count_documents(scope)
@@ -0,0 +1,241 @@
+# app/services/training_jobs.py
+import asyncio
+import logging
+import multiprocessing
+import queue
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from joblib import load
+
+from app.core.config import settings
+from app.models.ml_models.investment_recommender import investment_recommender
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingJobInProgress(Exception):
+    """Raised when a training job is submitted while another one is still active"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Training job {job_id} is still in progress")
+        self.job_id = job_id
+
+
+def run_investment_training(job_id: str, progress_queue, num_samples: int) -> Dict[str, Any]:
+    """
+    Train the investment model in a worker process.
+
+    Builds its own recommender (without loading the current model), reports
+    progress through ``progress_queue`` and writes the result to the model
+    files atomically. Returns the new model's metadata.
+    """
+    from app.models.ml_models.investment_recommender import AdvancedInvestmentRecommender
+
+    def report(stage: str, fraction: float):
+        progress_queue.put((job_id, stage, fraction, time.time()))
+
+    report("starting", 0.0)
+    recommender = AdvancedInvestmentRecommender(load_existing=False)
+    model, metadata = recommender.fit_model(num_samples, progress=report)
+
+    report("saving", 0.9)
+    save_start = time.perf_counter()
+    recommender.write_model_files(model, metadata)
+    metadata['timings']['save_ms'] = round((time.perf_counter() - save_start) * 1000, 2)
+
+    return metadata
+
+
+class TrainingJobManager:
+    """
+    Runs investment model training in a separate process.
+
+    ``submit`` returns a job id immediately; the job is fitted in a spawned
+    worker, which writes the new model files, and the model is then loaded
+    and swapped into the live recommender from this process. Only one job is
+    active at a time. Job state is kept in memory for the last
+    ``history`` jobs.
+    """
+
+    TERMINAL_STATUSES = ("completed", "failed")
+
+    def __init__(self, history: Optional[int] = None, poll_interval: float = 0.5):
+        self.history = max(1, history or settings.TRAINING_JOB_HISTORY)
+        self.poll_interval = poll_interval
+
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._active_job_id: Optional[str] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress_queue = None
+        self._tasks = set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._progress_queue = self._manager.Queue()
+            # A fresh process per job so the dataset and forest are freed afterwards
+            self._pool = ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1)
+            logger.info("🧵 Training worker pool started")
+        return self._pool
+
+    def submit(self, num_samples: Optional[int] = None) -> Dict[str, Any]:
+        """Queue a training run and return its job record"""
+        if self._active_job_id is not None:
+            raise TrainingJobInProgress(self._active_job_id)
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0.0,
+            "submitted_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "metrics": None,
+            "timings": None,
+            "error": None,
+            "_submitted": time.time(),
+            "_started": None
+        }
+        self.jobs[job_id] = job
+        self._active_job_id = job_id
+        self._trim_history()
+
+        try:
+            pool = self._get_pool()
+            future = pool.submit(
+                run_investment_training, job_id, self._progress_queue,
+                num_samples or settings.INVESTMENT_TRAINING_SAMPLES
+            )
+        except Exception as e:
+            self._finish(job, error=str(e))
+            raise
+
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(self._watch(job, asyncio.wrap_future(future)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        logger.info(f"🔄 Investment model training job {job_id} queued")
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public view of a job record, or ``None`` if it is unknown"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if not key.startswith("_")}
+
+    def _trim_history(self):
+        while len(self.jobs) > self.history:
+            oldest_id = next(iter(self.jobs))
+            if oldest_id == self._active_job_id:
+                break
+            self.jobs.popitem(last=False)
+
+    def _drain_progress(self):
+        """Apply every progress update the worker has reported so far"""
+        while True:
+            try:
+                job_id, stage, fraction, reported_at = self._progress_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] in self.TERMINAL_STATUSES:
+                continue
+            if job["status"] == "queued":
+                job["status"] = "running"
+                job["started_at"] = datetime.fromtimestamp(reported_at).isoformat()
+                job["_started"] = reported_at
+            job["stage"] = stage
+            job["progress"] = max(job["progress"], fraction)
+
+    async def _watch(self, job: Dict[str, Any], future: asyncio.Future):
+        """Track a job until its worker returns, then swap the new model in"""
+        while not future.done():
+            await asyncio.wait({future}, timeout=self.poll_interval)
+            try:
+                await asyncio.to_thread(self._drain_progress)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not read training progress: {e}")
+
+        try:
+            metadata = future.result()
+        except Exception as e:
+            logger.error(f"❌ Training job {job['job_id']} failed: {str(e)}")
+            self._finish(job, error=str(e))
+            return
+
+        job["stage"] = "loading"
+        job["progress"] = max(job["progress"], 0.95)
+        try:
+            # Loading the pickle and compiling it (and rebuilding the allocation
+            # grid) take a while; the swap itself is a reference assignment
+            load_start = time.perf_counter()
+            model = await asyncio.to_thread(load, investment_recommender.model_path)
+            await asyncio.to_thread(investment_recommender.install_model, model, metadata)
+            load_ms = round((time.perf_counter() - load_start) * 1000, 2)
+        except Exception as e:
+            logger.error(f"❌ Could not load model from training job {job['job_id']}: {str(e)}")
+            self._finish(job, error=f"Trained model could not be loaded: {e}")
+            return
+
+        job["metrics"] = {
+            key: metadata.get(key)
+            for key in ("train_score", "test_score", "training_samples", "feature_count", "target_count")
+        }
+        grid = investment_recommender.allocation_grid
+        job["metrics"]["allocation_grid"] = grid.info() if grid is not None else None
+        self._finish(job, timings={**metadata.get("timings", {}), "load_ms": load_ms})
+        logger.info(
+            f"✅ Training job {job['job_id']} completed, new investment model is live "
+            f"(test R² {metadata.get('test_score', 0):.3f})"
+        )
+
+    def _finish(self, job: Dict[str, Any], timings: Optional[Dict[str, float]] = None, error: Optional[str] = None):
+        finished = time.time()
+        job["status"] = "failed" if error else "completed"
+        job["stage"] = job["status"]
+        if not error:
+            job["progress"] = 1.0
+        job["error"] = error
+        job["finished_at"] = datetime.fromtimestamp(finished).isoformat()
+
+        started = job["_started"] or finished
+        job["timings"] = {
+            **(timings or {}),
+            "queue_wait_ms": round((started - job["_submitted"]) * 1000, 2),
+            "total_ms": round((finished - job["_submitted"]) * 1000, 2)
+        }
+
+        if self._active_job_id == job["job_id"]:
+            self._active_job_id = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_job_id": self._active_job_id,
+            "tracked_jobs": len(self.jobs)
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self._progress_queue = None
+            logger.info("🛑 Training worker pool stopped")
+
+
+# Global training job manager
+training_job_manager = TrainingJobManager()
@@ -0,0 +1,167 @@
+# app/services/transaction_store.py
+"""
+Categorized transactions persisted per user.
+
+Authenticated batch and streaming categorizations are recorded in the
+``transactions`` collection (a time-series collection keyed by ``user_id``
+and ``date``, see app/core/indexes.py) so the history can be read
+server-side instead of being re-uploaded. Writes go through a
+BufferedWriter: the request never waits for MongoDB, and documents are
+inserted with unordered ``insert_many`` in batches of
+TRANSACTION_WRITE_BATCH_SIZE or every TRANSACTION_WRITE_MAX_WAIT_MS.
+Each inserted batch is also folded into the per-user monthly spending
+rollups (app/services/spending_rollups.py) that summaries are read from.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import DESCENDING
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.services.spending_rollups import apply_rollups, month_key, shift_month, summarize
+from app.utils.batching import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+# Fields returned by history reads
+TRANSACTION_PROJECTION = {
+    "_id": 0, "date": 1, "description": 1, "amount": 1,
+    "category": 1, "confidence": 1, "method": 1, "source": 1
+}
+
+
+class TransactionStore:
+    def __init__(self):
+        self.writer = BufferedWriter(
+            self._insert,
+            max_size=settings.TRANSACTION_WRITE_BATCH_SIZE,
+            max_wait_ms=settings.TRANSACTION_WRITE_MAX_WAIT_MS,
+            max_buffer=settings.TRANSACTION_WRITE_MAX_BUFFER
+        )
+
+    def record(
+        self,
+        user_id: str,
+        results: List[Dict[str, Any]],
+        dates: List[Optional[datetime]],
+        source: str
+    ) -> int:
+        """
+        Queue categorization results for insertion; returns the number queued
+
+        ``dates`` holds the transaction date of each result (None: categorized
+        now). Results that carry an error, such as unparseable statement rows,
+        are not stored.
+        """
+        if not settings.TRANSACTION_STORE_ENABLED:
+            return 0
+
+        owner = ObjectId(user_id)
+        categorized_at = datetime.utcnow()
+        documents = [
+            {
+                "user_id": owner,
+                "date": self._utc(date) if date else categorized_at,
+                "description": result["description"],
+                "amount": result.get("amount"),
+                "category": result["category"],
+                "confidence": result["confidence"],
+                "method": result["method"],
+                "source": source,
+                "categorized_at": categorized_at
+            }
+            for result, date in zip(results, dates)
+            if not result.get("error")
+        ]
+        if documents:
+            self.writer.add(documents)
+        return len(documents)
+
+    @staticmethod
+    def _utc(date: datetime) -> datetime:
+        """Naive UTC, as stored by MongoDB, so month boundaries match the server's"""
+        if date.tzinfo is not None:
+            return date.astimezone(timezone.utc).replace(tzinfo=None)
+        return date
+
+    async def _insert(self, documents: List[Dict[str, Any]]):
+        database = get_database()
+        if database is None:
+            raise RuntimeError("Database not connected")
+        inserted = documents
+        try:
+            await database.transactions.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: the other documents of the batch were inserted
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            inserted = [document for i, document in enumerate(documents) if i not in failed]
+            logger.error(f"❌ {len(failed)} of {len(documents)} transactions not stored: {e}")
+        try:
+            await apply_rollups(database, inserted)
+        except Exception as e:
+            # The transactions are stored; scripts/rebuild_spending_rollups.py brings the rollups back in line
+            logger.error(f"❌ Spending rollups not updated for {len(inserted)} transactions: {e}")
+
+    async def find(
+        self,
+        user_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """A user's transactions in [start, end), newest first"""
+        database = get_database()
+        if database is None:
+            raise RuntimeError("Database not connected")
+
+        query: Dict[str, Any] = {"user_id": ObjectId(user_id)}
+        date_range = {}
+        if start is not None:
+            date_range["$gte"] = start
+        if end is not None:
+            date_range["$lt"] = end
+        if date_range:
+            query["date"] = date_range
+        if category:
+            query["category"] = category
+
+        cursor = database.transactions.find(query, TRANSACTION_PROJECTION).sort("date", DESCENDING).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def summary(self, user_id: str, start_month: str, end_month: str) -> Dict[str, Any]:
+        """Spending totals for the months start_month..end_month (YYYY-MM, inclusive)"""
+        database = get_database()
+        if database is None:
+            raise RuntimeError("Database not connected")
+        return await summarize(database, user_id, start_month, end_month)
+
+    async def monthly_spending(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Average monthly spending per category over the last CHAT_HISTORY_MONTHS months
+
+        Returned as one transaction-shaped entry per category, which is what
+        the chatbot's financial analysis sums; months without any stored
+        transaction are not counted in the average.
+        """
+        end_month = month_key(datetime.utcnow())
+        summary = await self.summary(user_id, shift_month(end_month, 1 - settings.CHAT_HISTORY_MONTHS), end_month)
+        months = max(1, len(summary["months"]))
+        return [
+            {"description": f"{category} (monthly average)", "amount": round(total / months, 2), "category": category}
+            for category, total in summary["category_totals"].items()
+        ]
+
+    async def flush(self):
+        await self.writer.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": settings.TRANSACTION_STORE_ENABLED, **self.writer.stats()}
+
+
+# Global store instance
+transaction_store = TransactionStore()
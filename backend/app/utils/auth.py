@@ -1,13 +1,22 @@
 # app/utils/auth.py
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.utils.cache import TTLCache
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Decoded payloads of tokens whose signature was already checked, keyed by token digest
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+# Callables taking a decoded payload and returning True if the token must be rejected
+revocation_checks: List[Callable[[dict], bool]] = []
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -24,7 +33,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire, "type": "access"})
+    # Fractional issue time, so it can be compared with user writes in the same second
+    to_encode.update({"exp": expire, "iat": time.time(), "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -37,16 +47,42 @@ def create_refresh_token(data: dict) -> str:
     return encoded_jwt
 
 def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
-    """Verify and decode token"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        
-        if payload.get("type") != token_type:
+    """
+    Verify and decode token.
+
+    Verified payloads are cached for repeated requests with the same token,
+    until TOKEN_CACHE_TTL or the token's ``exp`` (whichever is sooner).
+    Revocation checks run on every call, cached or not.
+    """
+    key = _token_digest(token)
+    payload = token_cache.get(key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
             return None
-            
-        return payload
-    except JWTError:
+        
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            token_cache.set(key, payload, ttl=min(remaining, settings.TOKEN_CACHE_TTL))
+    
+    if payload.get("type") != token_type:
         return None
+    if any(check(payload) for check in revocation_checks):
+        return None
+    
+    return dict(payload)
+
+def add_revocation_check(check: Callable[[dict], bool]):
+    """Register a check that can reject otherwise valid tokens (e.g. a sign-out list)"""
+    revocation_checks.append(check)
+
+def forget_token(token: str):
+    """Drop a token from the verified-token cache"""
+    token_cache.pop(_token_digest(token))
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
@@ -0,0 +1,184 @@
+# app/utils/batching.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into one batched call.
+
+    ``submit`` parks the caller until its item has been processed. A batch is
+    dispatched once ``max_size`` items are waiting or ``max_wait_ms`` after the
+    first item arrived, whichever comes first. ``handler`` receives the list of
+    items and must return one result per item, in order; if it raises, every
+    caller in that batch gets the exception.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int,
+        max_wait_ms: float
+    ):
+        self.handler = handler
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.error(f"❌ Micro-batch of {len(batch)} items failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled (client went away)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "largest_batch": self.largest_batch,
+            "average_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+
+class BufferedWriter:
+    """
+    Buffers items and hands them to ``handler`` in batches, without callers waiting.
+
+    ``add`` returns immediately. The buffer is flushed once ``max_size`` items
+    are waiting or ``max_wait_ms`` after the first item arrived, and by
+    ``flush()`` on shutdown. Failed batches are logged and dropped; once more
+    than ``max_buffer`` items are waiting (the handler is slow or failing),
+    new items are dropped and counted instead of growing the buffer.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[Any]],
+        max_size: int,
+        max_wait_ms: float,
+        max_buffer: int
+    ):
+        self.handler = handler
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_buffer = max(self.max_size, max_buffer)
+
+        self._buffer: List[Any] = []
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def add(self, items: List[Any]):
+        room = self.max_buffer - len(self._buffer) - self._in_flight
+        if room < len(items):
+            self.dropped += len(items) - max(0, room)
+            logger.warning(f"⚠️ Write buffer full, dropped {len(items) - max(0, room)} items")
+            items = items[:max(0, room)]
+        if not items:
+            return
+
+        self._buffer.extend(items)
+        if len(self._buffer) >= self.max_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._dispatch)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._buffer:
+            batch, self._buffer = self._buffer[:self.max_size], self._buffer[self.max_size:]
+            self._in_flight += len(batch)
+            # Keep a reference so the task is not garbage collected mid-flight
+            task = asyncio.get_running_loop().create_task(self._write(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, batch: List[Any]):
+        try:
+            await self.handler(batch)
+            self.batches += 1
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"❌ Buffered write of {len(batch)} items failed: {str(e)}")
+        finally:
+            self._in_flight -= len(batch)
+
+    async def flush(self):
+        """Write everything buffered and wait for the writes in flight"""
+        self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "buffered": len(self._buffer),
+            "in_flight": self._in_flight,
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
@@ -33,8 +33,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Fetch user from database
-    user = await auth_service.get_user_by_id(user_id)
+    # Recently issued tokens carry the user; otherwise use the user cache / database
+    user = auth_service.user_from_claims(payload) or await auth_service.get_user_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,130 @@
+# app/utils/health_monitor.py
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamHealthMonitor:
+    """
+    Tracks the health of an upstream API from the outcomes of real calls.
+
+    Callers report each request with ``record_success`` / ``record_failure``;
+    ``snapshot`` summarizes the calls from the last ``window_seconds`` without
+    touching the network. When ``run`` is active and no call has been seen for
+    ``idle_probe_seconds``, the optional ``probe`` coroutine is awaited so the
+    state does not go stale on quiet instances.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        probe: Optional[Callable[[], Awaitable[Any]]] = None,
+        window_seconds: float = 300,
+        idle_probe_seconds: float = 60,
+        max_samples: int = 1000
+    ):
+        self.name = name
+        self.probe = probe
+        self.window_seconds = window_seconds
+        self.idle_probe_seconds = idle_probe_seconds
+
+        # (monotonic time, success, latency_ms)
+        self._samples: deque = deque(maxlen=max_samples)
+        self._last_activity = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[str] = None
+        self.last_success_at: Optional[str] = None
+        self.probe_count = 0
+
+    def record_success(self, latency_ms: Optional[float] = None):
+        self._samples.append((time.monotonic(), True, latency_ms))
+        self._last_activity = time.monotonic()
+        self.last_success_at = datetime.now().isoformat()
+
+    def record_failure(self, error: str, latency_ms: Optional[float] = None):
+        self._samples.append((time.monotonic(), False, latency_ms))
+        self._last_activity = time.monotonic()
+        self.last_error = error
+        self.last_error_at = datetime.now().isoformat()
+
+    @staticmethod
+    def _percentile(values, fraction: float) -> Optional[float]:
+        """Nearest-rank percentile of a sorted list"""
+        if not values:
+            return None
+        rank = max(1, math.ceil(fraction * len(values)))
+        return round(values[rank - 1], 2)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current health summary computed from recorded calls only"""
+        cutoff = time.monotonic() - self.window_seconds
+        recent = [sample for sample in self._samples if sample[0] >= cutoff]
+        successes = sum(1 for _, ok, _ in recent if ok)
+        latencies = sorted(latency for _, ok, latency in recent if ok and latency is not None)
+
+        if not recent:
+            status = "unknown"
+            success_rate = None
+        else:
+            success_rate = successes / len(recent)
+            if success_rate >= 0.9:
+                status = "available"
+            elif success_rate >= 0.5:
+                status = "degraded"
+            else:
+                status = "unavailable"
+
+        return {
+            "name": self.name,
+            "status": status,
+            "window_seconds": self.window_seconds,
+            "requests": len(recent),
+            "success_rate": round(success_rate, 4) if success_rate is not None else None,
+            "latency_p50_ms": self._percentile(latencies, 0.50),
+            "latency_p95_ms": self._percentile(latencies, 0.95),
+            "last_success_at": self.last_success_at,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at,
+            "active_probes": self.probe_count
+        }
+
+    async def _probe_once(self):
+        # Probes count towards availability but not latency: they are far
+        # cheaper than real calls and would drag the percentiles down
+        self.probe_count += 1
+        try:
+            await self.probe()
+            self.record_success()
+        except Exception as e:
+            self.record_failure(f"probe failed: {e}")
+            logger.warning(f"⚠️ {self.name} health probe failed: {e}")
+
+    async def run(self):
+        """Probe the upstream whenever real traffic has been idle for too long"""
+        check_interval = max(1.0, self.idle_probe_seconds / 4)
+        while True:
+            if time.monotonic() - self._last_activity >= self.idle_probe_seconds:
+                await self._probe_once()
+            await asyncio.sleep(check_interval)
+
+    def start(self):
+        if self.probe is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+            logger.info(f"🩺 {self.name} health monitor started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
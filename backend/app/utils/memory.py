@@ -0,0 +1,42 @@
+# app/utils/memory.py
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Fields of /proc/<pid>/smaps_rollup reported by read_memory_usage
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+_SMAPS_LINE = re.compile(r"^(\w+):\s+(\d+) kB", re.MULTILINE)
+
+
+def read_memory_usage(pid: Union[int, str] = "self") -> Optional[Dict[str, float]]:
+    """
+    Memory of one process in MB, from ``/proc/<pid>/smaps_rollup``.
+
+    ``Pss`` divides every shared page between the processes mapping it, so
+    the Pss of all workers adds up to their real footprint while their Rss
+    counts shared pages once per worker. Returns ``None`` where smaps_rollup
+    is not available (non-Linux, or kernels before 4.14).
+    """
+    try:
+        content = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return None
+
+    values = {name: int(kb) for name, kb in _SMAPS_LINE.findall(content)}
+    usage = {f"{field.lower()}_mb": round(values.get(field, 0) / 1024, 2) for field in SMAPS_FIELDS}
+    usage["shared_mb"] = round(usage["shared_clean_mb"] + usage["shared_dirty_mb"], 2)
+    usage["private_mb"] = round(usage["private_clean_mb"] + usage["private_dirty_mb"], 2)
+    return usage
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process (Linux only)"""
+    children = []
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            children.extend(int(child) for child in (task / "children").read_text().split())
+        except OSError:
+            continue
+    return sorted(set(children))
+
@@ -0,0 +1,71 @@
+# app/utils/model_loading.py
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelInitializer:
+    """
+    Runs a model's one-time load (or initial training) exactly once.
+
+    ``load`` returns whether a usable model is available afterwards. The
+    first ``ensure_loaded`` call runs it; concurrent callers wait on the
+    same lock and later calls return straight away. ``status`` reports
+    ``pending``, ``loading``, ``ready`` or ``failed`` for health checks, so
+    the load can run in the background while the server is already up.
+    """
+
+    def __init__(self, name: str, load: Callable[[], bool]):
+        self.name = name
+        self._load = load
+        self._lock = threading.Lock()
+
+        self.state = "pending"
+        self.started_at: Optional[str] = None
+        self.load_time_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("ready", "failed")
+
+    @property
+    def loading(self) -> bool:
+        """True until the first load attempt has finished"""
+        return not self.done
+
+    def ensure_loaded(self) -> bool:
+        """Load the model if that has not happened yet; True if it is usable"""
+        if not self.done:
+            with self._lock:
+                if not self.done:
+                    self._run()
+        return self.state == "ready"
+
+    def _run(self):
+        self.state = "loading"
+        self.started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        try:
+            ok = bool(self._load())
+        except Exception as e:
+            ok = False
+            self.error = str(e)
+            logger.error(f"❌ {self.name} initialization failed: {str(e)}")
+
+        self.load_time_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.state = "ready" if ok else "failed"
+        if ok:
+            logger.info(f"✅ {self.name} ready in {self.load_time_ms:.0f}ms")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "started_at": self.started_at,
+            "load_time_ms": self.load_time_ms,
+            "error": self.error
+        }
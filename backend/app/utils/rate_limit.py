@@ -0,0 +1,341 @@
+# app/utils/rate_limit.py
+"""
+Request rate limiting with token buckets.
+
+Every client (API key, else authenticated user, else IP address) gets a
+bucket of RATE_LIMIT_REQUESTS tokens that refills over RATE_LIMIT_WINDOW
+seconds. A request spends its route's cost from RATE_LIMIT_ROUTE_COSTS,
+keyed by method and path prefix such as "POST /api/v1/investment/train"
+(1 by default), and is answered with 429 and Retry-After when the bucket
+cannot cover it.
+
+Buckets live in a backend: ``MemoryRateLimitBackend`` keeps them in the
+process (each worker limits on its own), ``MongoRateLimitBackend`` keeps
+them in the ``rate_limits`` collection so all workers share one limit.
+A backend only has to implement ``consume``.
+"""
+import hashlib
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.utils.auth import verify_token
+
+logger = logging.getLogger(__name__)
+
+# (allowed, tokens left, seconds until the request would be allowed)
+Decision = Tuple[bool, float, float]
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets"""
+
+    name = "base"
+
+    @abstractmethod
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Decision:
+        """Take ``cost`` tokens from ``key``'s bucket if it holds enough"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in a dict, two floats per tracked key.
+
+    Buckets that have refilled completely carry no state, so a sweep every
+    ``evict_interval`` seconds drops them; beyond ``max_keys`` the least
+    recently used bucket is dropped (that client starts again with a full
+    bucket).
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int, evict_interval: float):
+        self.max_keys = max(1, max_keys)
+        self.evict_interval = evict_interval
+        self._buckets: Dict[str, list] = {}  # key -> [tokens, updated_at], oldest access first
+        self._next_sweep = time.monotonic() + evict_interval
+
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Decision:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._evict_idle(now, capacity, refill_rate)
+
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            bucket = [capacity, now]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+            bucket[1] = now
+        # Re-inserted last, so the dict stays in least-recently-used order
+        self._buckets[key] = bucket
+        if len(self._buckets) > self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+            self.evicted_lru += 1
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return True, bucket[0], 0.0
+        return False, bucket[0], (cost - bucket[0]) / refill_rate
+
+    def _evict_idle(self, now: float, capacity: float, refill_rate: float):
+        refill_time = capacity / refill_rate
+        idle = [key for key, (_, updated_at) in self._buckets.items() if now - updated_at >= refill_time]
+        for key in idle:
+            del self._buckets[key]
+        self.evicted_idle += len(idle)
+        self._next_sweep = now + self.evict_interval
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru
+        }
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in a MongoDB collection, shared by every worker and instance.
+
+    Each request is one atomic ``find_one_and_update`` with a pipeline
+    update, refilled against the server clock ($$NOW) so worker clocks do
+    not matter. ``expires_at`` is set to when the bucket would be full
+    again; the TTL index on it removes idle buckets.
+    """
+
+    name = "mongodb"
+
+    def __init__(self, get_database: Callable[[], Any], collection: str = "rate_limits"):
+        self.get_database = get_database
+        self.collection = collection
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Decision:
+        database = self.get_database()
+        if database is None:
+            raise RuntimeError("Database not connected")
+
+        refilled = {"$cond": [
+            {"$eq": [{"$type": "$tokens"}, "missing"]},
+            capacity,
+            {"$min": [
+                capacity,
+                {"$add": [
+                    "$tokens",
+                    {"$multiply": [{"$divide": [{"$subtract": ["$$NOW", "$updated_at"]}, 1000]}, refill_rate]}
+                ]}
+            ]}
+        ]}
+        bucket = await database[self.collection].find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", cost]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", cost]}, {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    "updated_at": "$$NOW"
+                }},
+                {"$set": {
+                    "expires_at": {"$add": [
+                        "$$NOW",
+                        {"$multiply": [{"$divide": [{"$subtract": [capacity, "$tokens"]}, refill_rate]}, 1000]}
+                    ]}
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        tokens = bucket["tokens"]
+        if bucket["allowed"]:
+            return True, tokens, 0.0
+        return False, tokens, (cost - tokens) / refill_rate
+
+
+class RateLimiter:
+    """Picks the client key and route cost of a request and asks the backend"""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        requests: int,
+        window: float,
+        route_costs: Dict[str, int],
+        exempt_paths,
+        api_key_header: str,
+        api_keys,
+        trust_forwarded: bool
+    ):
+        self.backend = backend
+        self.capacity = float(requests)
+        self.refill_rate = requests / window
+        # (method, path prefix, cost), longest prefix first so /chat/stream can
+        # cost differently from /chat
+        self.route_costs = sorted(
+            (self._parse_route(route) + (cost,) for route, cost in route_costs.items()),
+            key=lambda item: len(item[1]),
+            reverse=True
+        )
+        self.exempt_paths = tuple(exempt_paths)
+        self.api_key_header = api_key_header
+        self.api_keys = {hashlib.sha256(api_key.encode()).hexdigest() for api_key in api_keys}
+        self.trust_forwarded = trust_forwarded
+
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    @staticmethod
+    def _parse_route(route: str) -> Tuple[str, str]:
+        """Split a "POST /api/v1/..." route cost key into method and path prefix"""
+        method, _, prefix = route.strip().partition(" ")
+        if not prefix.strip().startswith("/"):
+            raise ValueError(f"Rate limit route {route!r} must be '<METHOD> <path prefix>'")
+        return method.upper(), prefix.strip()
+
+    def cost(self, method: str, path: str) -> float:
+        for route_method, prefix, cost in self.route_costs:
+            if method == route_method and path.startswith(prefix):
+                # A cost above the bucket size could never be paid
+                return min(cost, self.capacity)
+        return 1
+
+    def client_key(self, headers: Headers, client_host: Optional[str]) -> str:
+        """
+        Configured API key, else the user of a valid bearer token, else the client IP
+
+        Unknown API keys are ignored, otherwise a client could get a fresh
+        bucket per request by sending random keys.
+        """
+        api_key = headers.get(self.api_key_header)
+        if api_key:
+            digest = hashlib.sha256(api_key.encode()).hexdigest()
+            if digest in self.api_keys:
+                return "key:" + digest[:32]
+
+        authorization = headers.get("authorization", "")
+        if authorization[:7].lower() == "bearer ":
+            payload = verify_token(authorization[7:].strip())
+            if payload and payload.get("sub"):
+                return "user:" + payload["sub"]
+
+        if self.trust_forwarded and headers.get("x-forwarded-for"):
+            return "ip:" + headers["x-forwarded-for"].split(",")[0].strip()
+        return "ip:" + (client_host or "unknown")
+
+    async def check(self, key: str, cost: float) -> Decision:
+        """Backend decision; requests are let through when the backend fails"""
+        try:
+            decision = await self.backend.consume(key, cost, self.capacity, self.refill_rate)
+        except Exception as e:
+            self.errors += 1
+            if self.errors == 1 or self.errors % 1000 == 0:
+                logger.error(f"❌ Rate limit backend error ({self.errors} so far), allowing requests: {e}")
+            return True, self.capacity, 0.0
+
+        if decision[0]:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "requests": int(self.capacity),
+            "window_seconds": round(self.capacity / self.refill_rate, 2),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "backend_errors": self.errors,
+            **self.backend.stats()
+        }
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying a RateLimiter to every HTTP request.
+
+    Written against ASGI directly rather than as an ``http`` middleware so
+    streamed uploads and responses pass through untouched. Adds
+    X-RateLimit-Limit / X-RateLimit-Remaining to answered requests.
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(self.limiter.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        client = scope.get("client")
+        key = self.limiter.client_key(headers, client[0] if client else None)
+        allowed, remaining, retry_after = await self.limiter.check(key, self.limiter.cost(scope["method"], scope["path"]))
+        limit_headers = {
+            "X-RateLimit-Limit": str(int(self.limiter.capacity)),
+            "X-RateLimit-Remaining": str(int(remaining))
+        }
+
+        if not allowed:
+            retry_seconds = max(1, math.ceil(retry_after))
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "success": False,
+                    "error": "Too Many Requests",
+                    "message": f"Rate limit exceeded, retry in {retry_seconds}s",
+                    "retry_after": retry_seconds
+                },
+                headers={"Retry-After": str(retry_seconds), **limit_headers}
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (name.lower().encode(), value.encode()) for name, value in limit_headers.items()
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def create_rate_limiter() -> RateLimiter:
+    """RateLimiter configured from the settings"""
+    if settings.RATE_LIMIT_BACKEND == "mongodb":
+        from app.core.database import db
+        # db.database directly: get_database() logs every call while disconnected
+        backend = MongoRateLimitBackend(lambda: db.database)
+    else:
+        backend = MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS, settings.RATE_LIMIT_EVICT_INTERVAL)
+
+    return RateLimiter(
+        backend,
+        requests=settings.RATE_LIMIT_REQUESTS,
+        window=settings.RATE_LIMIT_WINDOW,
+        route_costs=settings.RATE_LIMIT_ROUTE_COSTS,
+        exempt_paths=settings.RATE_LIMIT_EXEMPT_PATHS,
+        api_key_header=settings.RATE_LIMIT_API_KEY_HEADER,
+        api_keys=settings.RATE_LIMIT_API_KEYS,
+        trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED
+    )
+
+
+# Global limiter instance
+rate_limiter = create_rate_limiter()
@@ -21,8 +21,15 @@ def main():
     print(f"🌐 Server: http://{settings.API_HOST}:{settings.API_PORT}")
     print(f"📚 Docs: http://{settings.API_HOST}:{settings.API_PORT}/docs")
     print(f"🔧 Debug Mode: {settings.API_DEBUG}")
+    if settings.PREFORK_WORKERS > 0:
+        print(f"👥 Pre-forked workers: {settings.PREFORK_WORKERS} (models shared, no reload)")
     print("=" * 50)
     
+    if settings.PREFORK_WORKERS > 0:
+        from app.core.prefork import serve_preforked
+        serve_preforked()
+        return
+    
     uvicorn.run(
         "app.main:app",
         host=settings.API_HOST,
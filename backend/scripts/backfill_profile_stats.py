@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Backfill the stored profile stats of existing users
+
+Usage:
+    python scripts/backfill_profile_stats.py [--all] [--batch-size 1000] [--refresh-ages]
+
+Computes the stats that signup and profile updates now store on the user
+document, for every user that has none yet (or, with --all, recomputes
+them for everyone, e.g. after the scoring rules changed) and writes them
+with unordered bulk updates. --refresh-ages also runs the account age
+refresh the API performs every PROFILE_STATS_REFRESH_INTERVAL seconds.
+Connects with MONGODB_URL / DATABASE_NAME from the settings.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.services.profile_stats import backfill_profile_stats, refresh_account_ages
+
+
+async def run(args):
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=5000)
+    users = client[settings.DATABASE_NAME].users
+    try:
+        start = time.perf_counter()
+        written = await backfill_profile_stats(users, only_missing=not args.all, batch_size=args.batch_size)
+        print(f"Stored stats for {written:,} users in {time.perf_counter() - start:.1f}s")
+
+        if args.refresh_ages:
+            start = time.perf_counter()
+            refreshed = await refresh_account_ages(users)
+            print(f"Refreshed account age for {refreshed:,} users in {time.perf_counter() - start:.1f}s")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--all", action="store_true", help="recompute stats for every user, not only missing ones")
+    parser.add_argument("--batch-size", type=int, default=1000, help="updates per bulk write")
+    parser.add_argument("--refresh-ages", action="store_true", help="also advance stored account ages")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
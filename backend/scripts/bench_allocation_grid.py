@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: precomputed allocation grid vs model inference for investment allocation
+
+Usage:
+    python scripts/bench_allocation_grid.py [--samples 20000] [--repeat 500]
+
+Builds the grid for the current investment model, reports its size, build
+time and error against the model on fresh synthetic profiles (whole-year
+ages, as the API accepts), then compares single-row and batch latency of
+grid lookups with the compiled forest and the sklearn pipeline.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.models.ml_models.investment_recommender import investment_recommender
+
+
+def latency_ms(fn, repeat: int) -> tuple:
+    """p50 and p95 of ``fn()`` in milliseconds"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20_000, help="profiles for the error check")
+    parser.add_argument("--repeat", type=int, default=500, help="timed calls per single-row measurement")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    args = parser.parse_args()
+
+    recommender = investment_recommender
+    model, compiled = recommender.model, recommender.compiled_model
+    if model is None:
+        sys.exit("No investment model available; train one first")
+
+    settings.INVESTMENT_GRID_ENABLED = True
+    start = time.perf_counter()
+    grid = recommender._build_allocation_grid(model, compiled)
+    build_ms = (time.perf_counter() - start) * 1000
+    if grid is None:
+        sys.exit("Allocation grid could not be built or was rejected; see the log above")
+    info = grid.info()
+    print(f"built in {build_ms:.0f} ms: {info['cells']:,} cells, {info['memory_mb']} MB, axes {info['axes']}")
+
+    columns = list(model.named_steps["preprocessor"].feature_names_in_)
+    data = recommender.create_advanced_dataset(args.samples, seed=99)
+    data["age"] = data["age"].round()
+    data["age_factor"] = (65 - data["age"]) / 65
+    data = data[columns]
+
+    expected = recommender._predict_with(model, compiled, data)
+    approx, covered = grid.lookup(data)
+    errors = np.abs(approx - expected).max(axis=1)
+    print(f"\nerror vs model over {int(covered.sum())} profiles (largest per-asset difference)")
+    for label, value in [("p50", np.median(errors)), ("p95", np.percentile(errors, 95)),
+                         ("p99", np.percentile(errors, 99)), ("max", errors.max())]:
+        print(f"{label:>6} {value:.5f}")
+    print(f"tolerance (p99) {settings.INVESTMENT_GRID_TOLERANCE}")
+
+    engines = {"grid": lambda rows: grid.lookup(rows)[0]}
+    if compiled is not None:
+        engines["compiled"] = compiled.predict
+    engines["sklearn"] = model.predict
+
+    print("\nsingle row (ms)")
+    row = {name: [value] for name, value in data.iloc[0].items()}
+    row_frame = data.iloc[:1]
+    print(f"{'':>10} {'p50':>8} {'p95':>8}")
+    for name, predict in engines.items():
+        p50, p95 = latency_ms(lambda: predict(row_frame if name == "sklearn" else row), args.repeat)
+        print(f"{name:>10} {p50:>8.3f} {p95:>8.3f}")
+
+    print("\nbatches (rows/s)")
+    print(f"{'rows':>8} " + " ".join(f"{name:>12}" for name in engines))
+    for size in args.batch_sizes:
+        batch = data.iloc[:size]
+        repeat = max(3, min(args.repeat, 20_000 // size))
+        rates = [size / latency_ms(lambda: predict(batch), repeat)[0] * 1000 for predict in engines.values()]
+        print(f"{size:>8} " + " ".join(f"{rate:>12,.0f}" for rate in rates))
+
+    print("\nend-to-end predict_allocation (ms)")
+    profile = {
+        "income": 80000, "age": 30, "risk_profile": "Moderate",
+        "goal_type": "Wealth Building", "investment_amount": 10000
+    }
+    active = recommender.allocation_grid
+    recommender.allocation_grid = None
+    model_p50, _ = latency_ms(lambda: recommender.predict_allocation(profile), args.repeat // 4 or 1)
+    recommender.allocation_grid = grid
+    grid_p50, _ = latency_ms(lambda: recommender.predict_allocation(profile), args.repeat // 4 or 1)
+    recommender.allocation_grid = active
+    print(f"model {model_p50:.2f}, grid {grid_p50:.2f}")
+
+
+if __name__ == "__main__":
+    main()
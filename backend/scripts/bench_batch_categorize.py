@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: row-by-row hybrid_categorize vs vectorized batch_categorize
+
+Usage:
+    python scripts/bench_batch_categorize.py [--sizes 100 10000 1000000]
+
+The row-by-row baseline is measured on at most --baseline-cap rows and
+extrapolated linearly beyond that, since it takes minutes at 1M rows.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.ml_models.budget_categorizer import budget_categorizer
+
+
+def build_transactions(size: int):
+    """Repeat the sample dataset until it reaches the requested size"""
+    df = budget_categorizer.create_sample_dataset(200)
+    rows = list(zip(df['description'], df['amount']))
+    return [
+        {"description": rows[i % len(rows)][0], "amount": float(rows[i % len(rows)][1])}
+        for i in range(size)
+    ]
+
+
+def row_by_row(transactions):
+    return [
+        budget_categorizer.hybrid_categorize(t['description'], t['amount'])
+        for t in transactions
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--baseline-cap", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # The sample rows repeat, so measure model throughput rather than cache hits
+    budget_categorizer.result_cache.maxsize = 0
+    budget_categorizer.result_cache.clear()
+
+    print(f"{'rows':>10} {'row-by-row rows/s':>20} {'batch rows/s':>15} {'speedup':>9}")
+    for size in args.sizes:
+        transactions = build_transactions(size)
+
+        sample = transactions[:min(size, args.baseline_cap)]
+        start = time.perf_counter()
+        row_by_row(sample)
+        baseline_rate = len(sample) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        budget_categorizer.batch_categorize(transactions)
+        batch_rate = size / (time.perf_counter() - start)
+
+        note = " (baseline extrapolated)" if len(sample) < size else ""
+        print(f"{size:>10} {baseline_rate:>20,.0f} {batch_rate:>15,.0f} {batch_rate / baseline_rate:>8.1f}x{note}")
+
+
+if __name__ == "__main__":
+    main()
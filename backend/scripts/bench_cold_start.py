@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API cold start with eager vs lazy model loading
+
+Usage:
+    python scripts/bench_cold_start.py [--runs 3] [--output cold_start.json]
+
+For each mode the script measures, in fresh processes:
+  - import:  time to import app.main
+  - serving: time from launching uvicorn until /health first answers
+  - ready:   time from launching uvicorn until /health reports every model ready
+
+Startup includes the MongoDB connection attempt, so run it with MongoDB up
+(or expect the connect timeout in the serving time). Models are loaded from
+the pickles on disk; delete them first to measure cold training instead.
+With --output the medians are written as JSON so runs can be compared over time.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {"eager": "false", "lazy": "true"}
+
+
+def mode_env(lazy: str) -> dict:
+    return {**os.environ, "LAZY_MODEL_LOADING": lazy, "PYTHONPATH": str(BACKEND_DIR)}
+
+
+def measure_import(lazy: str) -> float:
+    code = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=mode_env(lazy),
+        capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_server(lazy: str, timeout: float) -> tuple:
+    """Seconds until /health answers and until it reports every model ready"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=mode_env(lazy), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    serving = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                health = httpx.get(url, timeout=1.0).json()
+            except httpx.HTTPError:
+                time.sleep(0.02)
+                continue
+            now = time.perf_counter() - start
+            if serving is None:
+                serving = now
+            if all(model["status"] != "loading" for model in health["models"].values()):
+                ready = now
+                break
+            time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    if ready is None:
+        raise RuntimeError(f"Server did not become ready within {timeout}s")
+    return serving, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for a server to become ready")
+    parser.add_argument("--output", type=Path, help="write the median timings as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'mode':>6} {'import s':>9} {'serving s':>10} {'ready s':>8}")
+    for mode, lazy in MODES.items():
+        imports, serving, ready = [], [], []
+        for _ in range(args.runs):
+            imports.append(measure_import(lazy))
+            first_response, models_ready = measure_server(lazy, args.timeout)
+            serving.append(first_response)
+            ready.append(models_ready)
+
+        results[mode] = {
+            "import_s": round(statistics.median(imports), 3),
+            "serving_s": round(statistics.median(serving), 3),
+            "ready_s": round(statistics.median(ready), 3)
+        }
+        row = results[mode]
+        print(f"{mode:>6} {row['import_s']:>9.3f} {row['serving_s']:>10.3f} {row['ready_s']:>8.3f}")
+
+    if args.output:
+        report = {
+            "benchmark": "cold_start",
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "runs": args.runs,
+            "results": results
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sklearn pipeline vs compiled flat-array forest for investment allocation
+
+Usage:
+    python scripts/bench_compiled_forest.py [--rows 20000] [--repeat 200] [--export model.npz]
+
+Checks that the compiled forest reproduces Pipeline.predict bit for bit
+(including unknown categories and missing numbers), then compares latency
+for single rows and batches, and the file size, tree array memory and load
+time of the two artifacts.
+--export also writes the compiled forest as an .npz file.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from joblib import load
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.ml_models.compiled_forest import CompiledForest
+from app.models.ml_models.investment_recommender import investment_recommender
+
+
+def latency_ms(fn, repeat: int) -> tuple:
+    """p50 and p95 of ``fn()`` in milliseconds"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def timed_load(loader, path) -> tuple:
+    start = time.perf_counter()
+    obj = loader(path)
+    return obj, (time.perf_counter() - start) * 1000
+
+
+def forest_array_mb(pipeline) -> float:
+    """Node and value arrays held by the sklearn trees (allocated in C, invisible to tracemalloc)"""
+    total = 0
+    for estimator in pipeline.named_steps["regressor"].estimators_:
+        state = estimator.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000, help="rows for the equivalence check")
+    parser.add_argument("--repeat", type=int, default=200, help="timed calls per single-row measurement")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 10_000])
+    parser.add_argument("--export", type=Path, help="write the compiled forest to this .npz file")
+    args = parser.parse_args()
+
+    recommender = investment_recommender
+    pipeline = recommender.model
+    if pipeline is None:
+        sys.exit("No investment model available; train one first")
+
+    start = time.perf_counter()
+    compiled = CompiledForest.from_pipeline(pipeline)
+    print(f"compiled in {(time.perf_counter() - start) * 1000:.1f} ms: {compiled.info()}")
+
+    columns = list(pipeline.named_steps["preprocessor"].feature_names_in_)
+    data = recommender.create_advanced_dataset(args.rows, seed=7)[columns]
+    # Exercise the imputers and unknown-category handling too
+    data.loc[data.index[::97], "risk_profile"] = "Unknown"
+    data.loc[data.index[::89], "goal_type"] = None
+    data.loc[data.index[::83], "income"] = np.nan
+
+    forest = pipeline.named_steps["regressor"]
+    configured_jobs = forest.n_jobs
+    forest.n_jobs = 1
+    reference = pipeline.predict(data)
+    forest.n_jobs = configured_jobs
+    predicted = compiled.predict(data)
+    print(f"bit-identical to Pipeline.predict over {args.rows} rows: {np.array_equal(reference, predicted)} "
+          f"(max |diff| {np.abs(reference - predicted).max():.1e})")
+
+    print("\nsingle row (ms)")
+    row_frame = data.iloc[:1]
+    row_columns = {name: [value] for name, value in row_frame.iloc[0].items()}
+    sk_p50, sk_p95 = latency_ms(lambda: pipeline.predict(row_frame), args.repeat)
+    cf_p50, cf_p95 = latency_ms(lambda: compiled.predict(row_columns), args.repeat)
+    print(f"{'':>10} {'p50':>8} {'p95':>8}")
+    print(f"{'sklearn':>10} {sk_p50:>8.3f} {sk_p95:>8.3f}")
+    print(f"{'compiled':>10} {cf_p50:>8.3f} {cf_p95:>8.3f}   ({sk_p50 / cf_p50:.0f}x)")
+
+    print("\nbatches (rows/s)")
+    print(f"{'rows':>8} {'sklearn':>12} {'compiled':>12} {'speedup':>8}")
+    for size in args.batch_sizes:
+        batch = data.iloc[:size]
+        repeat = max(3, min(args.repeat, 20_000 // size))
+        sk_ms, _ = latency_ms(lambda: pipeline.predict(batch), repeat)
+        cf_ms, _ = latency_ms(lambda: compiled.predict(batch), repeat)
+        print(f"{size:>8} {size / sk_ms * 1000:>12,.0f} {size / cf_ms * 1000:>12,.0f} {sk_ms / cf_ms:>7.1f}x")
+
+    print("\nend-to-end predict_allocation (ms)")
+    profile = {
+        "income": 80000, "age": 30, "risk_profile": "Moderate",
+        "goal_type": "Wealth Building", "investment_amount": 10000
+    }
+    engine = recommender.compiled_model
+    recommender.compiled_model = None
+    sk_p50, _ = latency_ms(lambda: recommender.predict_allocation(profile), args.repeat // 4 or 1)
+    recommender.compiled_model = compiled
+    cf_p50, _ = latency_ms(lambda: recommender.predict_allocation(profile), args.repeat // 4 or 1)
+    recommender.compiled_model = engine
+    print(f"sklearn {sk_p50:.2f}, compiled {cf_p50:.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        npz_path = args.export or Path(tmp_dir) / "investment_model_compiled.npz"
+        compiled.save(npz_path)
+        loaded_pipeline, pkl_load_ms = timed_load(load, recommender.model_path)
+        loaded_compiled, npz_load_ms = timed_load(CompiledForest.load, npz_path)
+        pkl_mb = forest_array_mb(loaded_pipeline)
+        npz_mb = loaded_compiled.nbytes / 2**20
+        pkl_size = recommender.model_path.stat().st_size / 2**20
+        npz_size = Path(npz_path).stat().st_size / 2**20
+
+    print("\nartifacts")
+    print(f"{'':>10} {'file MB':>8} {'arrays MB':>10} {'load ms':>8}")
+    print(f"{'pickle':>10} {pkl_size:>8.2f} {pkl_mb:>10.2f} {pkl_load_ms:>8.1f}")
+    print(f"{'npz':>10} {npz_size:>8.2f} {npz_mb:>10.2f} {npz_load_ms:>8.1f}")
+    if args.export:
+        print(f"\nCompiled forest written to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent sign-ins with bcrypt inline vs on the password hashing pool
+
+Usage:
+    python scripts/bench_password_hashing.py [--logins 64] [--concurrency 16] [--workers 2 4]
+    python scripts/bench_password_hashing.py --url http://127.0.0.1:8000 --email a@b.co --password Secret123
+
+Without --url, runs the password check of a sign-in in one event loop: first
+inline (as authenticate_user used to), then through PasswordHasher with each
+--workers setting. All sign-ins arrive at once; latency is measured from
+arrival. A heartbeat task ticks every 10 ms meanwhile; its worst delay
+shows how long the loop was blocked for every other request. Throughput
+only scales with --workers up to the number of CPU cores.
+With --url, sends concurrent POST /api/v1/auth/signin requests to a running
+server for an existing account instead.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.password_hasher import PasswordHasher
+from app.utils.auth import get_password_hash, verify_password
+
+HEARTBEAT_INTERVAL = 0.01
+
+
+def summarize(label: str, latencies: list, elapsed: float, stalls: list = None):
+    latencies.sort()
+    p99 = latencies[int(0.99 * (len(latencies) - 1))]
+    line = (f"{label:>12} {len(latencies) / elapsed:>9.1f} {statistics.median(latencies):>9.1f} "
+            f"{p99:>9.1f}")
+    if stalls is not None:
+        line += f" {max(stalls, default=0):>10.1f}"
+    print(line)
+
+
+async def heartbeat(stalls: list, stop: asyncio.Event):
+    """Record how late each tick fires beyond its interval"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        stalls.append((time.perf_counter() - start - HEARTBEAT_INTERVAL) * 1000)
+
+
+async def run_logins(check, logins: int, concurrency: int) -> tuple:
+    """Run ``logins`` password checks, ``concurrency`` at a time; returns latencies, elapsed, stalls"""
+    gate = asyncio.Semaphore(concurrency)
+    latencies, stalls = [], []
+    stop = asyncio.Event()
+
+    async def login():
+        async with gate:
+            await check()
+        # Everything arrives at ``start``; a blocked loop also delays when a coroutine begins
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    ticker = asyncio.create_task(heartbeat(stalls, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return latencies, elapsed, stalls
+
+
+async def local(args):
+    password = "Benchmark123"
+    hashed = get_password_hash(password)
+
+    async def inline():
+        assert verify_password(password, hashed)
+
+    print(f"{args.logins} sign-ins, {args.concurrency} concurrent")
+    print(f"{'':>12} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'stall ms':>10}")
+    summarize("inline", *await run_logins(inline, args.logins, args.concurrency))
+
+    for workers in args.workers:
+        hasher = PasswordHasher(workers=workers, max_queue=args.logins, queue_timeout=600)
+
+        async def pooled():
+            assert await hasher.verify(password, hashed)
+
+        summarize(f"pool x{workers}", *await run_logins(pooled, args.logins, args.concurrency))
+        hasher.shutdown()
+
+
+async def remote(args):
+    payload = {"email": args.email, "password": args.password}
+    async with httpx.AsyncClient(base_url=args.url, timeout=60.0) as client:
+        failures = 0
+
+        async def signin():
+            nonlocal failures
+            response = await client.post("/api/v1/auth/signin", json=payload)
+            if response.status_code != 200:
+                failures += 1
+
+        await signin()
+        print(f"{args.logins} sign-ins against {args.url}, {args.concurrency} concurrent")
+        print(f"{'':>12} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        latencies, elapsed, _ = await run_logins(signin, args.logins, args.concurrency)
+        summarize("server", latencies, elapsed)
+        if failures:
+            print(f"{failures} requests did not return 200")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="pool sizes to compare")
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    if args.url:
+        if not (args.email and args.password):
+            parser.error("--url needs --email and --password of an existing account")
+        asyncio.run(remote(args))
+    else:
+        asyncio.run(local(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: profile reads by global sort vs by _id with a projection
+
+Usage:
+    python scripts/bench_profile_read.py [--mongodb-url mongodb://localhost:27017] [--users 1000000] [--keep]
+
+Seeds a scratch database (finzer_profile_bench) with --users user documents
+shaped like the ones AuthService creates, then times the profile lookups:
+
+  sort             find_one({}, sort created_at desc), the old route query
+  sort + index     the same query once the created_at index exists
+  _id+projection   find_one by _id with PROFILE_PROJECTION, the new query
+
+For each it prints p50/p99 latency, the documents examined according to
+explain(), and the size of the returned document. The scratch database is
+dropped afterwards unless --keep is given (re-runs then skip seeding).
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import bson
+from pymongo import MongoClient
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.api.routers.profile import PROFILE_PROJECTION
+from app.core.config import settings
+
+DATABASE_NAME = "finzer_profile_bench"
+SEED_BATCH = 10_000
+
+
+def user_document(index: int, created_at: datetime) -> dict:
+    return {
+        "name": f"User {index}",
+        "email": f"user{index}@example.com",
+        "password": "$2b$12$" + "x" * 53,
+        "role": "user",
+        "is_verified": True,
+        "is_active": True,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "last_login": None,
+        "profile": {"avatar_url": None, "phone": None, "date_of_birth": None, "country": "India", "location": None},
+        "preferences": {
+            "currency": "INR", "language": "en",
+            "notifications": {"email": True, "push": True, "newsletter": False}
+        },
+        "financial_profile": {
+            "monthly_income_range": "50k-1L", "financial_goal": "Wealth Building",
+            "financial_status": "stable", "risk_tolerance": "moderate", "investment_experience": "beginner"
+        },
+        "onboarding": {"completed": True, "steps_completed": ["account", "profile", "preferences"], "completed_at": created_at}
+    }
+
+
+def seed(users, count: int):
+    existing = users.estimated_document_count()
+    if existing >= count:
+        print(f"using {existing:,} existing users")
+        return
+    users.drop()
+    users.create_index("email", unique=True)
+    start_date = datetime.utcnow() - timedelta(days=3 * 365)
+    start = time.perf_counter()
+    for offset in range(0, count, SEED_BATCH):
+        batch = [
+            user_document(index, start_date + timedelta(seconds=index * 90))
+            for index in range(offset, min(offset + SEED_BATCH, count))
+        ]
+        # Shuffled so the newest user is not simply the last one on disk
+        random.shuffle(batch)
+        users.insert_many(batch, ordered=False)
+    print(f"seeded {count:,} users in {time.perf_counter() - start:.0f}s")
+
+
+def measure(label: str, run, explain, repeat: int):
+    run()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        document = run()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    stats = explain()["executionStats"]
+    print(f"{label:>16} {statistics.median(samples):>9.2f} {samples[int(0.99 * (len(samples) - 1))]:>9.2f} "
+          f"{stats['totalDocsExamined']:>10,} {len(bson.encode(document)):>8,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50, help="timed lookups per query (the sort is slow)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongodb_url, serverSelectionTimeoutMS=5000)
+    database = client[DATABASE_NAME]
+    users = database.users
+    try:
+        seed(users, args.users)
+        sample_ids = [doc["_id"] for doc in users.aggregate([{"$sample": {"size": 1000}}, {"$project": {"_id": 1}}])]
+
+        def by_sort():
+            return users.find_one({}, sort=[("created_at", -1)])
+
+        def explain_sort():
+            return users.find({}).sort("created_at", -1).limit(1).explain()
+
+        def by_id():
+            return users.find_one({"_id": random.choice(sample_ids)}, PROFILE_PROJECTION)
+
+        def explain_id():
+            return users.find({"_id": sample_ids[0]}, PROFILE_PROJECTION).limit(1).explain()
+
+        print(f"\n{'':>16} {'p50 ms':>9} {'p99 ms':>9} {'examined':>10} {'bytes':>8}")
+        if "created_at_-1" in users.index_information():
+            users.drop_index("created_at_-1")
+        measure("sort", by_sort, explain_sort, max(5, args.repeat // 10))
+        users.create_index([("created_at", -1)])
+        measure("sort + index", by_sort, explain_sort, args.repeat)
+        measure("_id+projection", by_id, explain_id, args.repeat * 10)
+    finally:
+        if not args.keep:
+            client.drop_database(DATABASE_NAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
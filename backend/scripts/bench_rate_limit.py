@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rate limiter overhead, memory use and behaviour under a burst
+
+Usage:
+    python scripts/bench_rate_limit.py [--keys 100000] [--requests 20000] [--mongodb-url mongodb://localhost:27017]
+
+1. Memory backend: cost of one consume() with --keys distinct clients, the
+   size of the bucket table and the time of an idle-eviction sweep.
+2. A route on an in-process ASGI app, with and without RateLimitMiddleware:
+   requests/s, then one client bursting past its bucket to show how many
+   requests get through and the Retry-After it is given.
+With --mongodb-url, step 2 also runs with the shared mongodb backend
+against that server (a local mongod is enough as a stand-in for the
+shared store); its buckets go to the finzer_rate_limit_bench database,
+which is dropped afterwards.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.rate_limit import MemoryRateLimitBackend, MongoRateLimitBackend, RateLimiter, RateLimitMiddleware
+
+DATABASE_NAME = "finzer_rate_limit_bench"
+CAPACITY = 100
+WINDOW = 60
+
+
+async def bench_memory_backend(keys: int):
+    backend = MemoryRateLimitBackend(max_keys=keys, evict_interval=3600)
+    names = [f"ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(keys)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for name in names:
+        await backend.consume(name, 1, CAPACITY, CAPACITY / WINDOW)
+    first_us = (time.perf_counter() - start) / keys * 1e6
+    table_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for name in names:
+        await backend.consume(name, 1, CAPACITY, CAPACITY / WINDOW)
+    repeat_us = (time.perf_counter() - start) / keys * 1e6
+
+    # Pretend the window has passed so every bucket is idle
+    start = time.perf_counter()
+    backend._evict_idle(time.monotonic() + WINDOW, CAPACITY, CAPACITY / WINDOW)
+    sweep_ms = (time.perf_counter() - start) * 1000
+
+    print(f"memory backend, {keys:,} clients")
+    print(f"  consume: new client {first_us:.2f}us, known client {repeat_us:.2f}us")
+    print(f"  bucket table {table_mb:.1f}MB ({table_mb * 1e6 / keys:.0f} bytes/client)")
+    print(f"  idle sweep {sweep_ms:.1f}ms, {backend.stats()['tracked_keys']} buckets left")
+
+
+def make_app(limiter=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"ok": True}
+
+    if limiter is not None:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return app
+
+
+def make_limiter(backend) -> RateLimiter:
+    return RateLimiter(
+        backend, requests=CAPACITY, window=WINDOW, route_costs={}, exempt_paths=["/health"],
+        api_key_header="X-API-Key", api_keys=[], trust_forwarded=True
+    )
+
+
+async def throughput(app: FastAPI, requests: int, clients: int = 1000) -> float:
+    """Requests/s with requests spread over ``clients`` addresses so none is limited"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for index in range(requests):
+            await client.get("/api/v1/ping", headers={"X-Forwarded-For": f"10.0.{index % clients >> 8}.{index % clients & 255}"})
+        return requests / (time.perf_counter() - start)
+
+
+async def burst(app: FastAPI, requests: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        statuses = []
+        retry_after = None
+        for _ in range(requests):
+            response = await client.get("/api/v1/ping", headers={"X-Forwarded-For": "192.0.2.1"})
+            statuses.append(response.status_code)
+            retry_after = response.headers.get("Retry-After", retry_after)
+    print(f"  burst of {requests}: {statuses.count(200)} allowed, {statuses.count(429)} limited, Retry-After {retry_after}s")
+
+
+async def run(args):
+    await bench_memory_backend(args.keys)
+
+    print(f"\nroute throughput, {args.requests:,} requests")
+    baseline = await throughput(make_app(), args.requests)
+    print(f"  no limiter        {baseline:>8,.0f} req/s")
+    memory_app = make_app(make_limiter(MemoryRateLimitBackend(100000, 60)))
+    print(f"  memory backend    {await throughput(memory_app, args.requests):>8,.0f} req/s")
+    await burst(memory_app, CAPACITY * 2)
+
+    if args.mongodb_url:
+        client = AsyncIOMotorClient(args.mongodb_url, serverSelectionTimeoutMS=5000)
+        database = client[DATABASE_NAME]
+        try:
+            limiter = make_limiter(MongoRateLimitBackend(lambda: database))
+            mongo_app = make_app(limiter)
+            print(f"  mongodb backend   {await throughput(mongo_app, args.requests // 10):>8,.0f} req/s")
+            await burst(mongo_app, CAPACITY * 2)
+            print(f"  backend errors {limiter.errors}")
+        finally:
+            await client.drop_database(DATABASE_NAME)
+            client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100000, help="distinct clients for the backend benchmark")
+    parser.add_argument("--requests", type=int, default=20000, help="requests per throughput run")
+    parser.add_argument("--mongodb-url", help="also run against the shared mongodb backend")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JWT verification with and without the verified-token cache
+
+Usage:
+    python scripts/bench_token_verification.py [--tokens 100] [--requests 20000] [--concurrency 64]
+
+Measures verify_token on its own, then the whole auth dependency chain
+(HTTPBearer -> get_current_user -> get_current_active_user) behind a
+protected route on an in-process ASGI app. Clients reuse --tokens
+access tokens carrying user claims, so no database lookup happens and
+only the token handling differs between the runs.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas.auth import UserResponse
+from app.services.auth_service import auth_service
+from app.utils import auth as auth_utils
+from app.utils.dependencies import get_current_active_user
+
+
+def make_tokens(count: int) -> list:
+    now = datetime.utcnow()
+    return [
+        auth_utils.create_access_token(auth_service._token_data({
+            "_id": f"{index:024x}", "email": f"user{index}@example.com", "name": f"User {index}",
+            "role": "user", "is_verified": True, "created_at": now, "updated_at": now
+        }))
+        for index in range(count)
+    ]
+
+
+def verify_us(tokens: list, rounds: int) -> float:
+    """Mean microseconds per verify_token call"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for token in tokens:
+            auth_utils.verify_token(token)
+    return (time.perf_counter() - start) / (rounds * len(tokens)) * 1e6
+
+
+async def drive(app: FastAPI, tokens: list, requests: int, concurrency: int) -> tuple:
+    """Requests/s and p50/p99 latency (ms) against the protected route"""
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(offset: int):
+            for index in range(offset, requests, concurrency):
+                headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+                start = time.perf_counter()
+                response = await client.get("/me", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f"Unexpected status {response.status_code}: {response.text}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(offset) for offset in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return requests / elapsed, statistics.median(latencies), latencies[int(0.99 * (len(latencies) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=100, help="distinct clients/tokens")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    app = FastAPI()
+
+    @app.get("/me", response_model=UserResponse)
+    async def me(user: UserResponse = Depends(get_current_active_user)):
+        return user
+
+    tokens = make_tokens(args.tokens)
+    cache = auth_utils.token_cache
+    configured_size = cache.maxsize
+    rounds = max(1, 20_000 // args.tokens)
+
+    print(f"{'':>10} {'verify µs':>10} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, size in [("uncached", 0), ("cached", max(configured_size, args.tokens))]:
+        cache.clear()
+        cache.maxsize = size
+        cache.hits = cache.misses = 0
+        per_call = verify_us(tokens, rounds)
+        rate, p50, p99 = asyncio.run(drive(app, tokens, args.requests, args.concurrency))
+        print(f"{label:>10} {per_call:>10.1f} {rate:>10,.0f} {p50:>8.2f} {p99:>8.2f}")
+
+    print(f"\ncached run: {cache.stats()}")
+    cache.maxsize = configured_size
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compare the index registry with the database and check the hot queries
+
+Usage:
+    python scripts/check_indexes.py [--apply] [--explain]
+
+Prints the drift between app/core/indexes.py and the indexes that exist in
+DATABASE_NAME (missing, mismatched and undeclared indexes per collection).
+--apply creates the declared indexes first, as the API does at startup.
+--explain runs explain() on every HOT_QUERIES entry and lists the ones
+whose winning plan is a collection scan.
+Exits with status 1 when there is drift or a flagged query, so it can run
+in CI or a deploy check.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.core.indexes import INDEX_REGISTRY, apply_indexes, find_collection_scans, index_drift
+
+
+async def run(args) -> int:
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=5000)
+    database = client[settings.DATABASE_NAME]
+    problems = 0
+    try:
+        if args.apply:
+            result = await apply_indexes(database)
+            print(f"created/verified {len(result['created'])} indexes")
+            for name, error in result["errors"].items():
+                print(f"  failed {name}: {error}")
+                problems += 1
+
+        drift = await index_drift(database)
+        declared = sum(len(models) for models in INDEX_REGISTRY.values())
+        if not drift:
+            print(f"no drift: {declared} declared indexes match {settings.DATABASE_NAME}")
+        for collection, report in drift.items():
+            for kind, names in report.items():
+                if names:
+                    print(f"{collection}: {kind} {', '.join(names)}")
+                    problems += len(names)
+
+        if args.explain:
+            scans = await find_collection_scans(database)
+            for name in scans:
+                print(f"collection scan: {name}")
+            if not scans:
+                print("no hot query runs as a collection scan")
+            problems += len(scans)
+    finally:
+        client.close()
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apply", action="store_true", help="create the declared indexes first")
+    parser.add_argument("--explain", action="store_true", help="flag hot queries that scan a collection")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
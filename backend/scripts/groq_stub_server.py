@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Groq chat completions API
+
+Usage:
+    python scripts/groq_stub_server.py [--port 8001] [--first-token-ms 800] [--token-delay-ms 20]
+
+Then start the API against it:
+    GROQ_API_KEY=stub GROQ_API_BASE_URL=http://127.0.0.1:8001/openai/v1 python run.py
+
+Non-streaming requests answer after the full simulated generation time;
+``stream: true`` requests emit OpenAI-style SSE chunks one word at a time.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = (
+    "Start by setting aside 20% of your monthly income before spending. "
+    "Build an emergency fund covering six months of expenses in a liquid fund, "
+    "then invest the rest through monthly SIPs in a diversified index fund."
+)
+
+
+def create_app(first_token_ms: float, token_delay_ms: float) -> FastAPI:
+    app = FastAPI(title="Groq API stub")
+    words = ANSWER.split(" ")
+
+    @app.get("/openai/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "llama-3.1-8b-instant", "object": "model"}]}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = payload.get("model", "stub")
+
+        if not payload.get("stream"):
+            await asyncio.sleep((first_token_ms + token_delay_ms * len(words)) / 1000)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": ANSWER},
+                    "finish_reason": "stop"
+                }]
+            })
+
+        async def events():
+            await asyncio.sleep(first_token_ms / 1000)
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": word if i == 0 else f" {word}"},
+                        "finish_reason": None
+                    }]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(token_delay_ms / 1000)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-ms", type=float, default=800, help="simulated prompt processing time")
+    parser.add_argument("--token-delay-ms", type=float, default=20, help="delay between streamed words")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.first_token_ms, args.token_delay_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
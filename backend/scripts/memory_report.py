@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory report for the API server
+
+Usage:
+    python scripts/memory_report.py --pid <server pid>
+    python scripts/memory_report.py --compare [--workers 4]
+
+--pid reports a running server: the given process and its children (the
+workers of run.py with PREFORK_WORKERS, or of uvicorn --workers).
+--compare starts the API both ways on a free port, sends a few requests to
+every worker, and prints both reports.
+
+Rss counts shared pages once in every process; Pss splits them between the
+processes sharing them, so the total Pss is what the server really costs.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.utils.memory import child_pids, read_memory_usage
+
+SAMPLE_PROFILE = {
+    "income": 80000, "age": 30, "risk_profile": "Moderate",
+    "goal_type": "Wealth Building", "investment_amount": 10000
+}
+
+
+def process_name(pid: int) -> str:
+    try:
+        cmdline = Path(f"/proc/{pid}/cmdline").read_bytes().replace(b"\0", b" ").decode().strip()
+    except OSError:
+        return "?"
+    return cmdline[:60]
+
+
+def report(pid: int) -> float:
+    """Print one row per process and return the total Pss in MB"""
+    print(f"{'pid':>8} {'rss MB':>8} {'pss MB':>8} {'shared MB':>10} {'private MB':>11}  command")
+    totals = {"rss_mb": 0.0, "pss_mb": 0.0}
+    for process in [pid] + child_pids(pid):
+        usage = read_memory_usage(process)
+        if usage is None:
+            continue
+        totals["rss_mb"] += usage["rss_mb"]
+        totals["pss_mb"] += usage["pss_mb"]
+        print(
+            f"{process:>8} {usage['rss_mb']:>8.1f} {usage['pss_mb']:>8.1f} "
+            f"{usage['shared_mb']:>10.1f} {usage['private_mb']:>11.1f}  {process_name(process)}"
+        )
+    print(f"{'total':>8} {totals['rss_mb']:>8.1f} {totals['pss_mb']:>8.1f}")
+    return totals["pss_mb"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_and_report(label: str, command: list, env: dict, port: int, workers: int, timeout: float) -> float:
+    print(f"\n== {label} ==")
+    server = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env={**os.environ, **env, "PYTHONPATH": str(BACKEND_DIR)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                httpx.get(f"{base_url}/health", timeout=2.0)
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{label} did not start within {timeout}s")
+                time.sleep(0.2)
+
+        # Warm every worker's prediction path; a new connection per request lets
+        # the kernel spread them across the workers
+        for _ in range(workers * 8):
+            httpx.post(f"{base_url}/api/v1/investment/recommend", json=SAMPLE_PROFILE, timeout=30.0)
+            httpx.post(f"{base_url}/api/v1/budget/categorize", json={"description": "grocery shopping"}, timeout=30.0)
+        time.sleep(1.0)
+
+        return report(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def compare(workers: int, timeout: float):
+    port = free_port()
+    plain = serve_and_report(
+        f"uvicorn --workers {workers}",
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        {}, port, workers, timeout
+    )
+
+    port = free_port()
+    preforked = serve_and_report(
+        f"run.py with PREFORK_WORKERS={workers}",
+        [sys.executable, "run.py"],
+        {"PREFORK_WORKERS": str(workers), "API_HOST": "127.0.0.1", "API_PORT": str(port), "LOG_LEVEL": "WARNING"},
+        port, workers, timeout
+    )
+
+    print(f"\nTotal Pss: {plain:.1f} MB with uvicorn --workers, {preforked:.1f} MB pre-forked "
+          f"({plain - preforked:.1f} MB saved)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pid", type=int, help="report a running server process and its workers")
+    parser.add_argument("--compare", action="store_true", help="start both serving modes and compare them")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    if read_memory_usage() is None:
+        sys.exit("This report needs /proc/<pid>/smaps_rollup (Linux 4.14+)")
+
+    if args.compare:
+        compare(args.workers, args.timeout)
+    elif args.pid:
+        report(args.pid)
+    else:
+        parser.error("pass --pid or --compare")
+
+
+if __name__ == "__main__":
+    main()
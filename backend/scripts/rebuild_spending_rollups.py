@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rebuild the monthly spending rollups from the stored transactions
+
+Usage:
+    python scripts/rebuild_spending_rollups.py [--user <user id>]
+
+Deletes the spending_rollups of one user (or of everyone) and recomputes
+them with an aggregation over the transactions collection, merged back
+into spending_rollups. Use it after rollup updates failed (the API logs
+"Spending rollups not updated"), after transactions were edited or
+imported directly, or to create the rollups for history stored before
+they existed. Transactions stored while it runs may be miscounted, so run
+it when categorization traffic is low. Connects with MONGODB_URL /
+DATABASE_NAME from the settings.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Add backend directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.core.indexes import apply_indexes
+from app.services.spending_rollups import rebuild_rollups
+
+
+async def run(args):
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=5000)
+    database = client[settings.DATABASE_NAME]
+    try:
+        # $merge needs the unique user_id/month index
+        await apply_indexes(database)
+
+        start = time.perf_counter()
+        written = await rebuild_rollups(database, user_id=args.user)
+        scope = f"user {args.user}" if args.user else "all users"
+        print(f"Rebuilt {written:,} monthly rollups for {scope} in {time.perf_counter() - start:.1f}s")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user", help="only rebuild this user's rollups")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
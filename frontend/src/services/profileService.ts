@@ -63,14 +63,20 @@ class ProfileService {
     this.baseUrl = API_BASE_URL;
   }
 
+  private headers(): HeadersInit {
+    const token = localStorage.getItem('access_token');
+    return {
+      'Content-Type': 'application/json',
+      ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+    };
+  }
+
   async getProfile(): Promise<UserProfile> {
     console.log('🔄 Fetching user profile from database...');
     
     const response = await fetch(`${this.baseUrl}/profile/me`, {
       method: 'GET',
-      headers: {
-        'Content-Type': 'application/json'
-      }
+      headers: this.headers()
     });
 
     if (!response.ok) {
@@ -95,9 +101,7 @@ class ProfileService {
     
     const response = await fetch(`${this.baseUrl}/profile/personal`, {
       method: 'PUT',
-      headers: {
-        'Content-Type': 'application/json'
-      },
+      headers: this.headers(),
       body: JSON.stringify(data)
     });
 
@@ -109,7 +113,7 @@ class ProfileService {
 
     const result = await response.json();
     console.log('✅ Personal info updated successfully');
-    return result.data;
+    return result;
   }
 
   async updatePreferences(data: {
@@ -124,9 +128,7 @@ class ProfileService {
     
     const response = await fetch(`${this.baseUrl}/profile/preferences`, {
       method: 'PUT',
-      headers: {
-        'Content-Type': 'application/json'
-      },
+      headers: this.headers(),
       body: JSON.stringify(data)
     });
 
@@ -138,7 +140,7 @@ class ProfileService {
 
     const result = await response.json();
     console.log('✅ Preferences updated successfully');
-    return result.data;
+    return result;
   }
 }
 